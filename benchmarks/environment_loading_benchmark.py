@@ -0,0 +1,77 @@
+""" Benchmark of loading environments from json, binary and pkl files.
+
+    Reports the median time of reading the environment data from json and
+    binary files, of reading the grid completely after loading (memory-mapped
+    grids are only read on access), and of reading the environment from pkl
+    files. Runs on generated maps of increasing size, the files are written
+    to a temporary directory.
+"""
+import statistics
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.flatland.environment_file_type import EnvironmentFileType
+from flatlandasp.features.environments.map_generation import generate_environment_data
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+
+
+BINARY_FILE_NAME = f"map.{EnvironmentFileType.BINARY.value}"
+
+
+def measure(load: Callable[[], object], repetitions: int) -> float:
+    """ Get median time of loading."""
+    latencies = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        load()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies)
+
+
+def run_benchmark(sizes: tuple[int, ...] = (50, 200, 500), repetitions: int = 5) -> None:
+    print(f"{'size':>5} | {'json [MB]':>9} | {'binary [MB]':>11} | {'json [s]':>8} | "
+          f"{'binary [s]':>10} | {'binary + grid [s]':>17} | {'pkl [s]':>7}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = f"{directory}/"
+
+        for size in sizes:
+            environment_data = generate_environment_data(
+                GenerationInput(width=size, height=size, number_of_sidings=size // 10,
+                                number_of_stations=size // 5, number_of_agents=size // 10))
+
+            environment_crud.create_data_as_json_file(file_name="map.json", environment_data=environment_data,
+                                                      path=path)
+            environment_crud.create_data_as_binary_file(file_name=BINARY_FILE_NAME,
+                                                        environment_data=environment_data, path=path)
+
+            environment = environment_crud.get_environment_from_data(environment_data)
+            environment.reset()
+            environment_crud.create_as_pickle_file("map.pkl", environment, path=path)
+
+            json_time = measure(lambda: environment_crud.read_data_from_json_file(
+                file_name="map.json", path=path), repetitions)
+            binary_time = measure(lambda: environment_crud.read_data_from_binary_file(
+                file_name=BINARY_FILE_NAME, path=path), repetitions)
+            binary_grid_time = measure(lambda: np.array(environment_crud.read_data_from_binary_file(
+                file_name=BINARY_FILE_NAME, path=path).grid), repetitions)
+            pkl_time = measure(lambda: environment_crud.read_from_pickle_file("map.pkl", path=path),
+                               repetitions)
+
+            with open(f"{path}map.json", "rb") as f:
+                json_size = len(f.read()) / 2 ** 20
+            with open(f"{path}{BINARY_FILE_NAME}", "rb") as f:
+                binary_size = len(f.read()) / 2 ** 20
+
+            print(f"{size:>5} | {json_size:>9.2f} | {binary_size:>11.2f} | {json_time:>8.4f} | "
+                  f"{binary_time:>10.4f} | {binary_grid_time:>17.4f} | {pkl_time:>7.4f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
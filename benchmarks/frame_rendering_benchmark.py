@@ -0,0 +1,98 @@
+""" Benchmark of rendering every step of a simulation as image.
+
+    Replays the reference plan of a generated map with the headless
+    simulator and renders every step as base64 encoded PNG. Compared are
+    rendering the full environment with a RenderTool per simulator, like
+    before frames were rendered onto a cached background, the FrameRenderer
+    when it is created, when its background is cached and when all frames
+    are cached, and the batch export of all steps in each format.
+"""
+import contextlib
+import os
+import tempfile
+import time
+import warnings
+
+from flatland.utils.rendertools import RenderTool
+from PIL import Image
+
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.flatland.environment_cache import snapshot
+from flatlandasp.core.utils.image_utils import get_image_bytes_from_image
+from flatlandasp.features.environments.map_generation import generate_environment_data
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+from flatlandasp.features.simulator.flatland_asp_simulator import FlatlandASPSimulator
+from flatlandasp.features.simulator.frame_rendering import (
+    AnimationFormat,
+    get_frame_renderer_cache,
+)
+from flatlandasp.features.solver.reference_planner import plan
+
+
+def render_with_render_tool(simulator: FlatlandASPSimulator, steps: int) -> None:
+    render_tool = RenderTool(simulator.env, gl="PILSVG")
+    old_agents = simulator.env.agents
+    for step in range(steps):
+        simulator.env.agents = simulator.get_agents_at_simulation_step(step)
+        image = render_tool.render_env(show_rowcols=True, show_predictions=True, return_image=True)
+        get_image_bytes_from_image(Image.fromarray(image))
+    simulator.env.agents = old_agents
+
+
+def render_with_frame_renderer(simulator: FlatlandASPSimulator, steps: int) -> None:
+    for step in range(steps):
+        simulator.get_image_bytes_at_simulation_step(step)
+
+
+def run_benchmark(size: int = 30, number_of_agents: int = 12) -> None:
+    # Environments have no predictor, the RenderTool warns about it every frame
+    warnings.simplefilter("ignore")
+
+    environment = environment_crud.get_environment_from_data(generate_environment_data(
+        GenerationInput(width=size, height=size, number_of_sidings=size // 10,
+                        number_of_stations=number_of_agents // 2, number_of_agents=number_of_agents)))
+    environment.reset(random_seed=1)
+    agent_actions = plan(environment, size * 10).get_agent_actions()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        simulator = FlatlandASPSimulator(env=snapshot(environment), headless=True)
+        simulator.simulate_environment(agent_actions, max_steps=size * 10)
+    steps = simulator.get_number_of_simulated_steps()
+
+    print(f"{steps} steps of {number_of_agents} agents on a {size}x{size} map")
+    print(f"{'method':>22} | {'time [s]':>8} | {'per frame [ms]':>14}")
+
+    def report(method: str, elapsed: float) -> None:
+        print(f"{method:>22} | {elapsed:>8.2f} | {elapsed / steps * 1000:>14.2f}")
+
+    start = time.perf_counter()
+    render_with_render_tool(simulator, steps)
+    report("render tool", time.perf_counter() - start)
+
+    get_frame_renderer_cache().clear()
+    start = time.perf_counter()
+    render_with_frame_renderer(simulator, steps)
+    report("frame renderer, cold", time.perf_counter() - start)
+
+    # Like a different run of the same environment, only the background is cached
+    simulator.get_frame_renderer().clear()
+    start = time.perf_counter()
+    render_with_frame_renderer(simulator, steps)
+    report("frame renderer, warm", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    render_with_frame_renderer(simulator, steps)
+    report("frame renderer, cached", time.perf_counter() - start)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for animation_format in AnimationFormat:
+            path = os.path.join(directory, f"simulation.{animation_format.value}")
+            start = time.perf_counter()
+            simulator.export_simulation(path, animation_format=animation_format)
+            report(f"export {animation_format.value}", time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    run_benchmark()
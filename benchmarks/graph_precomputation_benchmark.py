@@ -0,0 +1,104 @@
+""" Benchmark of precomputing the vertex/edge graph in Python.
+
+    Compares instance generation plus grounding time and the number of
+    ground atoms of the vertex encoding, which derives the graph from all
+    cells while grounding, with vertex_graph.lp consuming a precomputed graph.
+    Runs on all environments in the environments path and on large
+    maps created by the sparse rail generator of Flatland.
+"""
+import statistics
+import time
+from typing import Callable
+
+from clingo import Control
+from flatland.envs.line_generators import sparse_line_generator
+from flatland.envs.rail_env import RailEnv
+from flatland.envs.rail_generators import sparse_rail_generator
+
+from flatlandasp.core.asp.graph_generation import generate_graph_instance_lines
+from flatlandasp.core.asp.instance_generation import generate_instance_lines
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.utils.file_utils import get_file_names_in_path
+from flatlandasp.flatland_asp_config import get_config
+
+
+def ground(environment: RailEnv,
+           generate_lines: Callable[[RailEnv, int], list[str]],
+           encoding_file: str,
+           step_limit: int) -> int:
+    """ Generate instance and ground it with the encoding.
+
+        Returns:
+            Number of ground atoms
+    """
+    clingo_control = Control()
+    clingo_control.add("base", [], "\n".join(generate_lines(environment, step_limit)))
+    clingo_control.load(encoding_file)
+    clingo_control.ground()
+    return len(clingo_control.symbolic_atoms)
+
+
+def measure(environment: RailEnv,
+            generate_lines: Callable[[RailEnv, int], list[str]],
+            encoding_file: str,
+            step_limit: int,
+            repetitions: int) -> tuple[float, int]:
+    """ Get median time of generating and grounding and the number of ground atoms."""
+    latencies = []
+    atoms = 0
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        atoms = ground(environment, generate_lines, encoding_file, step_limit)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies), atoms
+
+
+def generate_environment(size: int, number_of_cities: int, number_of_agents: int) -> RailEnv:
+    environment = RailEnv(width=size,
+                          height=size,
+                          rail_generator=sparse_rail_generator(max_num_cities=number_of_cities,
+                                                               seed=1,
+                                                               grid_mode=False,
+                                                               max_rails_between_cities=2,
+                                                               max_rail_pairs_in_city=2),
+                          line_generator=sparse_line_generator(),
+                          number_of_agents=number_of_agents)
+    environment.reset(random_seed=1)
+    return environment
+
+
+def get_environments() -> list[tuple[str, RailEnv]]:
+    environments = []
+    for file_name in sorted(get_file_names_in_path(path=get_config().flatland_environments_path)):
+        if not file_name.endswith(".pkl"):
+            continue
+
+        environment = environment_crud.read_from_pickle_file(file_name)
+        environment.reset()
+        environments.append((file_name, environment))
+
+    for size, number_of_cities in [(50, 4), (100, 12), (200, 40)]:
+        environments.append((f"sparse {size}x{size} {number_of_cities} cities",
+                             generate_environment(size, number_of_cities, number_of_agents=2)))
+
+    return environments
+
+
+def run_benchmark(step_limit: int = 20, repetitions: int = 5) -> None:
+    cells_encoding_file = f"{get_config().asp_encodings_path}vertex.lp"
+    graph_encoding_file = f"{get_config().asp_encodings_path}vertex_graph.lp"
+
+    print(f"{'environment':>36} | {'cells [ms]':>10} | {'atoms':>8} | {'graph [ms]':>10} | {'atoms':>8}")
+
+    for name, environment in get_environments():
+        cells_latency, cells_atoms = measure(environment, generate_instance_lines,
+                                             cells_encoding_file, step_limit, repetitions)
+        graph_latency, graph_atoms = measure(environment, generate_graph_instance_lines,
+                                             graph_encoding_file, step_limit, repetitions)
+
+        print(f"{name:>36} | {cells_latency * 1000:>10.2f} | {cells_atoms:>8} "
+              f"| {graph_latency * 1000:>10.2f} | {graph_atoms:>8}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
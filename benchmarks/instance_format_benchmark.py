@@ -0,0 +1,54 @@
+""" Benchmark of the instance formats handed to clingo.
+
+    Compares the time until all cell facts of a grid are grounded for
+        - text: cell literals are generated as strings and parsed by clingo
+        - backend: cell facts are added as ground atoms through the clingo backend
+
+    Only the facts themselves are grounded, so the difference
+    is not hidden behind the grounding time of an encoding.
+"""
+import time
+
+from clingo import Control
+from instance_generation_benchmark import generate_grid
+
+from flatlandasp.core.asp.instance_generation import add_cell_facts, cell_literals
+
+
+def ground_text(grid) -> int:
+    clingo_control = Control()
+    clingo_control.add("base", [], "\n".join(cell_literals(grid)))
+    clingo_control.ground()
+    return len(clingo_control.symbolic_atoms)
+
+
+def ground_backend(grid) -> int:
+    clingo_control = Control()
+    with clingo_control.backend() as backend:
+        add_cell_facts(backend, grid)
+    clingo_control.ground()
+    return len(clingo_control.symbolic_atoms)
+
+
+def run_benchmark(sizes: list[int]) -> None:
+    print(f"{'grid':>11} | {'atoms':>9} | {'text [s]':>9} | {'backend [s]':>11} | {'speedup':>8}")
+
+    for size in sizes:
+        grid = generate_grid(size)
+
+        start = time.perf_counter()
+        text_atoms = ground_text(grid)
+        text_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        backend_atoms = ground_backend(grid)
+        backend_time = time.perf_counter() - start
+
+        assert text_atoms == backend_atoms
+
+        print(f"{f'{size}x{size}':>11} | {backend_atoms:>9} | {text_time:>9.3f} | "
+              f"{backend_time:>11.3f} | {text_time / backend_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    run_benchmark([50, 100, 200, 400, 800])
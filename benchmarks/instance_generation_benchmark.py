@@ -0,0 +1,70 @@
+""" Benchmark of the cell literal generation used for ASP instances.
+
+    Compares the cell by cell reference implementation with the
+    vectorized NumPy implementation on generated grids of increasing size.
+
+    The grids consist of randomly chosen (but valid) Flatland cell types,
+    the transitions between neighbouring cells are not consistent,
+    which is irrelevant for the generation of cell literals.
+"""
+import time
+from typing import Callable
+
+import numpy as np
+
+from flatlandasp.core.asp.instance_generation import (
+    cell_literals,
+    cell_literals_naive,
+)
+from flatlandasp.core.flatland.mappings import CELL_ID_TO_TYPE_AND_ORIENTATON_MAP
+
+
+def generate_grid(size: int, *, rail_density: float = 0.3, seed: int = 0) -> np.ndarray:
+    """ Generate a square grid of random cell types.
+
+        Args:
+            size: Width and height of the grid
+            rail_density: Fraction of cells that are not empty
+            seed: Seed of the random number generator
+    """
+    rng = np.random.default_rng(seed)
+    cell_ids = np.array(
+        [cell_id for cell_id in CELL_ID_TO_TYPE_AND_ORIENTATON_MAP if cell_id != 0], dtype=np.uint16)
+
+    grid = rng.choice(cell_ids, size=(size, size))
+    grid[rng.random((size, size)) >= rail_density] = 0
+    return grid
+
+
+def time_function(function: Callable[[np.ndarray], list[str]],
+                  grid: np.ndarray,
+                  repetitions: int) -> tuple[float, list[str]]:
+    """ Get the best run time of a function over several repetitions."""
+    best = float('inf')
+    result = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = function(grid)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark(sizes: list[int], repetitions: int = 3) -> None:
+    print(f"{'grid':>11} | {'literals':>9} | {'naive [s]':>10} | {'numpy [s]':>10} | {'speedup':>8}")
+
+    for size in sizes:
+        grid = generate_grid(size)
+
+        naive_time, naive_literals = time_function(
+            cell_literals_naive, grid, repetitions)
+        numpy_time, numpy_literals = time_function(
+            cell_literals, grid, repetitions)
+
+        assert naive_literals == numpy_literals
+
+        print(f"{f'{size}x{size}':>11} | {len(numpy_literals):>9} | {naive_time:>10.4f} | "
+              f"{numpy_time:>10.4f} | {naive_time / numpy_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    run_benchmark([25, 50, 100, 200, 400, 800])
@@ -0,0 +1,72 @@
+""" Benchmark of the handoff of ASP instances to clingo.
+
+    Measures the end-to-end latency (instance handoff, grounding and solving)
+    of every environment in the environments path for two variants:
+        - file: instance is written to the instances path and loaded by clingo
+        - memory: instance is added to clingo directly as a string
+"""
+import statistics
+import time
+
+from clingo import Control
+
+from flatlandasp.core.asp.instance_generation import generate_instance_lines
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.utils.file_utils import (
+    get_file_names_in_path,
+    write_lines_to_file_in_output,
+)
+from flatlandasp.flatland_asp_config import get_config
+
+
+def solve_from_file(instance_lines: list[str], encoding_file: str) -> None:
+    write_lines_to_file_in_output(path=get_config().asp_instances_path,
+                                  file_name="benchmark.lp",
+                                  lines=instance_lines)
+    clingo_control = Control()
+    clingo_control.load(f"{get_config().asp_instances_path}benchmark.lp")
+    clingo_control.load(encoding_file)
+    clingo_control.ground()
+    clingo_control.solve()
+
+
+def solve_from_memory(instance_lines: list[str], encoding_file: str) -> None:
+    clingo_control = Control()
+    clingo_control.add("base", [], "\n".join(instance_lines))
+    clingo_control.load(encoding_file)
+    clingo_control.ground()
+    clingo_control.solve()
+
+
+def median_latency(function, *args, repetitions: int) -> float:
+    latencies = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function(*args)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies)
+
+
+def run_benchmark(encoding_name: str = "vertex", step_limit: int = 20, repetitions: int = 20) -> None:
+    encoding_file = f"{get_config().asp_encodings_path}{encoding_name}.lp"
+
+    print(f"{'environment':>32} | {'file [ms]':>10} | {'memory [ms]':>11}")
+
+    for file_name in sorted(get_file_names_in_path(path=get_config().flatland_environments_path)):
+        if not file_name.endswith(".pkl"):
+            continue
+
+        environment = environment_crud.read_from_pickle_file(file_name)
+        environment.reset()
+        instance_lines = generate_instance_lines(environment, step_limit)
+
+        file_latency = median_latency(solve_from_file, instance_lines, encoding_file,
+                                      repetitions=repetitions)
+        memory_latency = median_latency(solve_from_memory, instance_lines, encoding_file,
+                                        repetitions=repetitions)
+
+        print(f"{file_name:>32} | {file_latency * 1000:>10.2f} | {memory_latency * 1000:>11.2f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,80 @@
+""" Benchmark of grounding conflict constraints versus adding them lazily with the ConflictPropagator.
+
+    Solves a generated map with a growing number of agents with vertex.lp,
+    which grounds the conflict constraints for all pairs of agents, and
+    vertex_lazy.lp with the ConflictPropagator. Reported are the size of
+    the ground program, grounding and solving time, the peak resident set
+    size of the process, the cost and for the lazy variant the number of
+    nogoods the propagator added. Every case runs in its own process.
+"""
+import time
+
+from clingo import Control
+
+from flatlandasp.core.asp.instance_generation import generate_instance_lines
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.features.benchmark.benchmark_runner import peak_rss_mb, run_isolated
+from flatlandasp.features.environments.map_generation import generate_environment_data
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+from flatlandasp.features.solver.conflict_propagator import ConflictPropagator
+from flatlandasp.flatland_asp_config import get_config
+
+
+def run_case(size: int, number_of_agents: int, step_limit: int, lazy: bool, time_limit: float) -> dict:
+    environment = environment_crud.get_environment_from_data(generate_environment_data(
+        GenerationInput(width=size, height=size, number_of_stations=max(number_of_agents, 2),
+                        number_of_agents=number_of_agents)))
+    environment.reset(random_seed=1)
+
+    propagator = ConflictPropagator()
+    clingo_control = Control()
+    if lazy:
+        clingo_control.register_propagator(propagator)
+
+    start = time.perf_counter()
+    clingo_control.add("base", [], "\n".join(generate_instance_lines(environment, step_limit)))
+    clingo_control.load(f"{get_config().asp_encodings_path}{'vertex_lazy' if lazy else 'vertex'}.lp")
+    clingo_control.ground()
+    grounding_time = time.perf_counter() - start
+
+    costs = []
+    start = time.perf_counter()
+    with clingo_control.solve(on_model=lambda model: costs.append(model.cost), async_=True) as handle:
+        finished = handle.wait(time_limit)
+        handle.cancel()
+        result = handle.get()
+    solving_time = time.perf_counter() - start
+
+    statistics = clingo_control.statistics["problem"]["lp"]
+
+    return {"atoms": int(statistics["atoms"]),
+            "rules": int(statistics["rules"]),
+            "grounding_time": grounding_time,
+            "solving_time": solving_time,
+            "peak_rss_mb": peak_rss_mb(),
+            "cost": costs[-1][0] if costs else None,
+            "optimal": finished and result.exhausted and result.satisfiable,
+            "nogoods": propagator.nogoods if lazy else None}
+
+
+def run_benchmark(size: int = 20,
+                  agent_counts: tuple[int, ...] = (2, 4, 6, 8),
+                  step_limit: int = 80,
+                  time_limit: float = 120) -> None:
+    print(f"{size}x{size} map, step limit {step_limit}, time limit {time_limit:.0f}s")
+    print(f"{'agents':>6} | {'variant':>7} | {'atoms':>8} | {'rules':>8} | {'ground [s]':>10} | "
+          f"{'solve [s]':>9} | {'peak [MB]':>9} | {'cost':>5} | {'optimal':>7} | {'nogoods':>7}")
+
+    for number_of_agents in agent_counts:
+        for lazy in [False, True]:
+            row = run_isolated(run_case, size, number_of_agents, step_limit, lazy, time_limit)
+            print(f"{number_of_agents:>6} | {'lazy' if lazy else 'eager':>7} | {row['atoms']:>8} | "
+                  f"{row['rules']:>8} | {row['grounding_time']:>10.2f} | {row['solving_time']:>9.2f} | "
+                  f"{row['peak_rss_mb']:>9.1f} | {str(row['cost']):>5} | {str(row['optimal']):>7} | "
+                  f"{'-' if row['nogoods'] is None else row['nogoods']:>7}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
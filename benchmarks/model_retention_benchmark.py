@@ -0,0 +1,88 @@
+""" Benchmark of the memory used for storing models during a long optimization.
+
+    Enumerates optimal models (--opt-mode=optN) of a generated environment
+    with many optimal plans, so that tens of thousands of models are reported.
+    Every retention policy runs in its own process, reported is the peak
+    resident set size of that process. The strings variant stores every
+    model as list of symbol strings like the callback handler used to.
+"""
+import multiprocessing
+import resource
+import time
+
+from clingo import Control, Model
+from graph_precomputation_benchmark import generate_environment
+
+from flatlandasp.core.asp.instance_generation import generate_instance_lines
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.solver.model_store import ModelRetention
+from flatlandasp.features.solver.solver_callback_handler import SolverCallbackHandler
+from flatlandasp.flatland_asp_config import get_config
+
+
+def peak_rss_mb() -> float:
+    # Linux reports kilobytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def solve(retention: str, models: int, step_limit: int, results: multiprocessing.Queue) -> None:
+    environment = generate_environment(40, 3, number_of_agents=4)
+
+    clingo_control = Control(["--opt-mode=optN", f"--models={models}"])
+    clingo_control.add("base", [], "\n".join(generate_instance_lines(environment, step_limit)))
+    clingo_control.load(f"{get_config().asp_encodings_path}vertex.lp")
+    clingo_control.ground()
+
+    rss_before_solving = peak_rss_mb()
+
+    if retention == "strings":
+        stored_models = []
+
+        def on_model(model: Model) -> None:
+            stored_models.append([str(symbol) for symbol in model.symbols(shown=True)])
+
+        def get_models() -> list:
+            return stored_models
+    else:
+        callback_handler = SolverCallbackHandler(logger=get_logger(),
+                                                 model_retention=ModelRetention(retention),
+                                                 retained_models=10)
+        on_model = callback_handler.on_model
+
+        def get_models() -> list:
+            return callback_handler.get_full_solution()["models"]
+
+    start = time.perf_counter()
+    result = clingo_control.solve(on_model=on_model)
+    solving_time = time.perf_counter() - start
+    rss_solved = peak_rss_mb()
+
+    # Includes turning retained models into strings for the response
+    returned_models = len(get_models())
+
+    results.put((retention, str(result), solving_time, rss_before_solving,
+                 rss_solved, peak_rss_mb(), returned_models))
+
+
+def run_benchmark(models: int = 20000, step_limit: int = 80) -> None:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+
+    print(f"{'retention':>10} | {'result':>6} | {'solving [s]':>11} | "
+          f"{'RSS grounded [MB]':>17} | {'RSS solved [MB]':>15} | "
+          f"{'peak RSS [MB]':>13} | {'returned models':>15}")
+
+    for retention in ["strings", *[retention.value for retention in ModelRetention]]:
+        process = context.Process(target=solve, args=(retention, models, step_limit, results))
+        process.start()
+        (retention, result, solving_time, rss_before_solving,
+         rss_solved, peak_rss, returned_models) = results.get()
+        process.join()
+
+        print(f"{retention:>10} | {result:>6} | {solving_time:>11.2f} | "
+              f"{rss_before_solving:>17.1f} | {rss_solved:>15.1f} | "
+              f"{peak_rss:>13.1f} | {returned_models:>15}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,81 @@
+""" Benchmark of validating plans in bulk versus replaying them with the simulator.
+
+    Plans are the reference plan of a generated map and variants of it with
+    a random agent halting at a random time step, which may cause
+    conflicts. All plans are validated in one batch with validate_plans,
+    once per plan with validate_plan as done for every improved model, and
+    a few of them are replayed with the headless simulator for comparison.
+    Reported is the time per plan.
+"""
+import contextlib
+import os
+import time
+
+import numpy as np
+
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.flatland.environment_cache import snapshot
+from flatlandasp.core.flatland.schemas.action import Action
+from flatlandasp.features.environments.map_generation import generate_environment_data
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+from flatlandasp.features.simulator.flatland_asp_simulator import FlatlandASPSimulator
+from flatlandasp.features.solver.plan_validation import (
+    get_schedules,
+    validate_plan,
+    validate_plans,
+)
+from flatlandasp.features.solver.reference_planner import plan
+
+
+def get_plans(agent_actions: dict[int, list[int]], number_of_plans: int) -> list[dict[int, list[int]]]:
+    random = np.random.default_rng(1)
+    plans = [agent_actions]
+
+    while len(plans) < number_of_plans:
+        agent = int(random.choice(list(agent_actions)))
+        actions = agent_actions[agent]
+        time_step = int(random.integers(len(actions)))
+        plans.append({**agent_actions, agent: actions[:time_step] + [Action.HALT.value] + actions[time_step:]})
+
+    return plans
+
+
+def run_benchmark(size: int = 30, number_of_agents: int = 12, number_of_plans: int = 1000,
+                  number_of_replays: int = 10) -> None:
+    environment = environment_crud.get_environment_from_data(generate_environment_data(
+        GenerationInput(width=size, height=size, number_of_sidings=size // 10,
+                        number_of_stations=number_of_agents // 2, number_of_agents=number_of_agents)))
+    environment.reset(random_seed=1)
+
+    plans = get_plans(plan(environment, size * 10).get_agent_actions(), number_of_plans)
+    grid, schedules = environment.rail.grid, get_schedules(environment)
+
+    print(f"{number_of_plans} plans of {number_of_agents} agents on a {size}x{size} map")
+    print(f"{'method':>10} | {'plans':>5} | {'time [s]':>8} | {'per plan [ms]':>13} | {'valid':>5}")
+
+    start = time.perf_counter()
+    results = validate_plans(grid, schedules, plans)
+    elapsed = time.perf_counter() - start
+    print(f"{'batch':>10} | {len(plans):>5} | {elapsed:>8.2f} | {elapsed / len(plans) * 1000:>13.3f} | "
+          f"{sum(result['valid'] for result in results):>5}")
+
+    start = time.perf_counter()
+    results = [validate_plan(environment, agent_actions) for agent_actions in plans]
+    elapsed = time.perf_counter() - start
+    print(f"{'per plan':>10} | {len(plans):>5} | {elapsed:>8.2f} | {elapsed / len(plans) * 1000:>13.3f} | "
+          f"{sum(result['valid'] for result in results):>5}")
+
+    start = time.perf_counter()
+    for agent_actions in plans[:number_of_replays]:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            simulator = FlatlandASPSimulator(env=snapshot(environment), headless=True)
+            simulator.simulate_environment(agent_actions, max_steps=size * 10)
+    elapsed = time.perf_counter() - start
+    print(f"{'simulator':>10} | {number_of_replays:>5} | {elapsed:>8.2f} | "
+          f"{elapsed / number_of_replays * 1000:>13.3f} | {'-':>5}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,66 @@
+""" Benchmark of replaying plans with the simulator, printing versus headless.
+
+    Replays random actions of many agents on a generated map for a fixed
+    number of steps. The printing mode prints every agent every step and
+    copies all agents after every step, the headless mode records the agent
+    state into a SimulationRecording. Reported are steps per second without
+    memory tracing and the memory still allocated after the simulation and
+    its peak, measured with tracemalloc in a second run. Prints of the
+    printing mode are discarded.
+"""
+import contextlib
+import os
+import time
+import tracemalloc
+
+import numpy as np
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.flatland.environment_cache import snapshot
+from flatlandasp.features.environments.map_generation import generate_environment_data
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+from flatlandasp.features.simulator.flatland_asp_simulator import FlatlandASPSimulator
+
+
+def simulate(environment: RailEnv, agent_actions: dict, steps: int, headless: bool) -> FlatlandASPSimulator:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        simulator = FlatlandASPSimulator(env=snapshot(environment), headless=headless)
+        simulator.simulate_environment(agent_actions, max_steps=steps)
+    return simulator
+
+
+def run_benchmark(size: int = 60, number_of_agents: int = 120, steps: int = 500) -> None:
+    environment = environment_crud.get_environment_from_data(generate_environment_data(
+        GenerationInput(width=size, height=size, number_of_sidings=size // 10,
+                        number_of_stations=number_of_agents // 2, number_of_agents=number_of_agents)))
+    environment.reset(random_seed=1)
+
+    random = np.random.default_rng(1)
+    agent_actions = {agent.handle: random.integers(1, 5, steps).tolist() for agent in environment.agents}
+
+    print(f"{number_of_agents} agents, {steps} steps on a {size}x{size} map")
+    print(f"{'mode':>8} | {'steps':>5} | {'time [s]':>8} | {'steps/s':>7} | "
+          f"{'retained [MB]':>13} | {'peak [MB]':>9}")
+
+    for headless in [False, True]:
+        start = time.perf_counter()
+        simulator = simulate(environment, agent_actions, steps, headless)
+        elapsed = time.perf_counter() - start
+        simulated_steps = simulator.env._elapsed_steps
+        del simulator
+
+        tracemalloc.start()
+        simulator = simulate(environment, agent_actions, steps, headless)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del simulator
+
+        print(f"{'headless' if headless else 'printing':>8} | {simulated_steps:>5} | {elapsed:>8.2f} | "
+              f"{simulated_steps / elapsed:>7.1f} | {retained / 2 ** 20:>13.1f} | {peak / 2 ** 20:>9.1f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
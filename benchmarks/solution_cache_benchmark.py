@@ -0,0 +1,59 @@
+""" Benchmark of resubmitting identical solve requests with and without the solution cache.
+
+    Solves a generated map to optimality once, then submits the same request
+    again with the solution cache bypassed, where the grounded program is
+    cached, and with the solution cache, where the stored solution is returned.
+    The generated map and the cache entry are removed afterwards.
+"""
+import os
+import time
+
+from flatlandasp.features.environments.map_generation import (
+    save_generated_environment,
+)
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.features.solver.solution_cache import get_solution_cache
+from flatlandasp.features.solver.solver import solve
+from flatlandasp.flatland_asp_config import get_config
+
+ENVIRONMENT_NAME = "solution_cache_benchmark"
+
+
+def run_benchmark(size: int = 20, number_of_agents: int = 4, repetitions: int = 5) -> None:
+    save_generated_environment(ENVIRONMENT_NAME,
+                               GenerationInput(width=size, height=size, number_of_stations=number_of_agents,
+                                               number_of_agents=number_of_agents),
+                               with_pickle_file=False)
+
+    def run(**options) -> tuple[float, dict]:
+        start = time.perf_counter()
+        solution = solve(SolverInput(environment_name=ENVIRONMENT_NAME, encoding_name="vertex",
+                                     step_limit=size * 5, environment_seed=1, warm_start=True, **options))
+        return time.perf_counter() - start, solution
+
+    key = None
+    try:
+        elapsed, solution = run()
+        key = solution["solution_cache"]["key"]
+        print(f"{number_of_agents} agents on a {size}x{size} map, cost {solution['cost']}, "
+              f"optimal: {solution['optimality_proven']}")
+        print(f"{'request':>18} | {'time [ms]':>9}")
+        print(f"{'first':>18} | {elapsed * 1000:>9.1f}")
+
+        for name, options in [("cache bypassed", {"use_solution_cache": False}), ("cached solution", {})]:
+            elapsed = sum(run(**options)[0] for _ in range(repetitions)) / repetitions
+            print(f"{name:>18} | {elapsed * 1000:>9.1f}")
+    finally:
+        path = get_config().flatland_environments_path
+        for file_name in os.listdir(path):
+            if file_name.startswith(f"{ENVIRONMENT_NAME}."):
+                os.remove(f"{path}{file_name}")
+        if key is not None:
+            get_solution_cache().remove(key)
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,65 @@
+""" Benchmark of two-phase grounding for many schedules on one map.
+
+    Solves a sequence of differently seeded schedules on the same map
+    once by grounding the whole vertex encoding for every schedule and
+    once with the map grounded only once (vertex_map.lp/vertex_schedules.lp).
+"""
+import sys
+import time
+
+from clingo import Control
+
+from flatlandasp.core.asp.instance_generation import generate_instance_lines
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.features.solver.map_program import get_map_program
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.flatland_asp_config import get_config
+
+
+def solve_full(environment, step_limit: int) -> None:
+    clingo_control = Control()
+    clingo_control.add("base", [], "\n".join(
+        generate_instance_lines(environment, step_limit)))
+    clingo_control.load(f"{get_config().asp_encodings_path}vertex.lp")
+    clingo_control.ground()
+    clingo_control.solve()
+
+
+def solve_two_phase(environment, input: SolverInput) -> None:
+    get_map_program(environment, input).solve_schedules(
+        environment, input.step_limit, lambda _: None)
+
+
+def run_benchmark(environment_name: str,
+                  number_of_agents: int,
+                  schedules: int = 50,
+                  step_limit: int = 20) -> None:
+    environment = environment_crud.get_environment_from_json(
+        f'{environment_name}.json', number_of_agents=number_of_agents)
+
+    input = SolverInput(environment_name=environment_name,
+                        encoding_name="vertex",
+                        step_limit=step_limit,
+                        two_phase_grounding=True)
+
+    full_time = 0.0
+    two_phase_time = 0.0
+    for seed in range(1, schedules + 1):
+        environment.reset(random_seed=seed)
+
+        start = time.perf_counter()
+        solve_full(environment, step_limit)
+        full_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        solve_two_phase(environment, input)
+        two_phase_time += time.perf_counter() - start
+
+    print(f"{environment_name} with {number_of_agents} agents, {schedules} schedules")
+    print(f"  full grounding: {full_time / schedules * 1000:.2f}ms per schedule")
+    print(f"  two-phase:      {two_phase_time / schedules * 1000:.2f}ms per schedule")
+
+
+if __name__ == '__main__':
+    run_benchmark(sys.argv[1] if len(sys.argv) > 1 else "7x15x2-wait_or_late",
+                  int(sys.argv[2]) if len(sys.argv) > 2 else 2)
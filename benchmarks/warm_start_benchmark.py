@@ -0,0 +1,93 @@
+""" Benchmark of warm starting the solver with the reference plan.
+
+    Solves generated maps with the vertex encoding cold, with only the cost
+    of the reference plan as bound, and with the bound and the choices of
+    the plan as domain heuristics of different modifiers. The level
+    modifier decides the plan atoms first, sign only prefers their truth
+    value when clasp decides them, init additionally raises their initial
+    activity. Reported are the solving time, the cost of the last model,
+    whether it was proven optimal and the cost of the plan.
+"""
+import time
+from typing import Optional
+
+from clingo import Control, HeuristicType
+
+from flatlandasp.core.asp.instance_generation import generate_instance_lines
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.features.environments.map_generation import generate_environment_data
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+from flatlandasp.features.solver.reference_planner import ReferencePlan, plan
+from flatlandasp.flatland_asp_config import get_config
+
+VARIANTS: dict[str, Optional[list[tuple[HeuristicType, int, int]]]] = {
+    "cold": None,
+    "bound": [],
+    "level": [(HeuristicType.True_, 1, 0)],
+    "sign": [(HeuristicType.Sign, 1, 0)],
+    "sign+init": [(HeuristicType.Sign, 1, 0), (HeuristicType.Init, 10, 0)],
+}
+""" Heuristics added per plan atom as (modifier, value, priority), None for no warm start at all."""
+
+
+def solve(lines: list[str], reference_plan: ReferencePlan, variant: str, time_limit: float) -> tuple:
+    heuristics = VARIANTS[variant]
+
+    clingo_control = Control([] if heuristics is None else ["--heuristic=Domain"])
+    clingo_control.add("base", [], "\n".join(lines))
+    clingo_control.load(f"{get_config().asp_encodings_path}vertex.lp")
+    clingo_control.ground()
+
+    if heuristics is not None:
+        with clingo_control.backend() as backend:
+            for atom in reference_plan.get_atoms():
+                if clingo_control.symbolic_atoms[atom] is not None:
+                    literal = backend.add_atom(atom)
+                    for modifier, value, priority in heuristics:
+                        backend.add_heuristic(literal, modifier, value, priority, [])
+        clingo_control.configuration.solve.opt_mode = f"opt,{reference_plan.get_cost()[0]}"
+
+    costs = []
+    start = time.perf_counter()
+    with clingo_control.solve(on_model=lambda model: costs.append(model.cost), async_=True) as handle:
+        finished = handle.wait(time_limit)
+        handle.cancel()
+        result = handle.get()
+
+    return (time.perf_counter() - start,
+            costs[-1][0] if costs else None,
+            finished and result.exhausted and result.satisfiable)
+
+
+def run_benchmark(size: int = 20,
+                  agent_counts: tuple[int, ...] = (3, 5),
+                  seeds: tuple[int, ...] = (1, 2, 3),
+                  step_limit: int = 60,
+                  time_limit: float = 30) -> None:
+    print(f"{size}x{size} maps, step limit {step_limit}, time limit {time_limit:.0f}s")
+    print(f"{'agents':>6} | {'seed':>4} | {'plan':>4} | {'variant':>9} | {'solve [s]':>9} | "
+          f"{'cost':>5} | {'optimal':>7}")
+
+    for number_of_agents in agent_counts:
+        environment = environment_crud.get_environment_from_data(generate_environment_data(
+            GenerationInput(width=size, height=size, number_of_stations=number_of_agents,
+                            number_of_agents=number_of_agents)))
+
+        for seed in seeds:
+            environment.reset(random_seed=seed)
+            reference_plan = plan(environment, step_limit)
+            if reference_plan is None:
+                print(f"{number_of_agents:>6} | {seed:>4} | no plan within the step limit")
+                continue
+
+            lines = generate_instance_lines(environment, step_limit)
+            for variant in VARIANTS:
+                solving_time, cost, optimal = solve(lines, reference_plan, variant, time_limit)
+                print(f"{number_of_agents:>6} | {seed:>4} | {reference_plan.get_cost()[0]:>4} | "
+                      f"{variant:>9} | {solving_time:>9.2f} | {str(cost):>5} | {str(optimal):>7}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,199 @@
+import inspect
+
+import numpy as np
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.asp.instance_generation import (
+    DELTAS,
+    DIRECTIONS_BY_NIBBLE,
+    decode_cell_transitions,
+    schedule_header,
+    schedule_literal,
+)
+from flatlandasp.core.flatland.schemas.orientation import Orientation
+from flatlandasp.core.log_config import get_logger
+
+logger = get_logger()
+
+EDGE_TYPE = tuple[tuple[int, int], int, int, tuple[int, int], int, int]
+""" Edge in the form (P,O,D,P',D',L), see edge_literal."""
+
+DIRECTION_DELTAS = [DELTAS[Orientation(direction)] for direction in range(4)]
+
+
+def get_transitions(grid: np.ndarray) -> dict[tuple[int, int], list[int]]:
+    """ Get 4bit transition values of all non-empty cells.
+
+        Returns:
+            Dictionary mapping positions (X,Y) (Flatland style)
+            to the transition value for each orientation
+    """
+    rows, columns, orientations, nibbles = decode_cell_transitions(grid)
+
+    transitions: dict[tuple[int, int], list[int]] = {}
+    for x, y, orientation, nibble in zip(rows.tolist(),
+                                         columns.tolist(),
+                                         orientations.tolist(),
+                                         nibbles.tolist()):
+        transitions.setdefault((x, y), [0, 0, 0, 0])[orientation] = nibble
+
+    return transitions
+
+
+def get_directions(nibble: int) -> list[int]:
+    return [direction for direction in range(4) if (nibble >> (3 - direction)) & 0b1]
+
+
+def get_decision_vertices(transitions: dict[tuple[int, int], list[int]]) -> set[tuple[int, int]]:
+    """ Get positions that are vertices independent of any schedule.
+
+        Same as the vertex/1 rules of vertex.lp without schedules, that is
+        cells with more than one choice for any orientation and cells
+        with exactly one choice for each of the four orientations.
+    """
+    vertices = set()
+    for position, nibbles in transitions.items():
+        counts = [nibble.bit_count() for nibble in nibbles]
+        if max(counts) > 1 or min(counts) == 1:
+            vertices.add(position)
+
+    return vertices
+
+
+def get_edges(transitions: dict[tuple[int, int], list[int]],
+              vertices: set[tuple[int, int]]) -> list[EDGE_TYPE]:
+    """ Get edges between vertices by following forward-only corridors.
+
+        Equivalent to the path/6 and edge/6 rules of vertex.lp.
+        Starting from every vertex, orientation and direction the
+        corridor is followed until the next vertex is reached, since
+        non-vertex cells have at most one choice per orientation
+        this is a linear-time traversal of the grid.
+    """
+    edges = []
+    for vertex in sorted(vertices):
+        for orientation, nibble in enumerate(transitions.get(vertex, [])):
+            for direction in get_directions(nibble):
+                edge = follow_corridor(transitions, vertices, vertex, direction)
+                if edge is not None:
+                    position, exit_direction, length = edge
+                    edges.append((vertex, orientation, direction,
+                                  position, exit_direction, length))
+
+    return edges
+
+
+def follow_corridor(transitions: dict[tuple[int, int], list[int]],
+                    vertices: set[tuple[int, int]],
+                    start: tuple[int, int],
+                    direction: int) -> tuple[tuple[int, int], int, int] | None:
+    """ Follow corridor from a vertex into a direction.
+
+        Returns:
+            Tuple of vertex position, exit direction and length
+            or None if the corridor does not end in a vertex
+    """
+    visited = set()
+    position = start
+    length = 0
+    while True:
+        dx, dy = DIRECTION_DELTAS[direction]
+        position = (position[0] + dx, position[1] + dy)
+        length += 1
+
+        if position not in transitions:
+            return None
+
+        if position in vertices:
+            return position, direction, length
+
+        # Corridors consisting of a cycle without any vertex
+        if (position, direction) in visited:
+            return None
+        visited.add((position, direction))
+
+        directions = get_directions(transitions[position][direction])
+        if len(directions) != 1:
+            return None
+
+        direction = directions[0]
+
+
+def vertex_header() -> list[str]:
+    """ Get header describing how vertices and edges are defined."""
+    return inspect.cleandoc(
+        f"""% Vertices are defined as
+            %   vertex(P).
+            %
+            %   - P: Position of the vertex in the form (X,Y) (Flatland style)
+            %
+            % Edges are defined as
+            %   edge(P,O,D,P',D',L).
+            %
+            %   - P: From vertex position
+            %   - O: Orientation of the agent at the start of the edge
+            %   - D: Direction in which the agent enters the edge
+            %   - P': To vertex position
+            %   - D': Direction in which the agent exits the edge
+            %   - L: Length of the edge
+        """
+    ).splitlines()
+
+
+def vertex_literal(position: tuple[int, int]) -> str:
+    return f"vertex(({position[0]},{position[1]}))."
+
+
+def edge_literal(edge: EDGE_TYPE) -> str:
+    (x, y), orientation, direction, (x_, y_), exit_direction, length = edge
+    return f"edge(({x},{y}),{orientation},{direction},({x_},{y_}),{exit_direction},{length})."
+
+
+def vertex_cell_literals(transitions: dict[tuple[int, int], list[int]],
+                         vertices: set[tuple[int, int]]) -> list[str]:
+    """ Get cell(P,O,D) and count(P,O,C) literals of all vertices.
+
+        Agents only make decisions at vertices,
+        so cells of corridors are not required.
+    """
+    literals = []
+    for (x, y) in sorted(vertices):
+        for orientation, nibble in enumerate(transitions.get((x, y), [])):
+            if nibble:
+                literals.append(
+                    f"cell(({x},{y}),{orientation},{DIRECTIONS_BY_NIBBLE[nibble]}).")
+                literals.append(
+                    f"count(({x},{y}),{orientation},{nibble.bit_count()}).")
+    return literals
+
+
+def generate_graph_instance_lines(env: RailEnv, limit: int) -> list[str]:
+    """ Generate ASP instance lines with a precomputed vertex/edge graph.
+
+        Alternative to generate_instance_lines for encodings consuming
+        vertex/1 and edge/6 facts instead of deriving them from all cells.
+    """
+
+    if (env.rail is None):
+        return []
+
+    logger.info("Generating ASP graph instance.")
+
+    transitions = get_transitions(env.rail.grid)
+
+    vertices = get_decision_vertices(transitions)
+    for agent in env.agents:
+        vertices.add(tuple(agent.initial_position))
+        vertices.add(tuple(agent.target))
+
+    edges = get_edges(transitions, vertices)
+
+    logger.info(f"Graph with {len(vertices)} vertices and {len(edges)} edges done.")
+
+    return [f"limit({limit}).",
+            *schedule_header(),
+            *[schedule_literal(agent) for agent in env.agents],
+            *vertex_header(),
+            *[vertex_literal(vertex) for vertex in sorted(vertices)],
+            *[edge_literal(edge) for edge in edges],
+            *vertex_cell_literals(transitions, vertices)]
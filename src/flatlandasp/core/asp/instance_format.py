@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class InstanceFormat(Enum):
+    """ Way in which an ASP instance is handed to clingo."""
+    TEXT = "text"
+    """ Instance is added as ASP source which clingo has to parse."""
+    BACKEND = "backend"
+    """ Instance is added as ground facts through the clingo backend."""
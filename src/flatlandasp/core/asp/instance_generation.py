@@ -1,6 +1,9 @@
 import inspect
 
+import numpy as np
+from clingo import Backend, Control, Function, Number, Symbol, Tuple_
 from flatland.envs.rail_env import RailEnv
+
 from flatlandasp.core.flatland.schemas.orientation import Orientation
 from flatlandasp.core.log_config import get_logger
 
@@ -34,13 +37,16 @@ def schedule_literal(agent) -> str:
             - O: Initial orientation of the agent
             - D: Earliest departure of the agent
     """
-    return (f"schedule("
-            f"{agent.handle}"
+    return f"schedule({schedule_arguments(agent)})."
+
+
+def schedule_arguments(agent) -> str:
+    """ Get arguments ID,S,T,O,D of the schedule literal of an agent."""
+    return (f"{agent.handle}"
             f",({agent.initial_position[0]},{agent.initial_position[1]})"
             f",({agent.target[0]},{agent.target[1]})"
             f",{agent.direction}"
-            f",{agent.earliest_departure}"
-            f").")
+            f",{agent.earliest_departure}")
 
 
 def cell_header() -> list[str]:
@@ -74,6 +80,28 @@ def cell_literal(x: int, y: int,
             f",({';'.join([str(direction.value) for direction in directions])})).")
 
 
+def station_header() -> list[str]:
+    """ Get header describing how stations are defined."""
+    return inspect.cleandoc(
+        f"""% Stations are defined as
+            %   station(P).
+            %  
+            %   - P: Position of the station in the form (X,Y) (Flatland style)
+        """
+    ).splitlines()
+
+
+def station_literal(position: tuple[int, int]) -> str:
+    """ Get station as ASP literal.
+
+        Form of the literal:
+            station(P).
+
+            - P: Position of the station in the form (X,Y) (Flatland style)
+    """
+    return f"station(({position[0]},{position[1]}))."
+
+
 def delta_header() -> list[str]:
     """ Get header describing how deltas are defined."""
     return inspect.cleandoc(
@@ -100,20 +128,63 @@ def delta_literals():
             "delta(3,(0,-1)). % West",]
 
 
-def generate_instance_lines(env: RailEnv, limit: int) -> list[str]:
-    """ Generate ASP instance lines from Flatland environment."""
+ORIENTATION_SHIFTS = np.array([12, 8, 4, 0], dtype=np.uint16)
+""" Bit shifts extracting the 4bit transitions for each agent orientation.
 
-    if (env.rail is None):
-        return []
+    The 16bit transition value of a cell holds one nibble per orientation
+    (North, East, South, West) from the most to the least significant bits.
+"""
 
-    logger.info("Generating ASP instance.")
+DIRECTIONS_BY_NIBBLE: list[str] = [
+    f"({';'.join(str(j) for j in range(4) if (nibble >> (3 - j)) & 0b1)})"
+    for nibble in range(16)
+]
+""" ASP representation of the possible directions for every 4bit transition value."""
 
-    schedules = [schedule_literal(agent) for agent in env.agents]
 
-    logger.info(f"Schedule literals ({len(schedules)}) done.")
+def decode_cell_transitions(grid: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """ Decode all non-empty (cell, orientation) pairs of a grid at once.
+
+        Args:
+            grid: Environment grid of 16bit transition values
+
+        Returns: Tuple of equally long arrays in row-major order consisting of
+            rows: Row of the cell (X in Flatland style)
+            columns: Column of the cell (Y in Flatland style)
+            orientations: Orientation of the agent
+            nibbles: 4bit transition value describing the possible directions
+    """
+    nibbles = (np.asarray(grid, dtype=np.uint16)[..., np.newaxis]
+               >> ORIENTATION_SHIFTS) & 0xF
 
+    rows, columns, orientations = np.nonzero(nibbles)
+
+    return rows, columns, orientations, nibbles[rows, columns, orientations]
+
+
+def cell_literals(grid: np.ndarray) -> list[str]:
+    """ Get descriptions of all cells in a grid as ASP literals.
+
+        The transitions of the whole grid are decoded with NumPy,
+        the resulting literals are ordered by row, column and orientation.
+    """
+    rows, columns, orientations, nibbles = decode_cell_transitions(grid)
+
+    return [f"cell(({x},{y}),{orientation},{DIRECTIONS_BY_NIBBLE[nibble]})."
+            for x, y, orientation, nibble in zip(rows.tolist(),
+                                                 columns.tolist(),
+                                                 orientations.tolist(),
+                                                 nibbles.tolist())]
+
+
+def cell_literals_naive(grid: np.ndarray) -> list[str]:
+    """ Get descriptions of all cells in a grid as ASP literals cell by cell.
+
+        Reference implementation of cell_literals,
+        mainly kept for verification and benchmarking.
+    """
     cells = []
-    for y, row in enumerate(env.rail.grid):
+    for y, row in enumerate(grid):
         for x, cell in enumerate(row):
             if not cell:
                 continue
@@ -135,6 +206,121 @@ def generate_instance_lines(env: RailEnv, limit: int) -> list[str]:
                     cells.append(cell_literal(
                         y, x, Orientation(i), valid_directions))
 
+    return cells
+
+
+DELTAS: dict[Orientation, tuple[int, int]] = {
+    Orientation.NORTH: (-1, 0),
+    Orientation.EAST: (0, 1),
+    Orientation.SOUTH: (1, 0),
+    Orientation.WEST: (0, -1),
+}
+""" Coordinate changes (Flatland style) induced by movement into a direction."""
+
+DIRECTION_SHIFTS = np.array([3, 2, 1, 0], dtype=np.uint16)
+""" Bit shifts extracting the single directions of a 4bit transition value."""
+
+
+def add_fact(backend: Backend, symbol: Symbol) -> None:
+    """ Add symbol as ground fact through the clingo backend."""
+    backend.add_rule([backend.add_atom(symbol)])
+
+
+def add_schedule_facts(backend: Backend, env: RailEnv) -> None:
+    """ Add schedule(ID,S,T,O,D) facts of all agents, see schedule_literal."""
+    for agent in env.agents:
+        add_fact(backend, Function("schedule", [
+            Number(int(agent.handle)),
+            Tuple_([Number(int(agent.initial_position[0])),
+                    Number(int(agent.initial_position[1]))]),
+            Tuple_([Number(int(agent.target[0])),
+                    Number(int(agent.target[1]))]),
+            Number(int(agent.direction)),
+            Number(int(agent.earliest_departure))
+        ]))
+
+
+def add_cell_facts(backend: Backend, grid: np.ndarray) -> int:
+    """ Add cell(P,O,D) facts of all cells in a grid, see cell_literal.
+
+        Unlike the textual representation, every possible direction
+        results in its own fact, which is exactly what clingo would
+        make of the pooled directions after parsing.
+
+        Returns:
+            Number of added facts
+    """
+    rows, columns, orientations, nibbles = decode_cell_transitions(grid)
+
+    # Expand every (cell, orientation) pair into one entry per direction
+    indices, directions = np.nonzero((nibbles[:, np.newaxis] >> DIRECTION_SHIFTS) & 0b1)
+
+    numbers = [Number(i) for i in range(max(*grid.shape, 4))]
+    positions: dict[tuple[int, int], Symbol] = {}
+
+    for x, y, orientation, direction in zip(rows[indices].tolist(),
+                                            columns[indices].tolist(),
+                                            orientations[indices].tolist(),
+                                            directions.tolist()):
+        position = positions.get((x, y))
+        if position is None:
+            position = positions[(x, y)] = Tuple_([numbers[x], numbers[y]])
+
+        add_fact(backend, Function("cell", [position,
+                                            numbers[orientation],
+                                            numbers[direction]]))
+
+    return len(directions)
+
+
+def add_delta_facts(backend: Backend) -> None:
+    """ Add delta(D,C) facts for all directions, see delta_literals."""
+    for direction, (dx, dy) in DELTAS.items():
+        add_fact(backend, Function("delta", [Number(direction.value),
+                                             Tuple_([Number(dx), Number(dy)])]))
+
+
+def add_instance_facts(control: Control, env: RailEnv, limit: int) -> None:
+    """ Add ASP instance of a Flatland environment as ground facts.
+
+        Alternative to generate_instance_lines which adds the exact same
+        facts through the clingo backend and thus skips parsing entirely.
+        The facts have to be added before grounding the encoding.
+    """
+
+    if (env.rail is None):
+        return
+
+    logger.info("Adding ASP instance facts.")
+
+    with control.backend() as backend:
+        add_fact(backend, Function("limit", [Number(limit)]))
+
+        add_schedule_facts(backend, env)
+
+        logger.info(f"Schedule facts ({len(env.agents)}) done.")
+
+        number_of_cells = add_cell_facts(backend, env.rail.grid)
+
+        logger.info(f"Cell facts ({number_of_cells}) done.")
+
+        add_delta_facts(backend)
+
+
+def generate_instance_lines(env: RailEnv, limit: int) -> list[str]:
+    """ Generate ASP instance lines from Flatland environment."""
+
+    if (env.rail is None):
+        return []
+
+    logger.info("Generating ASP instance.")
+
+    schedules = [schedule_literal(agent) for agent in env.agents]
+
+    logger.info(f"Schedule literals ({len(schedules)}) done.")
+
+    cells = cell_literals(env.rail.grid)
+
     logger.info(f"Cell literals ({len(cells)}) done.")
 
     limit_literal = f"limit({limit})."
@@ -146,3 +332,36 @@ def generate_instance_lines(env: RailEnv, limit: int) -> list[str]:
             *cells,
             *delta_header(),
             *delta_literals()]
+
+
+def generate_map_lines(grid: np.ndarray, stations: set[tuple[int, int]]) -> list[str]:
+    """ Generate ASP instance lines describing only the map of an environment.
+
+        Used for two-phase grounding, where the map is grounded once
+        and schedules are added per request, see generate_schedule_lines.
+
+        Args:
+            grid: Environment grid of 16bit transition values
+            stations: Positions at which agents may start or end
+    """
+    cells = cell_literals(grid)
+
+    logger.info(f"Cell literals ({len(cells)}) done.")
+
+    return [*station_header(),
+            *[station_literal(station) for station in sorted(stations)],
+            *cell_header(),
+            *cells,
+            *delta_header(),
+            *delta_literals()]
+
+
+def generate_schedule_lines(env: RailEnv, limit: int, request: int) -> list[str]:
+    """ Generate ASP instance lines describing the schedules of one request.
+
+        Literals carry the identifier of the request as first argument:
+            limit(R,L).
+            schedule(R,ID,S,T,O,D).
+    """
+    return [f"limit({request},{limit}).",
+            *[f"schedule({request},{schedule_arguments(agent)})." for agent in env.agents]]
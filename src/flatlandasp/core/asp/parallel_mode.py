@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class ParallelMode(Enum):
+    """ Way in which multiple clingo solver threads share the search."""
+    COMPETE = "compete"
+    """ Every thread searches the whole search space, the first one finishing wins."""
+    SPLIT = "split"
+    """ The search space is split between the threads."""
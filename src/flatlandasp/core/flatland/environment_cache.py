@@ -0,0 +1,118 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Optional
+
+import numpy as np
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.flatland_asp_config import get_config
+
+
+def snapshot(environment: RailEnv) -> RailEnv:
+    """ Copy environment including its agents and episode state.
+
+        The rail and the distance map are shared with the original,
+        they are the large parts of an environment and must not be modified.
+        The grid of the rail is shared as well, see own_grid.
+    """
+    shared = {id(environment.rail): environment.rail,
+              id(environment.distance_map): environment.distance_map}
+    return copy.deepcopy(environment, shared)
+
+
+def own_grid(environment: RailEnv) -> None:
+    """ Replace grid of the rail by a copy if it is a view, e.g. of a memory-mapped environment file.
+
+        Snapshots share the grid, it must stay valid when the file is rewritten.
+    """
+    if not environment.rail.grid.flags.owndata:
+        environment.rail.grid = np.array(environment.rail.grid)
+
+
+class EnvironmentCache:
+    """ LRU cache of environments after their reset.
+
+        Environments are keyed by name, the file they are loaded from
+        including its modification time, the number of agents and the seed
+        of the reset. Every request gets its own snapshot of the cached
+        environment, so the schedules are the same until the entry is evicted,
+        invalidated or the file changes.
+    """
+
+    def __init__(self, *, max_entries: int) -> None:
+        self._max_entries = max_entries
+
+        self._environments: OrderedDict[tuple, RailEnv] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(*, name: str,
+            file_path: str,
+            number_of_agents: Optional[int],
+            seed: Optional[int]) -> tuple:
+        """ Get cache key of an environment.
+
+            Raises:
+                FileNotFoundError: File of the environment does not exist
+        """
+        return (name, file_path, os.stat(file_path).st_mtime_ns, number_of_agents, seed)
+
+    def get_or_load(self, key: tuple, load: Callable[[], RailEnv]) -> RailEnv:
+        """ Get snapshot of the cached environment or load and cache a new one.
+
+            Args:
+                key: Cache key, see EnvironmentCache.key
+                load: Function returning a reset environment on a cache miss
+        """
+        with self._lock:
+            environment = self._environments.get(key)
+            if environment is not None:
+                self._environments.move_to_end(key)
+                self.hits += 1
+                return snapshot(environment)
+            self.misses += 1
+
+        # Load outside of the lock, other requests should not wait for it
+        environment = load()
+        own_grid(environment)
+
+        with self._lock:
+            self._environments[key] = environment
+            self._environments.move_to_end(key)
+            while len(self._environments) > self._max_entries:
+                self._environments.popitem(last=False)
+                self.evictions += 1
+
+        return snapshot(environment)
+
+    def invalidate(self, name: str) -> None:
+        """ Remove all environments with the given name, e.g. after its files were rewritten."""
+        with self._lock:
+            for key in [key for key in self._environments if key[0] == name]:
+                del self._environments[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._environments.clear()
+
+    def statistics(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._environments),
+                "max_entries": self._max_entries,
+            }
+
+
+@lru_cache
+def get_environment_cache() -> EnvironmentCache:
+    return EnvironmentCache(max_entries=get_config().environment_cache_size)
@@ -1,7 +1,10 @@
 import json
+import os
+import tempfile
 from typing import Any, Optional
 
 import numpy as np
+from flatlandasp.core.flatland.environment_file_type import EnvironmentFileType
 from flatlandasp.core.flatland.schemas.environment_data_schema import (
     EnvironmentData,
 )
@@ -16,6 +19,20 @@ from flatland.envs.persistence import RailEnvPersister
 from flatland.envs.rail_env import RailEnv
 from flatland.envs.rail_generators import rail_from_grid_transition_map
 
+BINARY_MAGIC = b"FLASPENV"
+""" First bytes of every binary environment file.
+
+    The magic is followed by the length of the header as 32bit little-endian
+    integer, the header as json with the shape of the grid, the optionals and
+    the number of agents, and the grid as raw little-endian 16bit cell ids in
+    row-major order. The header is padded with spaces so that the grid starts
+    at a multiple of BINARY_GRID_ALIGNMENT.
+"""
+BINARY_GRID_ALIGNMENT = 64
+
+PARTIAL_FILES_DIRECTORY = '.partial/'
+""" Directory in the environments path where files are written before they are moved into place."""
+
 
 class TupleEncoder(json.JSONEncoder):
     """ Json encoder that turns tuples into dictionaries.
@@ -77,13 +94,136 @@ def read_data_from_json_file(*, file_name: str,
         return EnvironmentData(**data)
 
 
+def create_data_as_binary_file(*,
+                               file_name: str,
+                               environment_data: EnvironmentData,
+                               path: str = get_config().flatland_environments_path
+                               ) -> None:
+    """ Save environment data in the binary format, see BINARY_MAGIC.
+
+        The file is written to a temporary directory first and then moved,
+        so that grids memory-mapped from the old file keep its content.
+    """
+    create_path_if_not_exist(path=f'{path}{PARTIAL_FILES_DIRECTORY}')
+
+    header = json.dumps({'shape': list(environment_data.grid.shape),
+                         'optionals': environment_data.optionals,
+                         'number_of_agents': environment_data.number_of_agents},
+                        cls=TupleEncoder).encode()
+    header += b" " * (-(len(BINARY_MAGIC) + 4 + len(header)) % BINARY_GRID_ALIGNMENT)
+
+    file_descriptor, partial_file = tempfile.mkstemp(suffix=f'.{EnvironmentFileType.BINARY.value}',
+                                                     dir=f'{path}{PARTIAL_FILES_DIRECTORY}')
+
+    with os.fdopen(file_descriptor, 'wb') as f:
+        f.write(BINARY_MAGIC)
+        f.write(len(header).to_bytes(4, 'little'))
+        f.write(header)
+        f.write(np.ascontiguousarray(environment_data.grid, dtype='<u2').tobytes())
+
+    # Truncating a memory-mapped file crashes its readers, replacing it keeps the old file for them
+    os.replace(partial_file, f'{path}{file_name}')
+
+
+def read_data_from_binary_file(*, file_name: str,
+                               path: str = get_config().flatland_environments_path,
+                               ) -> EnvironmentData:
+    """ Load environment data saved in the binary format.
+
+        The grid is memory-mapped copy-on-write, so only the parts of the
+        grid that are accessed are read and changes are never written back.
+        Environments created from the data get a copy of the grid, see
+        get_environment_from_data.
+
+        Raises:
+            ValueError: File is no binary environment file
+    """
+    with open(f'{path}{file_name}', 'rb') as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{file_name} is no binary environment file.")
+
+        header_length = int.from_bytes(f.read(4), 'little')
+        header = json.loads(f.read(header_length), object_hook=tuple_hook)
+
+    grid = np.memmap(f'{path}{file_name}', dtype='<u2', mode='c',
+                     offset=len(BINARY_MAGIC) + 4 + header_length,
+                     shape=tuple(header['shape']))
+
+    return EnvironmentData(grid=grid,
+                           optionals=header['optionals'],
+                           number_of_agents=header['number_of_agents'])
+
+
+def get_data_file_name(*, name: str,
+                       path: str = get_config().flatland_environments_path) -> str:
+    """ Get file the environment data is read from, the binary file if it exists, otherwise the json file."""
+    if os.path.isfile(f'{path}{name}.{EnvironmentFileType.BINARY.value}'):
+        return f'{name}.{EnvironmentFileType.BINARY.value}'
+
+    return f'{name}.{EnvironmentFileType.JSON.value}'
+
+
+def read_data_from_file(*, name: str,
+                        path: str = get_config().flatland_environments_path) -> EnvironmentData:
+    """ Load environment data from the binary file if it exists, otherwise from the json file."""
+    file_name = get_data_file_name(name=name, path=path)
+
+    if file_name.endswith(EnvironmentFileType.BINARY.value):
+        return read_data_from_binary_file(file_name=file_name, path=path)
+
+    return read_data_from_json_file(file_name=file_name, path=path)
+
+
 def create_as_pickle_file(file_name: str,
                           env: RailEnv,
                           path: str = get_config().flatland_environments_path):
+    """ Save environment as pkl file.
 
-    create_path_if_not_exist(path=path)
+        The file is written to a temporary directory first and then moved,
+        so that concurrent readers never see a partially written file.
+    """
+    create_path_if_not_exist(path=f'{path}{PARTIAL_FILES_DIRECTORY}')
+
+    file_descriptor, partial_file = tempfile.mkstemp(suffix=f'.{EnvironmentFileType.PKL.value}',
+                                                     dir=f'{path}{PARTIAL_FILES_DIRECTORY}')
+    os.close(file_descriptor)
+
+    RailEnvPersister.save(env=env, filename=partial_file)
+
+    os.replace(partial_file, f'{path}{file_name}')
+
+
+def create_pickle_file_from_data(*, name: str,
+                                 environment_data: EnvironmentData,
+                                 path: str = get_config().flatland_environments_path) -> None:
+    """ Create environment from data, reset it and save it as pkl file."""
+    environment = get_environment_from_data(environment_data)
+    environment.reset()
+
+    create_as_pickle_file(f'{name}.{EnvironmentFileType.PKL.value}', environment, path=path)
 
-    RailEnvPersister.save(env=env, filename=f'{path}{file_name}')
+
+def ensure_pickle_file(*, name: str,
+                       path: str = get_config().flatland_environments_path) -> None:
+    """ Create the pkl file of an environment saved without one from its data.
+
+        Does nothing if the pkl file or the data does not exist.
+    """
+    if os.path.isfile(f'{path}{name}.{EnvironmentFileType.PKL.value}'):
+        return
+
+    if not os.path.isfile(f'{path}{get_data_file_name(name=name, path=path)}'):
+        return
+
+    create_pickle_file_from_data(name=name,
+                                 environment_data=read_data_from_file(name=name, path=path),
+                                 path=path)
+
+
+def delete_pickle_file(*, name: str,
+                       path: str = get_config().flatland_environments_path) -> None:
+    if os.path.isfile(f'{path}{name}.{EnvironmentFileType.PKL.value}'):
+        os.remove(f'{path}{name}.{EnvironmentFileType.PKL.value}')
 
 
 def read_from_pickle_file(file_name: str,
@@ -100,13 +240,22 @@ def get_environment_from_json(file_name: str, *,
     environment_data = read_data_from_json_file(
         file_name=file_name)
 
+    return get_environment_from_data(environment_data,
+                                     number_of_agents=number_of_agents,
+                                     line_generator=line_generator)
+
+
+def get_environment_from_data(environment_data: EnvironmentData, *,
+                              number_of_agents: Optional[int] = None,
+                              line_generator: LineGenerator = sparse_line_generator()):
     if (number_of_agents is None):
         number_of_agents = environment_data.number_of_agents
 
     grid_transition_map = GridTransitionMap(width=environment_data.grid.shape[1],
                                             height=environment_data.grid.shape[0],
                                             transitions=RailEnvTransitions())
-    grid_transition_map.grid = environment_data.grid
+    # Environments live long, e.g. in the environment cache, they must not depend on a memory-mapped file
+    grid_transition_map.grid = np.array(environment_data.grid)
 
     return RailEnv(width=grid_transition_map.width,
                    height=grid_transition_map.height,
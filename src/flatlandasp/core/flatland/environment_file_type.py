@@ -4,3 +4,4 @@ from enum import Enum
 class EnvironmentFileType(Enum):
     JSON = "json"
     PKL = "pkl"
+    BINARY = "flenv"
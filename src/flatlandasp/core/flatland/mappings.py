@@ -1,8 +1,11 @@
 from typing import Tuple
 
+import numpy as np
+
 from flatlandasp.core.flatland.schemas.action import Action
 from flatlandasp.core.flatland.schemas.cell_type import CellType
 from flatlandasp.core.flatland.schemas.orientation import Orientation, OrientationChange
+from flatlandasp.core.utils.number_utils import n_roll_bits
 
 CELL_TYPE_TO_ACTION_MAP: dict[CellType, list[list[Tuple[Action, OrientationChange]]]] = {
 
@@ -140,3 +143,16 @@ CELL_TYPE_TO_BASE_CELL_ID = {
     CellType.SIMPLE_TURN_LEFT: 4608,
     CellType.SIMPLE_SWITCH_MIRRORED: 49186,
 }
+
+CELL_ID_LOOKUP_TABLE = np.array([
+    [n_roll_bits(CELL_TYPE_TO_BASE_CELL_ID[cell_type], orientation.value) for orientation in Orientation]
+    for cell_type in CellType
+])
+""" Cell id of every cell type rotated to every orientation.
+
+    Indexed by the values of cell type and orientation, so whole grids can be
+    assembled at once instead of rolling bits cell by cell.
+
+    Example:
+        CELL_ID_LOOKUP_TABLE[CellType.STRAIGHT.value][Orientation.EAST.value] == 1025
+"""
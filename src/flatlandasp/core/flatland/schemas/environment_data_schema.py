@@ -41,9 +41,10 @@ class EnvironmentData(BaseModel):
         """ Convert given list to actual numpy array.
 
             Since pydantic doesn't natively work with numpy arrays,
-            grid still can't use proper type hints
+            grid still can't use proper type hints. Arrays are not copied,
+            so memory-mapped grids stay memory-mapped.
         """
-        return np.array(v)
+        return np.asarray(v)
 
     def dict(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
         """ Return EnvironmentData as dict with grid as list instead of ndarray."""
@@ -0,0 +1,87 @@
+import argparse
+import sys
+
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.benchmark.benchmark_runner import (
+    append_to_history,
+    find_regressions,
+    get_environment_names,
+    read_baseline,
+    run_benchmark,
+    save_baseline,
+)
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+TABLE_COLUMNS = ["environment_name", "case", "status", "cost", "instance_generation_time",
+                 "grounding_time", "solving_time", "atoms", "rules", "peak_rss_mb"]
+
+
+def format_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+def format_table(rows: list[dict], columns: list[str]) -> str:
+    cells = [[format_value(row.get(column)) for column in columns] for row in rows]
+    widths = [max([len(column), *(len(row[i]) for row in cells)])
+              for i, column in enumerate(columns)]
+
+    return "\n".join([" | ".join(column.rjust(width) for column, width in zip(columns, widths)),
+                      "-+-".join("-" * width for width in widths),
+                      *(" | ".join(cell.rjust(width) for cell, width in zip(row, widths))
+                        for row in cells)])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark all encodings on all environments and flag regressions against a baseline.")
+    parser.add_argument("--cases", nargs="+",
+                        help="Encodings (file names without .lp) to benchmark, defaults to all")
+    parser.add_argument("--environments", nargs="+",
+                        help="Environment names, defaults to all in the environments path and synthetic ones")
+    parser.add_argument("--no-synthetic", action="store_true",
+                        help="Do not benchmark synthetic environments")
+    parser.add_argument("--step-limit", type=int, default=40)
+    parser.add_argument("--time-limit", type=float, default=60,
+                        help="Time limit of solving each case in seconds")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative deterioration of a metric which counts as regression")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store this run as the new baseline")
+    arguments = parser.parse_args()
+
+    path = get_config().benchmark_results_path
+
+    rows = run_benchmark(case_names=arguments.cases,
+                         environment_names=(arguments.environments
+                                            or get_environment_names(with_synthetic=not arguments.no_synthetic)),
+                         step_limit=arguments.step_limit,
+                         time_limit=arguments.time_limit)
+
+    run = append_to_history(rows, path)
+
+    logger.info("Benchmark results:\n" + format_table(rows, TABLE_COLUMNS))
+
+    baseline = read_baseline(path)
+    regressions = [] if baseline is None else find_regressions(rows, baseline,
+                                                               tolerance=arguments.tolerance)
+
+    if arguments.save_baseline:
+        save_baseline(run, path)
+        logger.info("Saved run as new baseline.")
+    elif baseline is None:
+        logger.info("No baseline stored yet, use --save-baseline to store one.")
+
+    if regressions:
+        logger.warning(f"{len(regressions)} regression(s) against the baseline of {baseline['timestamp']}:\n"
+                       + format_table(regressions, ["environment_name", "case", "metric", "baseline", "value"]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+import json
+import multiprocessing
+import os
+import resource
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from clingo import Control
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.core.utils.file_utils import (
+    create_path_if_not_exist,
+    get_file_names_in_path,
+)
+from flatlandasp.features.environments.map_generation import (
+    generate_environment_data,
+    get_generated_environment_name,
+)
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+from flatlandasp.features.solver import solver
+from flatlandasp.features.solver.cancellation import Cancellation
+from flatlandasp.features.solver.conflict_propagator import ConflictPropagator
+from flatlandasp.features.solver.incremental_solving import solve_incremental
+from flatlandasp.features.solver.map_program import (
+    get_schedule_positions,
+    get_station_positions,
+    ground_map_program,
+)
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.features.solver.solver_callback_handler import SolverCallbackHandler
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+HISTORY_FILE_NAME = "history.jsonl"
+""" Every benchmark run is appended as one JSON line."""
+BASELINE_FILE_NAME = "baseline.json"
+
+REGRESSION_METRICS = ["instance_generation_time", "grounding_time", "solving_time",
+                      "atoms", "rules", "peak_rss_mb"]
+""" Metrics of a benchmark case where higher values are worse."""
+
+SYNTHETIC_ENVIRONMENTS = [
+    GenerationInput(width=20, height=20, number_of_stations=4, number_of_agents=4),
+    GenerationInput(width=40, height=40, number_of_crossings=4, number_of_sidings=4,
+                    number_of_stations=8, number_of_agents=8),
+    GenerationInput(width=80, height=80, number_of_crossings=16, number_of_sidings=16,
+                    number_of_stations=16, number_of_agents=16),
+    GenerationInput(width=160, height=160, number_of_crossings=64, number_of_sidings=64,
+                    number_of_stations=32, number_of_agents=32),
+]
+""" Generated maps benchmarked in addition to the ones in the environments path."""
+ENVIRONMENT_SEED = 1
+""" Seed of resetting the environments, so every run benchmarks the same schedules."""
+
+
+def get_cases(encodings_path: str) -> dict[str, dict]:
+    """ Get benchmark cases for all encodings in the encodings path.
+
+        Variants of an encoding run in their respective mode, two-phase
+        variants consist of a map and a schedules part which form one case.
+
+        Returns:
+            Solver input fields of each case by case name
+    """
+    cases = {}
+    for file_name in sorted(get_file_names_in_path(path=encodings_path)):
+        if not file_name.endswith(".lp"):
+            continue
+
+        name = file_name[:-len(".lp")]
+        if name.endswith("_map"):
+            cases[name] = {"encoding_name": name[:-len("_map")], "two_phase_grounding": True}
+        elif name.endswith("_incremental"):
+            cases[name] = {"encoding_name": name[:-len("_incremental")], "incremental": True}
+        elif name.endswith("_graph"):
+            cases[name] = {"encoding_name": name[:-len("_graph")], "precomputed_graph": True}
+        elif name.endswith("_lazy"):
+            cases[name] = {"encoding_name": name[:-len("_lazy")], "lazy_conflicts": True}
+        elif not name.endswith("_schedules"):
+            cases[name] = {"encoding_name": name}
+
+    return cases
+
+
+def get_environment_names(*, with_synthetic: bool) -> list[str]:
+    names = sorted(file_name[:-len(".pkl")]
+                   for file_name in get_file_names_in_path(path=get_config().flatland_environments_path)
+                   if file_name.endswith(".pkl"))
+
+    if with_synthetic:
+        # Synthetic maps may have been saved to the environments path as well
+        names += [get_generated_environment_name(input) for input in SYNTHETIC_ENVIRONMENTS
+                  if get_generated_environment_name(input) not in names]
+
+    return names
+
+
+def load_environment(environment_name: str) -> RailEnv:
+    """ Load environment from the environments path or generate a synthetic one."""
+    for input in SYNTHETIC_ENVIRONMENTS:
+        if environment_name == get_generated_environment_name(input):
+            environment = environment_crud.get_environment_from_data(generate_environment_data(input))
+            break
+    else:
+        environment = environment_crud.read_from_pickle_file(f'{environment_name}.pkl')
+
+    environment.reset(random_seed=ENVIRONMENT_SEED)
+    return environment
+
+
+def peak_rss_mb() -> float:
+    # Linux reports kilobytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(environment_name: str, input: SolverInput, time_limit: float) -> dict:
+    """ Run a single benchmark case, has to run in its own process for the peak memory.
+
+        Solving is cancelled after the time limit.
+
+        Returns:
+            Result row of the case
+    """
+    environment = load_environment(environment_name)
+    callback_handler = SolverCallbackHandler(logger=logger)
+    cancellation = Cancellation()
+
+    timer = threading.Timer(time_limit, cancellation.cancel)
+
+    instance_generation_time = None
+    if input.incremental:
+        timer.start()
+        horizon, statistics = solve_incremental(environment, input, callback_handler.on_model,
+                                                callback_handler.on_finish, cancellation)
+        grounding_time = sum(increment["grounding_time"] for increment in horizon["increments"])
+        solving_time = sum(increment["solving_time"] for increment in horizon["increments"])
+    elif input.two_phase_grounding:
+        start = time.perf_counter()
+        program = ground_map_program(environment, input,
+                                     get_station_positions(input) | get_schedule_positions(environment))
+        map_grounding_time = time.perf_counter() - start
+
+        timer.start()
+        statistics, timings = program.solve_schedules(environment, input.step_limit,
+                                                      callback_handler.on_model,
+                                                      callback_handler.on_finish, cancellation)
+        grounding_time = map_grounding_time + timings["grounding"]
+        solving_time = timings["solving"]
+    else:
+        start = time.perf_counter()
+        instance_lines = solver.generate_lines(environment, input)
+        instance_generation_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        clingo_control = Control()
+        if input.lazy_conflicts:
+            # Lazy variants have no conflict constraints without the propagator
+            clingo_control.register_propagator(ConflictPropagator())
+        clingo_control.add("base", [], "\n".join(instance_lines))
+        clingo_control.load(solver.get_encoding_file(input))
+        clingo_control.ground()
+        grounding_time = time.perf_counter() - start
+
+        timer.start()
+        start = time.perf_counter()
+        cancellation.solve(clingo_control, callback_handler.on_model, callback_handler.on_finish)
+        solving_time = time.perf_counter() - start
+        statistics = clingo_control.statistics
+
+    timer.cancel()
+
+    if callback_handler.cost is not None:
+        status = "optimal" if callback_handler.optimality_proven else "satisfiable"
+    else:
+        status = "timeout" if cancellation.cancelled else "unsatisfiable"
+
+    return {"instance_generation_time": instance_generation_time,
+            "grounding_time": grounding_time,
+            "solving_time": solving_time,
+            "atoms": int(statistics["problem"]["lp"]["atoms"]),
+            "rules": int(statistics["problem"]["lp"]["rules"]),
+            "peak_rss_mb": peak_rss_mb(),
+            "status": status,
+            "cost": callback_handler.cost}
+
+
+def run_isolated(function: Callable[..., dict], *args) -> dict:
+    """ Run function in a fresh process, so its peak memory is not affected by earlier cases."""
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=1) as pool:
+        return pool.apply(function, args)
+
+
+def run_benchmark(*,
+                  case_names: Optional[list[str]] = None,
+                  environment_names: Optional[list[str]] = None,
+                  step_limit: int = 40,
+                  time_limit: float = 60) -> list[dict]:
+    """ Run all benchmark cases on all environments.
+
+        Args:
+            case_names: Cases to run, see get_cases, defaults to all
+            environment_names: Environments to run on, defaults to all in the
+                environments path and the synthetic ones
+            step_limit: Step limit of all cases
+            time_limit: Time limit of solving each case in seconds
+
+        Returns:
+            One result row per case and environment
+    """
+    cases = get_cases(get_config().asp_encodings_path)
+    environment_names = environment_names or get_environment_names(with_synthetic=True)
+
+    rows = []
+    for environment_name in environment_names:
+        for case_name, case in cases.items():
+            if case_names is not None and case_name not in case_names:
+                continue
+
+            logger.info(f"Benchmarking {case_name} on {environment_name}.")
+
+            input = SolverInput(environment_name=environment_name, step_limit=step_limit, **case)
+
+            row = {"environment_name": environment_name, "case": case_name}
+            try:
+                row.update(run_isolated(run_case, environment_name, input, time_limit))
+            except (RuntimeError, OSError, ValueError) as e:
+                # Grounding errors of clingo, missing or broken environment files
+                # and invalid inputs fail the case, not the whole benchmark
+                logger.exception(f"Benchmarking {case_name} on {environment_name} failed.")
+                row.update(status="error", error=repr(e))
+            rows.append(row)
+
+    return rows
+
+
+def append_to_history(rows: list[dict], path: str) -> dict:
+    """ Append benchmark run to the history file.
+
+        Returns:
+            Benchmark run as stored in the history
+    """
+    run = {"timestamp": datetime.now(timezone.utc).isoformat(), "results": rows}
+
+    create_path_if_not_exist(path=path)
+
+    with open(f'{path}{HISTORY_FILE_NAME}', 'a') as f:
+        f.write(json.dumps(run) + "\n")
+
+    return run
+
+
+def read_history(path: str) -> list[dict]:
+    if not os.path.isfile(f'{path}{HISTORY_FILE_NAME}'):
+        return []
+
+    with open(f'{path}{HISTORY_FILE_NAME}', 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_baseline(run: dict, path: str) -> None:
+    create_path_if_not_exist(path=path)
+
+    with open(f'{path}{BASELINE_FILE_NAME}', 'w') as f:
+        f.write(json.dumps(run, indent=4))
+
+
+def read_baseline(path: str) -> Optional[dict]:
+    if not os.path.isfile(f'{path}{BASELINE_FILE_NAME}'):
+        return None
+
+    with open(f'{path}{BASELINE_FILE_NAME}', 'r') as f:
+        return json.load(f)
+
+
+def find_regressions(rows: list[dict],
+                     baseline: dict,
+                     *,
+                     tolerance: float = 0.2,
+                     min_time_difference: float = 0.05) -> list[dict]:
+    """ Compare result rows against a baseline run.
+
+        A metric regressed if it is more than the tolerance (relative) worse than
+        in the baseline, differences of times below min_time_difference seconds
+        are considered noise. A changed status or cost is always a regression.
+
+        Returns:
+            One entry per regressed metric
+    """
+    baseline_rows = {(row["environment_name"], row["case"]): row for row in baseline["results"]}
+
+    regressions = []
+    for row in rows:
+        baseline_row = baseline_rows.get((row["environment_name"], row["case"]))
+        if baseline_row is None:
+            continue
+
+        for metric in ["status", "cost"]:
+            if row.get(metric) != baseline_row.get(metric):
+                regressions.append({"environment_name": row["environment_name"],
+                                    "case": row["case"],
+                                    "metric": metric,
+                                    "baseline": baseline_row.get(metric),
+                                    "value": row.get(metric)})
+
+        for metric in REGRESSION_METRICS:
+            value, baseline_value = row.get(metric), baseline_row.get(metric)
+            if value is None or baseline_value is None:
+                continue
+
+            if metric.endswith("_time") and value - baseline_value < min_time_difference:
+                continue
+
+            if value > baseline_value * (1 + tolerance):
+                regressions.append({"environment_name": row["environment_name"],
+                                    "case": row["case"],
+                                    "metric": metric,
+                                    "baseline": baseline_value,
+                                    "value": value})
+
+    return regressions
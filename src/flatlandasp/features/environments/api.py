@@ -1,25 +1,25 @@
 
 import numpy as np
-from fastapi import APIRouter
-from flatland.core.grid.rail_env_grid import RailEnvTransitions
-from flatland.core.transition_map import GridTransitionMap
-from flatland.envs.line_generators import sparse_line_generator
-from flatland.envs.observations import GlobalObsForRailEnv
-from flatland.envs.rail_env import RailEnv
-from flatland.envs.rail_generators import rail_from_grid_transition_map
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 
 from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.flatland.environment_cache import get_environment_cache
 from flatlandasp.core.flatland.environment_file_type import EnvironmentFileType
-from flatlandasp.core.flatland.mappings import CELL_TYPE_TO_BASE_CELL_ID
+from flatlandasp.core.flatland.mappings import CELL_ID_LOOKUP_TABLE
 from flatlandasp.core.flatland.schemas.environment_data_schema import (
     EnvironmentData,
 )
 from flatlandasp.core.log_config import get_logger
 from flatlandasp.core.utils.file_utils import get_file_names_in_path
-from flatlandasp.core.utils.number_utils import n_roll_bits
+from flatlandasp.features.environments.map_generation import (
+    save_generated_environment,
+)
 from flatlandasp.features.environments.schemas.environment_input_schema import (
     EnvironmentInput,
 )
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
 from flatlandasp.flatland_asp_config import get_config
 
 router = APIRouter()
@@ -27,24 +27,27 @@ logger = get_logger()
 
 
 @router.post("/{name}/save")
-def save_data_and_environment(name: str, input: EnvironmentInput):
-    """ Save given environment input data as json and pkl environments."""
+def save_data_and_environment(name: str,
+                              input: EnvironmentInput,
+                              background_tasks: BackgroundTasks,
+                              lazy_pickle: bool = False):
+    """ Save given environment input data as json, binary and pkl environments.
 
-    logger.info(input)
+        With lazy_pickle the pkl environment is created after responding
+        or when it is first used, whichever happens first.
+    """
+
+    logger.info(f"Saving environment {name} with {len(input.cells)} cells "
+                f"and {len(input.stations)} stations.")
 
     grid = np.full(
         (input.dimensions.height, input.dimensions.width), 0)
 
-    for cell in input.cells:
-        grid[cell.position.y][cell.position.x] = n_roll_bits(
-            CELL_TYPE_TO_BASE_CELL_ID[cell.type], cell.orientation.value)
-
-    transitions = RailEnvTransitions()
-
-    grid_transition_map = GridTransitionMap(width=grid.shape[1],
-                                            height=grid.shape[0],
-                                            transitions=transitions)
-    grid_transition_map.grid = grid
+    # Assemble the whole grid at once from the precomputed cell ids
+    ys, xs, types, orientations = np.array(
+        [(cell.position.y, cell.position.x, cell.type.value, cell.orientation.value)
+         for cell in input.cells], dtype=int).reshape(-1, 4).T
+    grid[ys, xs] = CELL_ID_LOOKUP_TABLE[types, orientations]
 
     city_positions = []
     train_stations = []
@@ -73,25 +76,59 @@ def save_data_and_environment(name: str, input: EnvironmentInput):
 
     # Save as .json
     environment_data = EnvironmentData(
-        grid=grid_transition_map.grid, optionals=optionals, number_of_agents=number_of_agents)
+        grid=grid, optionals=optionals, number_of_agents=number_of_agents)
 
     environment_crud.create_data_as_json_file(file_name=f'{name}.json',
                                               environment_data=environment_data
                                               )
 
+    # Save as binary for fast loading
+    environment_crud.create_data_as_binary_file(file_name=f'{name}.{EnvironmentFileType.BINARY.value}',
+                                                environment_data=environment_data)
+
     # Save as .pkl
-    environment = RailEnv(width=grid_transition_map.width,
-                          height=grid_transition_map.height,
-                          rail_generator=rail_from_grid_transition_map(
-                              grid_transition_map, optionals),
-                          line_generator=sparse_line_generator(),
-                          number_of_agents=number_of_agents,
-                          obs_builder_object=GlobalObsForRailEnv()
-                          )
-    environment.reset()
+    save_pickle_file(name, environment_data, background_tasks, lazy=lazy_pickle)
+
+    get_environment_cache().invalidate(name)
+
 
-    environment_crud.create_as_pickle_file(
-        file_name=f'{name}.pkl', env=environment)
+def save_pickle_file(name: str,
+                     environment_data: EnvironmentData,
+                     background_tasks: BackgroundTasks,
+                     *,
+                     lazy: bool) -> None:
+    """ Create and reset environment from its data and save it as pkl file.
+
+        Lazily saving removes the outdated pkl file right away and creates
+        the new one in the background after responding.
+    """
+    if not lazy:
+        environment_crud.create_pickle_file_from_data(name=name, environment_data=environment_data)
+        return
+
+    environment_crud.delete_pickle_file(name=name)
+    background_tasks.add_task(environment_crud.ensure_pickle_file, name=name)
+
+
+@router.post("/{name}/generate")
+def generate(name: str,
+             input: GenerationInput,
+             background_tasks: BackgroundTasks,
+             lazy_pickle: bool = False):
+    """ Generate map from the given parameters and save it as json, binary and pkl environments.
+
+        With lazy_pickle the pkl environment is created after responding
+        or when it is first used, whichever happens first.
+    """
+    try:
+        environment_data = save_generated_environment(name, input, with_pickle_file=False)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422, detail=str(e)) from e
+
+    save_pickle_file(name, environment_data, background_tasks, lazy=lazy_pickle)
+
+    get_environment_cache().invalidate(name)
 
 
 @router.get("/")
@@ -102,14 +139,9 @@ def get_all():
         name = f.split(".")[0]
         extension = f.split(".")[1]
         if name not in environments:
-            environments[name] = {
-                EnvironmentFileType.JSON: False, EnvironmentFileType.PKL: False}
-
-        if EnvironmentFileType(extension) == EnvironmentFileType.JSON:
-            environments[name][EnvironmentFileType.JSON] = True
+            environments[name] = dict.fromkeys(EnvironmentFileType, False)
 
-        if EnvironmentFileType(extension) == EnvironmentFileType.PKL:
-            environments[name][EnvironmentFileType.PKL] = True
+        environments[name][EnvironmentFileType(extension)] = True
     return environments
 
 
@@ -0,0 +1,37 @@
+import argparse
+
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.flatland.environment_file_type import EnvironmentFileType
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.core.utils.file_utils import get_file_names_in_path
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert json environments to the binary environment format.")
+    parser.add_argument("--environments", nargs="+",
+                        help="Environment names, defaults to all json environments in the environments path")
+    parser.add_argument("--path", default=get_config().flatland_environments_path,
+                        help="Directory of the environments, binary files are written next to the json files")
+    arguments = parser.parse_args()
+
+    json_extension = f".{EnvironmentFileType.JSON.value}"
+    names = arguments.environments or sorted(
+        file_name[:-len(json_extension)]
+        for file_name in get_file_names_in_path(path=arguments.path)
+        if file_name.endswith(json_extension))
+
+    for name in names:
+        environment_data = environment_crud.read_data_from_json_file(file_name=f'{name}{json_extension}',
+                                                                     path=arguments.path)
+        environment_crud.create_data_as_binary_file(file_name=f'{name}.{EnvironmentFileType.BINARY.value}',
+                                                    environment_data=environment_data,
+                                                    path=arguments.path)
+        logger.info(f"Converted {name}.")
+
+
+if __name__ == "__main__":
+    main()
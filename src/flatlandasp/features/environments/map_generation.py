@@ -0,0 +1,202 @@
+""" Generation of large maps for scaling tests.
+
+    Maps are a lattice of horizontal and vertical rail lines, consecutive
+    lines are corridor_length cells apart and every line ends in dead ends
+    at both sides, where trains can turn around. Junctions of two lines are
+    double slips, which allow to change between both lines, or diamond
+    crossings, which do not. Junctions of the first row and the first column
+    are always double slips, so that every line can be reached from every
+    other line. Passing sidings parallel to horizontal corridors allow
+    trains to overtake or let each other pass.
+
+    Stations are placed on straight cells, each station is its own city
+    like in maps saved by the environments API. Agents are assigned to
+    stations by the sparse line generator of Flatland when the environment
+    is created from the saved data.
+"""
+import numpy as np
+
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.flatland.environment_file_type import EnvironmentFileType
+from flatlandasp.core.flatland.mappings import CELL_ID_LOOKUP_TABLE
+from flatlandasp.core.flatland.schemas.cell_type import CellType
+from flatlandasp.core.flatland.schemas.environment_data_schema import (
+    EnvironmentData,
+)
+from flatlandasp.core.flatland.schemas.orientation import Orientation
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+
+NORTH, EAST, SOUTH, WEST = (orientation.value for orientation in Orientation)
+
+CONNECTIONS_TYPE = set[tuple[int, int]]
+""" Pairs of sides of a cell connected by rail, a pair of the same side is a dead end."""
+
+CELL_ID_TO_CELL_TYPE_AND_ORIENTATION: dict[int, tuple[CellType, Orientation]] = {
+    int(CELL_ID_LOOKUP_TABLE[cell_type.value][orientation.value]): (cell_type, orientation)
+    for cell_type in CellType
+    for orientation in Orientation
+}
+""" Cell type and orientation of every valid cell, the inverse of CELL_ID_LOOKUP_TABLE."""
+
+
+def get_cell_id(connections: CONNECTIONS_TYPE) -> int:
+    """ Get cell id (16bit transition map) of a cell from its connected sides.
+
+        Raises:
+            ValueError: Connections do not form a valid Flatland cell
+    """
+    transitions = 0
+    for side_a, side_b in connections:
+        for entry, exit in [(side_a, side_b), (side_b, side_a)]:
+            # Trains entering through a side head in the opposite direction
+            heading = (entry + 2) % 4
+            transitions |= 1 << ((3 - heading) * 4 + (3 - exit))
+
+    if transitions not in CELL_ID_TO_CELL_TYPE_AND_ORIENTATION:
+        raise ValueError(f"Connections {sorted(connections)} are no valid cell.")
+
+    cell_type, orientation = CELL_ID_TO_CELL_TYPE_AND_ORIENTATION[transitions]
+
+    return int(CELL_ID_LOOKUP_TABLE[cell_type.value][orientation.value])
+
+
+def get_line_positions(size: int, corridor_length: int) -> list[int]:
+    """ Get rows or columns of lines, leaving space for dead ends and sidings at the border."""
+    return list(range(1, size - 1, corridor_length + 1))
+
+
+def generate_environment_data(input: GenerationInput) -> EnvironmentData:
+    """ Generate map described by the generation input.
+
+        Raises:
+            ValueError: Map is too small for the requested corridors,
+                crossings, sidings or stations
+    """
+    rows = get_line_positions(input.height, input.corridor_length)
+    columns = get_line_positions(input.width, input.corridor_length)
+
+    if input.corridor_length < 1 or len(rows) < 2 or len(columns) < 2:
+        raise ValueError(f"Map of {input.width}x{input.height} has no space for "
+                         f"two lines with corridors of length {input.corridor_length} in each direction.")
+
+    if input.number_of_stations < 2:
+        raise ValueError("At least two stations are required.")
+
+    random = np.random.default_rng(input.seed)
+
+    cells: dict[tuple[int, int], CONNECTIONS_TYPE] = {}
+
+    def connect(position: tuple[int, int], side_a: int, side_b: int) -> None:
+        cells.setdefault(position, set()).add((min(side_a, side_b), max(side_a, side_b)))
+
+    for y in rows:
+        connect((y, columns[0] - 1), EAST, EAST)
+        for x in range(columns[0], columns[-1] + 1):
+            connect((y, x), WEST, EAST)
+        connect((y, columns[-1] + 1), WEST, WEST)
+
+    for x in columns:
+        connect((rows[0] - 1, x), SOUTH, SOUTH)
+        for y in range(rows[0], rows[-1] + 1):
+            connect((y, x), NORTH, SOUTH)
+        connect((rows[-1] + 1, x), NORTH, NORTH)
+
+    # Junctions of the first row or column connect all lines
+    crossing_candidates = [(y, x) for y in rows[1:] for x in columns[1:]]
+    if input.number_of_crossings > len(crossing_candidates):
+        raise ValueError(f"Map has only {len(crossing_candidates)} junctions that can be crossings.")
+
+    crossings = {crossing_candidates[index]
+                 for index in random.choice(len(crossing_candidates), input.number_of_crossings, replace=False)}
+
+    for y in rows:
+        for x in columns:
+            if (y, x) in crossings:
+                continue
+            if random.integers(2) == 0:
+                connect((y, x), SOUTH, EAST)
+                connect((y, x), NORTH, WEST)
+            else:
+                connect((y, x), SOUTH, WEST)
+                connect((y, x), NORTH, EAST)
+
+    # Sidings run in the row above a corridor between two columns
+    siding_candidates = [(y, column) for y in rows for column in range(len(columns) - 1)]
+    if input.number_of_sidings > 0 and input.corridor_length < 2:
+        raise ValueError("Sidings require corridors of at least length 2.")
+    if input.number_of_sidings > len(siding_candidates):
+        raise ValueError(f"Map has only {len(siding_candidates)} corridors for sidings.")
+
+    for index in random.choice(len(siding_candidates), input.number_of_sidings, replace=False):
+        y, column = siding_candidates[index]
+        start, end = columns[column] + 1, columns[column + 1] - 1
+
+        connect((y, start), WEST, NORTH)
+        connect((y - 1, start), SOUTH, EAST)
+        for x in range(start + 1, end):
+            connect((y - 1, x), WEST, EAST)
+        connect((y - 1, end), WEST, SOUTH)
+        connect((y, end), NORTH, EAST)
+
+    station_candidates = sorted(position for position, connections in cells.items()
+                                if connections in [{(EAST, WEST)}, {(NORTH, SOUTH)}])
+    if input.number_of_stations > len(station_candidates):
+        raise ValueError(f"Map has only {len(station_candidates)} straight cells for stations.")
+
+    city_positions = []
+    train_stations = []
+    city_orientations = []
+
+    # Each station is a city, like in maps saved by the environments API
+    for index in sorted(random.choice(len(station_candidates), input.number_of_stations, replace=False)):
+        position = station_candidates[index]
+        city_positions.append(position)
+        train_stations.append([(position, 0)])
+        city_orientations.append(EAST if cells[position] == {(EAST, WEST)} else NORTH)
+
+    grid = np.full((input.height, input.width), 0)
+    for (y, x), connections in cells.items():
+        grid[y][x] = get_cell_id(connections)
+
+    agents_hints = {'city_positions': city_positions,
+                    'train_stations': train_stations,
+                    'city_orientations': city_orientations
+                    }
+
+    return EnvironmentData(grid=grid,
+                           optionals={'agents_hints': agents_hints},
+                           number_of_agents=input.number_of_agents)
+
+
+def get_generated_environment_name(input: GenerationInput) -> str:
+    """ Get name of a generated map, unique for its parameters."""
+    return (f"{input.height}x{input.width}x{input.number_of_agents}-generated"
+            f"_c{input.corridor_length}_x{input.number_of_crossings}_s{input.number_of_sidings}"
+            f"_t{input.number_of_stations}_seed{input.seed}")
+
+
+def save_generated_environment(name: str,
+                               input: GenerationInput,
+                               *,
+                               with_pickle_file: bool = True) -> EnvironmentData:
+    """ Generate map and save it as json, binary and pkl environment like the environments API.
+
+        Args:
+            name: Name of the environment
+            input: Generation parameters
+            with_pickle_file: Whether to create the pkl environment, which
+                requires to create and reset the environment
+    """
+    environment_data = generate_environment_data(input)
+
+    environment_crud.create_data_as_json_file(file_name=f'{name}.json',
+                                              environment_data=environment_data)
+    environment_crud.create_data_as_binary_file(file_name=f'{name}.{EnvironmentFileType.BINARY.value}',
+                                                environment_data=environment_data)
+
+    if with_pickle_file:
+        environment_crud.create_pickle_file_from_data(name=name, environment_data=environment_data)
+
+    return environment_data
@@ -0,0 +1,59 @@
+import argparse
+
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.environments.map_generation import (
+    get_generated_environment_name,
+    save_generated_environment,
+)
+from flatlandasp.features.environments.schemas.generation_input_schema import (
+    GenerationInput,
+)
+
+logger = get_logger()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a family of maps from the cross product of the given options "
+                    "and save them to the environments path.")
+    parser.add_argument("--sizes", nargs="+", type=int, required=True,
+                        help="Width and height of square maps")
+    parser.add_argument("--agents", nargs="+", type=int, default=[2])
+    parser.add_argument("--stations", nargs="+", type=int, default=[2])
+    parser.add_argument("--corridor-lengths", nargs="+", type=int, default=[4])
+    parser.add_argument("--crossings", nargs="+", type=int, default=[0],
+                        help="Numbers of junctions that are diamond crossings")
+    parser.add_argument("--sidings", nargs="+", type=int, default=[0],
+                        help="Numbers of passing sidings")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[1])
+    arguments = parser.parse_args()
+
+    inputs = [GenerationInput(width=size,
+                              height=size,
+                              corridor_length=corridor_length,
+                              number_of_crossings=number_of_crossings,
+                              number_of_sidings=number_of_sidings,
+                              number_of_stations=number_of_stations,
+                              number_of_agents=number_of_agents,
+                              seed=seed)
+              for size in arguments.sizes
+              for number_of_agents in arguments.agents
+              for number_of_stations in arguments.stations
+              for corridor_length in arguments.corridor_lengths
+              for number_of_crossings in arguments.crossings
+              for number_of_sidings in arguments.sidings
+              for seed in arguments.seeds]
+
+    for input in inputs:
+        name = get_generated_environment_name(input)
+        try:
+            save_generated_environment(name, input)
+        except ValueError as e:
+            logger.warning(f"Skipped {name}: {e}")
+            continue
+
+        logger.info(f"Saved {name}.")
+
+
+if __name__ == "__main__":
+    main()
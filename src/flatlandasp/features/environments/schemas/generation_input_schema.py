@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class GenerationInput(BaseModel):
+    """ Parameters of a generated map, see map_generation.
+
+        Maps with the same parameters are identical.
+    """
+    width: int
+    height: int
+    corridor_length: int = 4
+    """ Number of cells between two junctions of the rail lattice."""
+    number_of_crossings: int = 0
+    """ Number of junctions that are diamond crossings, all other junctions are double slips."""
+    number_of_sidings: int = 0
+    """ Number of passing sidings, each adds two switches to a horizontal corridor."""
+    number_of_stations: int = 2
+    number_of_agents: int = 2
+    seed: int = 1
@@ -1,36 +1,69 @@
 import copy
+import json
+import logging
 import time
+from typing import Optional
 
 from flatland.envs.rail_env import RailEnv, RailEnvActions
 from flatland.utils.rendertools import RenderTool
-from PIL import Image
 
 from flatlandasp.core.flatland.schemas.action import Action
-from flatlandasp.core.utils.image_utils import get_image_bytes_from_image
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.simulator.frame_rendering import (
+    AGENT_FRAME_TYPE,
+    AnimationFormat,
+    FrameRenderer,
+    get_agent_frames,
+    get_frame_renderer_cache,
+)
+from flatlandasp.features.simulator.simulation_recording import SimulationRecording
 from flatlandasp.flatland_asp_config import FlatlandASPConfig, get_config
 
+logger = get_logger()
+
 
 class FlatlandASPSimulator:
     def __init__(self, *,
                  env: RailEnv,
-                 env_renderer: RenderTool,
-                 config: FlatlandASPConfig = get_config()) -> None:
+                 env_renderer: Optional[RenderTool] = None,
+                 config: FlatlandASPConfig = get_config(),
+                 headless: bool = False) -> None:
+        """ Simulator replaying agent actions in a Flatland environment.
+
+            Args:
+                env: Reset environment
+                env_renderer: Renderer of the environment, only required for rendering
+                    while simulating, images are rendered by a shared FrameRenderer
+                config: Configuration
+                headless: Whether to record the state of the agents into a
+                    SimulationRecording and log a structured trace instead of
+                    printing every step and copying the agents after every step
+        """
         self.env = env
         self._config = config
+        self.headless = headless
 
-        for index, agent in enumerate(self.env.agents):
-            # agent.earliest_departure = index*2
-            print(
-                f"agent: {index} should depart at: {agent.earliest_departure} state:{agent.state}")
+        if not headless:
+            for index, agent in enumerate(self.env.agents):
+                # agent.earliest_departure = index*2
+                print(
+                    f"agent: {index} should depart at: {agent.earliest_departure} state:{agent.state}")
 
         self.env_renderer = env_renderer
         self.agents_at_step = {}
 
+        self.recording: Optional[SimulationRecording] = None
+        """ Agent state of every step of the last headless simulation."""
+        self._initial_agents = None
+
     def simulate_environment(self,
                              agent_actions: dict,
                              max_steps: int = 30,
                              step_delay: float = 0.5,
                              render: bool = False) -> None:
+        if self.headless:
+            self.simulate_headless(agent_actions, max_steps)
+            return
 
         try:
             # Set Flatland horizon,
@@ -76,18 +109,105 @@ class FlatlandASPSimulator:
             print(
                 f"An exception occured which would otherwise have closed the rendering window.\n\n{e}\n")
 
-    def get_image_bytes_at_simulation_step(self, step: int = 0):
-        old_agents = self.env.agents
-        self.env.agents = self.agents_at_step[step]
-        image_bytes = self.get_image_bytes()
-        self.env.agents = old_agents
-        return image_bytes
-
-    def get_image_bytes(self):
-        image_array = self.env_renderer.render_env(
-            show_rowcols=True,
-            show_predictions=True,
-            return_image=True
-        )
-        image = Image.fromarray(image_array)
-        return get_image_bytes_from_image(image)
+    def simulate_headless(self, agent_actions: dict, max_steps: int = 30) -> SimulationRecording:
+        """ Simulate without printing, rendering or copying agents.
+
+            The agent state after every step is recorded into the preallocated
+            arrays of a SimulationRecording, each step is logged as one
+            structured debug message. Agents without further actions do nothing.
+
+            Args:
+                agent_actions: Actions of each agent ordered by time step,
+                    starting at the step the agent is on the map
+                max_steps: Maximum number of steps, the size of the recording
+        """
+        # Set Flatland horizon,
+        # this should be similar to the ASP horizon
+        self.env._max_episode_steps = max_steps
+
+        number_of_agents = len(self.env.agents)
+        self._initial_agents = copy.deepcopy(self.env.agents)
+        self.recording = SimulationRecording(number_of_steps=max_steps, number_of_agents=number_of_agents)
+
+        # Index of the next action of each agent, -1 while the agent is not on the map
+        action_indices = [-1] * number_of_agents
+
+        step = 0
+        while not self.env.dones["__all__"] and step < max_steps:
+            actions = {}
+            for index, agent in enumerate(self.env.agents):
+                if agent.position:
+                    if not self.env.dones[index]:
+                        action_indices[index] += 1
+                        agent_action_list = agent_actions.get(index, [])
+                        actions[agent.handle] = agent_action_list[action_indices[index]] \
+                            if action_indices[index] < len(agent_action_list) else RailEnvActions.DO_NOTHING
+                else:
+                    actions[agent.handle] = RailEnvActions.MOVE_FORWARD
+
+            self.env.step(actions)
+
+            self.recording.record(step, self.env.agents, actions)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(json.dumps({"step": step,
+                                         "actions": {handle: int(action) for handle, action in actions.items()},
+                                         "done": sum(bool(self.env.dones[index])
+                                                     for index in range(number_of_agents))}))
+            step += 1
+
+        logger.info(f"Simulated {step} steps of {number_of_agents} agents, "
+                    f"{sum(bool(self.env.dones[index]) for index in range(number_of_agents))} are done.")
+
+        return self.recording
+
+    def get_agents_at_simulation_step(self, step: int) -> list:
+        """ Get agents after a simulation step, reconstructed from the recording in headless mode.
+
+            Raises:
+                KeyError, IndexError: Step was not simulated
+        """
+        if self.headless:
+            if self.recording is None:
+                raise IndexError("No simulation has been recorded.")
+            return self.recording.get_agents(step, self._initial_agents)
+
+        return self.agents_at_step[step]
+
+    def get_number_of_simulated_steps(self) -> int:
+        if self.headless:
+            return 0 if self.recording is None else self.recording.number_of_steps
+        return len(self.agents_at_step)
+
+    def get_agent_frames_at_simulation_step(self, step: int) -> tuple[AGENT_FRAME_TYPE, ...]:
+        """ Get what is drawn of the agents after a simulation step, see get_agents_at_simulation_step."""
+        if self.headless:
+            if self.recording is None:
+                raise IndexError("No simulation has been recorded.")
+            return self.recording.get_agent_frames(step)
+
+        return get_agent_frames(self.agents_at_step[step])
+
+    def get_frame_renderer(self) -> FrameRenderer:
+        return get_frame_renderer_cache().get_or_create(self.env)
+
+    def get_image_bytes_at_simulation_step(self, step: int = 0) -> str:
+        return self.get_frame_renderer().get_image_bytes(self.get_agent_frames_at_simulation_step(step))
+
+    def get_image_bytes(self) -> str:
+        """ Get image of the current state of the environment as base64 encoded PNG."""
+        return self.get_frame_renderer().get_image_bytes(get_agent_frames(self.env.agents))
+
+    def export_simulation(self,
+                          path: str,
+                          *,
+                          animation_format: AnimationFormat = AnimationFormat.GIF,
+                          frame_duration: int = 500,
+                          workers: Optional[int] = None) -> str:
+        """ Export every simulated step as animation or directory of frames, see FrameRenderer.export_animation."""
+        frames = [self.get_agent_frames_at_simulation_step(step)
+                  for step in range(self.get_number_of_simulated_steps())]
+        return self.get_frame_renderer().export_animation(frames, path,
+                                                          animation_format=animation_format,
+                                                          frame_duration=frame_duration,
+                                                          workers=workers)
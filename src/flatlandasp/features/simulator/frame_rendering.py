@@ -0,0 +1,246 @@
+""" Rendering of simulation frames onto a cached background.
+
+    Rails, targets and row and column labels of an environment never change
+    during a simulation. They are rendered once into a background image per
+    environment, each frame only draws the agents onto an empty layer and
+    composites it with the background. Encoded frames are kept in an LRU
+    cache keyed by what is drawn of the agents, so requesting a frame again
+    or a frame identical to another one does not render it again.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from functools import lru_cache
+from typing import Optional, Sequence
+
+from flatland.envs.agent_utils import EnvAgent
+from flatland.envs.rail_env import RailEnv
+from flatland.utils.graphics_pil import PILGL
+from flatland.utils.rendertools import RenderTool
+from PIL import Image
+
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.core.utils.image_utils import get_image_bytes_from_image
+from flatlandasp.features.solver.grounded_program_cache import environment_content_hash
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+AGENT_FRAME_TYPE = tuple[Optional[tuple[int, int]], Optional[tuple[int, int]], int, Optional[int], bool]
+""" Position, old position, direction, old direction and malfunction of an agent, all that is drawn of it."""
+
+
+class AnimationFormat(Enum):
+    GIF = "gif"
+    WEBP = "webp"
+    FRAMES = "frames"
+    """ Directory with one PNG file per frame."""
+
+
+def get_agent_frame(agent: EnvAgent) -> AGENT_FRAME_TYPE:
+    return (None if agent.position is None else tuple(agent.position),
+            None if agent.old_position is None else tuple(agent.old_position),
+            int(agent.direction),
+            None if agent.old_direction is None else int(agent.old_direction),
+            agent.malfunction_handler.malfunction_down_counter > 0)
+
+
+def get_agent_frames(agents: Sequence[EnvAgent]) -> tuple[AGENT_FRAME_TYPE, ...]:
+    return tuple(get_agent_frame(agent) for agent in agents)
+
+
+class FrameRenderer:
+    """ Renders frames of one environment by drawing agents onto its cached background."""
+
+    def __init__(self, *, env: RailEnv, frame_cache_size: int) -> None:
+        self._render_tool = RenderTool(env, gl="PILSVG")
+        self._render_tool.render_env(show_agents=False, show_observations=False, show_rowcols=True)
+
+        layers = self._render_tool.gl.layers
+        self.background = Image.alpha_composite(layers[PILGL.RAIL_LAYER], layers[PILGL.TARGET_LAYER])
+        """ Rails, targets and labels, the part of every frame below the agents."""
+
+        self._frame_cache_size = frame_cache_size
+        self._frames: OrderedDict[tuple[AGENT_FRAME_TYPE, ...], str] = OrderedDict()
+        """ Base64 encoded PNG frames keyed by the agent frames drawn on them."""
+        self._lock = threading.Lock()
+        """ Lock which has to be held while drawing, the layers of the render tool are shared."""
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_agent_layer(self, agent_frames: Sequence[AGENT_FRAME_TYPE]) -> Image.Image:
+        """ Draw agents onto a new transparent layer.
+
+            Agents are drawn like the ONE_STEP_BEHIND variant of the RenderTool,
+            agents which are not on the map are not drawn.
+        """
+        gl = self._render_tool.gl
+        with self._lock:
+            # Replaces the agent layer, layers returned before are not modified
+            gl.begin_frame()
+            for index, (position, old_position, direction, old_direction, malfunction) in enumerate(agent_frames):
+                if position is None:
+                    continue
+                if old_position is not None and old_direction is not None:
+                    position, in_direction = old_position, old_direction
+                else:
+                    in_direction = direction
+                gl.set_agent_at(index, *position, in_direction, direction, False, malfunction=malfunction)
+
+            return gl.layers[PILGL.AGENT_LAYER]
+
+    def get_image(self, agent_frames: Sequence[AGENT_FRAME_TYPE]) -> Image.Image:
+        return Image.alpha_composite(self.background, self.get_agent_layer(agent_frames))
+
+    def get_image_bytes(self, agent_frames: Sequence[AGENT_FRAME_TYPE]) -> str:
+        """ Get frame as base64 encoded PNG, from the frame cache if it was rendered before."""
+        key = tuple(agent_frames)
+        with self._lock:
+            image_bytes = self._frames.get(key)
+            if image_bytes is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return image_bytes
+            self.misses += 1
+
+        image_bytes = get_image_bytes_from_image(self.get_image(agent_frames))
+
+        with self._lock:
+            self._frames[key] = image_bytes
+            while len(self._frames) > self._frame_cache_size:
+                self._frames.popitem(last=False)
+
+        return image_bytes
+
+    def export_animation(self,
+                         frames: Sequence[Sequence[AGENT_FRAME_TYPE]],
+                         path: str,
+                         *,
+                         animation_format: AnimationFormat = AnimationFormat.GIF,
+                         frame_duration: int = 500,
+                         workers: Optional[int] = None) -> str:
+        """ Export frames as animation or directory of PNG files.
+
+            Agents are drawn one frame after another, compositing, color
+            quantization and encoding of the frames run in a pool of threads.
+            Identical consecutive frames are only composited once.
+
+            Args:
+                frames: Agent frames of every frame in order
+                path: File of the animation or directory of the frames
+                animation_format: Format of the export
+                frame_duration: Milliseconds each frame is shown in animations
+                workers: Number of threads, defaults to the number of CPUs
+
+            Returns:
+                Path of the export
+        """
+        if animation_format == AnimationFormat.FRAMES:
+            os.makedirs(path, exist_ok=True)
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        palette = None
+        if animation_format == AnimationFormat.GIF and frames:
+            # One palette for all frames, taken from the frame with the most agents on the map,
+            # so unchanged pixels keep their color index and the GIF only stores changes
+            busiest = max(frames, key=lambda agent_frames: sum(position is not None
+                                                               for position, *_ in agent_frames))
+            palette = self.get_image(busiest).convert("RGB").quantize(colors=256)
+
+        def finish(index: int, agent_layer: Image.Image) -> Optional[Image.Image]:
+            image = Image.alpha_composite(self.background, agent_layer)
+            if animation_format == AnimationFormat.FRAMES:
+                # Frames are not kept in memory once they are written
+                image.save(os.path.join(path, f"frame_{index:05d}.png"))
+                return None
+            if palette is not None:
+                image = image.convert("RGB").quantize(palette=palette, dither=Image.Dither.NONE)
+            return image
+
+        images = []
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            last_key, last_future = None, None
+            for index, agent_frames in enumerate(frames):
+                key = tuple(agent_frames)
+                if key != last_key or animation_format == AnimationFormat.FRAMES:
+                    last_key, last_future = key, executor.submit(finish, index, self.get_agent_layer(agent_frames))
+                images.append(last_future)
+            images = [future.result() for future in images]
+
+        if animation_format != AnimationFormat.FRAMES and images:
+            images[0].save(path, format=animation_format.value, save_all=True, append_images=images[1:],
+                           duration=frame_duration, loop=0)
+
+        logger.info(f"Exported {len(images)} frames to {path}.")
+
+        return path
+
+    def clear(self) -> None:
+        """ Remove all encoded frames, the background is kept."""
+        with self._lock:
+            self._frames.clear()
+
+    def statistics(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._frames),
+                "max_entries": self._frame_cache_size,
+            }
+
+
+class FrameRendererCache:
+    """ LRU cache of frame renderers keyed by environment content.
+
+        Creating a renderer loads the images of the render tool and renders
+        the background, which takes seconds on large maps. Simulators of the
+        same environment, e.g. snapshots of a cached environment, share it.
+    """
+
+    def __init__(self, *, max_entries: int, frame_cache_size: int) -> None:
+        self._max_entries = max_entries
+        self._frame_cache_size = frame_cache_size
+
+        self._renderers: OrderedDict[tuple, FrameRenderer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(env: RailEnv) -> tuple:
+        """ Get cache key of an environment, its grid and the targets drawn on the background."""
+        return (environment_content_hash(env, with_agents=False),
+                tuple(tuple(agent.target) for agent in env.agents))
+
+    def get_or_create(self, env: RailEnv) -> FrameRenderer:
+        key = self.key(env)
+
+        with self._lock:
+            renderer = self._renderers.get(key)
+            if renderer is not None:
+                self._renderers.move_to_end(key)
+                return renderer
+
+        # Render outside of the lock, other simulators should not wait for it
+        renderer = FrameRenderer(env=env, frame_cache_size=self._frame_cache_size)
+
+        with self._lock:
+            renderer = self._renderers.setdefault(key, renderer)
+            self._renderers.move_to_end(key)
+            while len(self._renderers) > self._max_entries:
+                self._renderers.popitem(last=False)
+
+        return renderer
+
+    def clear(self) -> None:
+        with self._lock:
+            self._renderers.clear()
+
+
+@lru_cache
+def get_frame_renderer_cache() -> FrameRendererCache:
+    return FrameRendererCache(max_entries=get_config().environment_cache_size,
+                              frame_cache_size=get_config().frame_cache_size)
@@ -0,0 +1,144 @@
+import copy
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+from flatland.envs.agent_utils import EnvAgent
+from flatland.envs.step_utils.states import TrainState
+
+NO_POSITION = -1
+""" Row and column recorded for agents which are not on the map."""
+
+NO_DIRECTION = -1
+""" Direction recorded for agents which had no previous direction."""
+
+NO_ACTION = -1
+""" Action recorded for agents which did not act in a step."""
+
+
+class SimulationRecording:
+    """ State of every agent after every simulation step in preallocated arrays.
+
+        Arrays are indexed by step and agent handle. Recording a step copies a
+        few numbers per agent instead of the agent objects, agent objects are
+        only reconstructed on demand, e.g. for rendering a step.
+    """
+
+    def __init__(self, *, number_of_steps: int, number_of_agents: int) -> None:
+        shape = (number_of_steps, number_of_agents)
+
+        self.positions = np.full((*shape, 2), NO_POSITION, dtype=np.int32)
+        """ Row and column of each agent, NO_POSITION if off the map."""
+        self.old_positions = np.full((*shape, 2), NO_POSITION, dtype=np.int32)
+        """ Row and column of each agent before the step, used for rendering."""
+        self.directions = np.zeros(shape, dtype=np.int8)
+        self.old_directions = np.full(shape, NO_DIRECTION, dtype=np.int8)
+        """ Direction of each agent before the step, NO_DIRECTION if there was none."""
+        self.states = np.zeros(shape, dtype=np.int8)
+        """ TrainState of each agent."""
+        self.speed_counters = np.zeros(shape, dtype=np.int16)
+        """ Progress of each agent within its cell, see SpeedCounter.counter."""
+        self.malfunction_counters = np.zeros(shape, dtype=np.int16)
+        """ Remaining steps of malfunction of each agent."""
+        self.actions = np.full(shape, NO_ACTION, dtype=np.int8)
+        """ Action each agent took in the step, NO_ACTION if it took none."""
+
+        self.number_of_steps = 0
+        """ Number of steps recorded so far."""
+
+    def record(self, step: int, agents: Sequence[EnvAgent], actions: dict[int, int]) -> None:
+        """ Record the state of all agents after a step.
+
+            Args:
+                step: Index of the step
+                agents: Agents after the step
+                actions: Action of each agent handle taken in the step
+        """
+        # Collect each attribute of all agents first, so every array is written once per step
+        no_position = (NO_POSITION, NO_POSITION)
+        self.positions[step] = [agent.position or no_position for agent in agents]
+        self.old_positions[step] = [agent.old_position or no_position for agent in agents]
+        self.directions[step] = [agent.direction for agent in agents]
+        self.old_directions[step] = [NO_DIRECTION if agent.old_direction is None else agent.old_direction
+                                     for agent in agents]
+        self.states[step] = [agent.state for agent in agents]
+        self.speed_counters[step] = [agent.speed_counter.counter for agent in agents]
+        self.malfunction_counters[step] = [agent.malfunction_handler.malfunction_down_counter for agent in agents]
+
+        if actions:
+            self.actions[step, list(actions.keys())] = list(actions.values())
+
+        self.number_of_steps = max(self.number_of_steps, step + 1)
+
+    def get_agents(self, step: int, initial_agents: Sequence[EnvAgent]) -> list[EnvAgent]:
+        """ Reconstruct agent objects as they were after a step.
+
+            Args:
+                step: Index of a recorded step
+                initial_agents: Agents before the simulation, they are copied
+                    and not modified
+
+            Raises:
+                IndexError: Step has not been recorded
+        """
+        if not 0 <= step < self.number_of_steps:
+            raise IndexError(f"Step {step} has not been recorded, {self.number_of_steps} steps were.")
+
+        agents = copy.deepcopy(list(initial_agents))
+        for index, agent in enumerate(agents):
+            agent.position = get_position(self.positions[step, index])
+            agent.old_position = get_position(self.old_positions[step, index])
+            agent.direction = int(self.directions[step, index])
+            old_direction = int(self.old_directions[step, index])
+            agent.old_direction = None if old_direction == NO_DIRECTION else old_direction
+            agent.state_machine.set_state(TrainState(int(self.states[step, index])))
+            agent.speed_counter.counter = int(self.speed_counters[step, index])
+            agent.malfunction_handler.malfunction_down_counter = int(self.malfunction_counters[step, index])
+
+        return agents
+
+    def get_agent_frames(self, step: int) -> tuple:
+        """ Get what is drawn of every agent after a step without reconstructing the agents.
+
+            Returns:
+                Agent frames, see frame_rendering.AGENT_FRAME_TYPE
+
+            Raises:
+                IndexError: Step has not been recorded
+        """
+        if not 0 <= step < self.number_of_steps:
+            raise IndexError(f"Step {step} has not been recorded, {self.number_of_steps} steps were.")
+
+        return tuple((get_position(self.positions[step, index]),
+                      get_position(self.old_positions[step, index]),
+                      int(self.directions[step, index]),
+                      None if self.old_directions[step, index] == NO_DIRECTION
+                      else int(self.old_directions[step, index]),
+                      bool(self.malfunction_counters[step, index] > 0))
+                     for index in range(self.states.shape[1]))
+
+    def get_trace(self) -> Iterator[dict]:
+        """ Get one structured event per recorded step and agent in the order they happened."""
+        for step in range(self.number_of_steps):
+            for index in range(self.states.shape[1]):
+                action = int(self.actions[step, index])
+                yield {
+                    "step": step,
+                    "agent": index,
+                    "action": None if action == NO_ACTION else action,
+                    "position": get_position(self.positions[step, index]),
+                    "direction": int(self.directions[step, index]),
+                    "state": TrainState(int(self.states[step, index])).name,
+                    "speed_counter": int(self.speed_counters[step, index]),
+                }
+
+    def get_size(self) -> int:
+        """ Get memory used by the arrays in bytes."""
+        return sum(array.nbytes for array in [self.positions, self.old_positions, self.directions,
+                                              self.old_directions, self.states, self.speed_counters,
+                                              self.malfunction_counters, self.actions])
+
+
+def get_position(position: np.ndarray) -> Optional[tuple[int, int]]:
+    if position[0] == NO_POSITION:
+        return None
+    return int(position[0]), int(position[1])
@@ -1,16 +1,23 @@
-from clingo import Control
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
-from flatlandasp.core.asp.instance_generation import generate_instance_lines
-from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.flatland.environment_cache import get_environment_cache
 from flatlandasp.core.log_config import get_logger
-from flatlandasp.core.utils.file_utils import (
-    write_json_file,
-    write_lines_to_file_in_output,
+from flatlandasp.features.solver import solver
+from flatlandasp.features.solver.batch_solving import solve_batch
+from flatlandasp.features.solver.grounded_program_cache import (
+    get_grounded_program_cache,
 )
+from flatlandasp.features.solver.map_program import get_map_program_cache
+from flatlandasp.features.solver.schemas.batch_input_schema import BatchInput
 from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
-from flatlandasp.features.solver.solver_callback_handler import SolverCallbackHandler
-from flatlandasp.flatland_asp_config import get_config
+from flatlandasp.features.solver.solution_cache import get_solution_cache
+from flatlandasp.features.solver.solution_stream import stream_solution
+from flatlandasp.features.solver.solver_jobs import (
+    JobQueueFullError,
+    SolverJob,
+    get_solver_job_manager,
+)
 
 router = APIRouter()
 
@@ -20,60 +27,104 @@ logger = get_logger()
 @router.post("/solve")
 def solve(input: SolverInput):
     try:
-        # Create Environment
-        if input.number_of_agents is None or input.number_of_agents < 1:
-            # If no number of agents is provided
-            # or the provided number is lower than 1
-            # load the pkl file directly
-            environment = environment_crud.read_from_pickle_file(
-                f'{input.environment_name}.pkl')
-        else:
-            environment = environment_crud.get_environment_from_json(
-                f'{input.environment_name}.json', number_of_agents=input.number_of_agents)
+        return solver.solve(input)
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=404, detail="File not found.") from e
+
+
+@router.post("/plan")
+def get_reference_plan(input: SolverInput):
+    """ Plan with the reference planner only, without clingo."""
+    try:
+        return solver.get_reference_plan(input)
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=404, detail="File not found.") from e
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422, detail=str(e)) from e
+
+
+@router.post("/batch")
+def solve_many(input: BatchInput):
+    """ Solve all jobs of the batch, returns one result row per job."""
+    return solve_batch(input)
 
-        environment.reset()
 
-        # Create ASP instance from environment
-        instance_file_name = f"{input.environment_name}.lp"
-        instance_lines = generate_instance_lines(environment, input.step_limit)
-        write_lines_to_file_in_output(
-            path=get_config().asp_instances_path, file_name=instance_file_name, lines=instance_lines)
+@router.post("/stream")
+def solve_streaming(input: SolverInput):
+    """ Solve and stream every improved model as server-sent event, see stream_solution."""
+    return StreamingResponse(stream_solution(input), media_type="text/event-stream")
 
-        # Solve instance with selected encoding
-        clingo_control = Control()
 
-        # Load instance from file
-        clingo_control.load(
-            f"{get_config().asp_instances_path}{instance_file_name}")
+@router.get("/cache")
+def get_cache_statistics():
+    """ Get hit/miss counters and memory usage of the environment, grounded program and solution caches."""
+    return {
+        "environments": get_environment_cache().statistics(),
+        "grounded_programs": get_grounded_program_cache().statistics(),
+        "map_programs": get_map_program_cache().statistics(),
+        "solutions": get_solution_cache().statistics(),
+    }
 
-        # Load encoding from file
-        clingo_control.load(
-            f"{get_config().asp_encodings_path}{input.encoding_name}.lp")
 
-        logger.info("Start grounding.")
+@router.delete("/cache")
+def clear_cache():
+    get_environment_cache().clear()
+    get_grounded_program_cache().clear()
+    get_map_program_cache().clear()
+    get_solution_cache().clear()
 
-        clingo_control.ground()
 
-        callback_handler = SolverCallbackHandler(logger=logger)
+def get_job(job_id: str) -> SolverJob:
+    try:
+        return get_solver_job_manager().get(job_id)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=404, detail="Job not found.") from e
 
-        logger.info("Start solving.")
 
-        clingo_control.solve(on_model=callback_handler.on_model)
+@router.post("/jobs", status_code=202)
+def submit_job(input: SolverInput):
+    """ Queue solver request, solving happens in a separate process."""
+    try:
+        return get_solver_job_manager().submit(input).summary()
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail="Job queue is full.") from e
 
-        logger.info(
-            f"Finished solving, best model has {len(callback_handler.get_last_model_strings())} symbols.")
 
-        solution = callback_handler.get_full_solution()
+@router.get("/jobs")
+def get_jobs():
+    return [job.summary() for job in get_solver_job_manager().get_all()]
 
-        write_json_file(path=get_config().solver_output_path,
-                        file_name=f"{input.environment_name}__{input.encoding_name}.json",
-                        json_data=solution)
 
-        write_json_file(path=get_config().solver_output_path,
-                        file_name=f"{input.environment_name}__{input.encoding_name}__stats.json",
-                        json_data=clingo_control.statistics)
+@router.get("/jobs/{job_id}")
+def get_job_status(job_id: str):
+    return get_job(job_id).summary()
 
-        return solution
-    except FileNotFoundError as e:
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """ Get solution of a finished job, for cancelled jobs the best solution found until then."""
+    job = get_job(job_id)
+
+    result = job.result()
+    if result is None:
         raise HTTPException(
-            status_code=404, detail="File not found.") from e
+            status_code=409, detail=f"Job has no result, status is {job.status.value}.")
+
+    return result
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = get_job(job_id)
+    job.cancel()
+    return job.summary()
+
+
+@router.on_event("shutdown")
+def shutdown_jobs():
+    get_solver_job_manager().shutdown()
@@ -0,0 +1,74 @@
+import argparse
+import json
+from typing import Optional
+
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.core.utils.file_utils import get_file_names_in_path
+from flatlandasp.features.solver.batch_solving import format_table, solve_batch
+from flatlandasp.features.solver.schemas.batch_input_schema import BatchInput
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+
+def get_environment_names() -> list[str]:
+    """ Get names of all environments in the environments path."""
+    return sorted({file_name.split(".")[0]
+                   for file_name in get_file_names_in_path(path=get_config().flatland_environments_path)})
+
+
+def create_batch(arguments: argparse.Namespace) -> BatchInput:
+    """ Create batch from a jobs file or the cross product of the given options."""
+    if arguments.jobs is not None:
+        with open(arguments.jobs, 'r') as f:
+            batch = BatchInput(**json.load(f))
+    else:
+        numbers_of_agents: list[Optional[int]] = arguments.agents or [None]
+        batch = BatchInput(jobs=[SolverInput(environment_name=environment_name,
+                                             encoding_name=encoding_name,
+                                             number_of_agents=number_of_agents,
+                                             step_limit=step_limit)
+                                 for environment_name in arguments.environments or get_environment_names()
+                                 for encoding_name in arguments.encodings
+                                 for number_of_agents in numbers_of_agents
+                                 for step_limit in arguments.step_limits])
+
+    if arguments.time_limit is not None:
+        batch.time_limit = arguments.time_limit
+    if arguments.workers is not None:
+        batch.workers = arguments.workers
+
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve many environments, encodings and numbers of agents in one batch.")
+    parser.add_argument("--jobs",
+                        help="JSON file with a batch input, replaces all job options")
+    parser.add_argument("--environments", nargs="+",
+                        help="Environment names, defaults to all in the environments path")
+    parser.add_argument("--encodings", nargs="+", default=["vertex"])
+    parser.add_argument("--agents", nargs="+", type=int,
+                        help="Numbers of agents, defaults to the agents stored in the pkl files")
+    parser.add_argument("--step-limits", nargs="+", type=int, default=[20])
+    parser.add_argument("--time-limit", type=float,
+                        help="Time limit of every job in seconds")
+    parser.add_argument("--workers", type=int,
+                        help="Number of worker processes")
+    parser.add_argument("--output",
+                        help="Write result rows to this JSON file")
+    arguments = parser.parse_args()
+
+    rows = solve_batch(create_batch(arguments))
+
+    logger.info("Batch results:\n" + "\n".join(format_table(rows)))
+
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as f:
+            f.write(json.dumps(rows, indent=4))
+
+
+if __name__ == "__main__":
+    main()
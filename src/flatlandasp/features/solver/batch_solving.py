@@ -0,0 +1,181 @@
+import re
+import resource
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.solver import solver
+from flatlandasp.features.solver.schemas.batch_input_schema import BatchInput
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.flatland_asp_config import get_config
+
+if TYPE_CHECKING:
+    from flatland.envs.rail_env import RailEnv
+
+logger = get_logger()
+
+BATCH_RESULT_COLUMNS = ["environment_name", "encoding_name", "number_of_agents", "step_limit",
+                        "status", "cost", "grounding_time", "solving_time", "peak_rss_mb"]
+""" Columns of every row of a batch result."""
+
+
+def get_status(solution: dict) -> str:
+    """ Get status of a job from its solution.
+
+        One of optimal, satisfiable, unsatisfiable or timeout,
+        timeout means that no model was found within the time limit.
+    """
+    if solution["cost"] is not None:
+        return "optimal" if solution["optimality_proven"] else "satisfiable"
+
+    # Race is None for incremental and two-phase solving
+    if solution.get("timed_out") or (solution.get("race") or {}).get("timed_out", False):
+        return "timeout"
+
+    return "unsatisfiable"
+
+
+def failed_row(input: SolverInput, error: Optional[str] = None) -> dict:
+    """ Get result row of a job which has not been solved (yet)."""
+    return {"environment_name": input.environment_name,
+            "encoding_name": input.encoding_name,
+            "number_of_agents": input.number_of_agents,
+            "step_limit": input.step_limit,
+            "status": "error",
+            "cost": None,
+            "grounding_time": None,
+            "solving_time": None,
+            "peak_rss_mb": None,
+            "error": error}
+
+
+def reset_peak_rss() -> bool:
+    """ Reset the peak resident set size of the process to its current size, see peak_rss_mb.
+
+        Returns:
+            Whether the peak could be reset, which requires Linux
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+
+    return True
+
+
+def peak_rss_mb() -> float:
+    """ Get peak resident set size of the process since the last reset_peak_rss.
+
+        Without support for resetting it, the peak of the whole process.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            match = re.search(r"^VmHWM:\s+(\d+) kB", f.read(), re.MULTILINE)
+        if match is not None:
+            return int(match.group(1)) / 1024
+    except OSError:
+        pass
+
+    # Linux reports kilobytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def solve_group(inputs: list[SolverInput]) -> list[dict]:
+    """ Solve jobs of the same map one after another in a worker process.
+
+        Environments are loaded once per number of agents and seed and
+        shared by all jobs using them, so these jobs also solve the exact
+        same schedules. The peak memory of a job is measured from the size
+        of the worker when the job starts, so it includes what the worker
+        keeps from earlier jobs, e.g. environments and cached programs,
+        but not their peaks.
+
+        Returns:
+            One result row per job, see BATCH_RESULT_COLUMNS
+    """
+    environments: dict[tuple[str, Optional[int], Optional[int]], RailEnv] = {}
+
+    rows = []
+    for input in inputs:
+        row = failed_row(input)
+        reset_peak_rss()
+
+        try:
+            key = (input.environment_name, input.number_of_agents, input.environment_seed)
+            if key not in environments:
+                environments[key] = solver.load_environment(input)
+
+            solution = solver.solve(input, environment=environments[key])
+
+            row.update(status=get_status(solution),
+                       cost=solution["cost"],
+                       grounding_time=solution["timings"]["grounding"],
+                       solving_time=solution["timings"]["solving"])
+        except FileNotFoundError as e:
+            row["error"] = f"File not found: {e.filename or e}"
+        except Exception as e:
+            logger.exception("Batch job failed.")
+            row["error"] = repr(e)
+
+        row["peak_rss_mb"] = peak_rss_mb()
+        rows.append(row)
+
+    return rows
+
+
+def solve_batch(input: BatchInput) -> list[dict]:
+    """ Solve all jobs of a batch across a pool of worker processes.
+
+        Jobs are grouped by map, each group is solved by a single worker,
+        so maps are only loaded once. The time limit of the batch applies
+        to every job without its own time limit.
+
+        Returns:
+            One result row per job in the order of the jobs, see BATCH_RESULT_COLUMNS
+    """
+    groups: dict[str, list[int]] = {}
+    for index, job in enumerate(input.jobs):
+        groups.setdefault(job.environment_name, []).append(index)
+
+    jobs = [job if job.time_limit is not None or input.time_limit is None
+            else job.copy(update={"time_limit": input.time_limit})
+            for job in input.jobs]
+
+    workers = max(1, min(input.workers or get_config().solver_pool_size, len(groups)))
+
+    logger.info(f"Solving batch of {len(jobs)} jobs on {len(groups)} maps with {workers} workers.")
+
+    rows: list[Optional[dict]] = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(solve_group, [jobs[index] for index in indices]): indices
+                   for indices in groups.values()}
+
+        for future, indices in futures.items():
+            try:
+                group_rows = future.result()
+            except Exception as e:
+                # Worker process died, e.g. killed for running out of memory
+                logger.exception("Batch worker failed.")
+                group_rows = [failed_row(jobs[index], repr(e)) for index in indices]
+
+            for index, row in zip(indices, group_rows):
+                rows[index] = row
+
+    return rows
+
+
+def format_table(rows: list[dict]) -> list[str]:
+    """ Format result rows of a batch as text table."""
+    cells = [[("" if row[column] is None
+               else f"{row[column]:.3f}" if isinstance(row[column], float)
+               else str(row[column]))
+              for column in BATCH_RESULT_COLUMNS]
+             for row in rows]
+
+    widths = [max([len(column), *(len(row[i]) for row in cells)])
+              for i, column in enumerate(BATCH_RESULT_COLUMNS)]
+
+    return [" | ".join(column.rjust(width) for column, width in zip(BATCH_RESULT_COLUMNS, widths)),
+            "-+-".join("-" * width for width in widths),
+            *[" | ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in cells]]
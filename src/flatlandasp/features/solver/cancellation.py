@@ -0,0 +1,77 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from clingo import Control, Model, SolveHandle, SolveResult
+
+
+class Cancellation:
+    """ Allows to cancel solving of a request from another thread.
+
+        All solve calls of a request run asynchronously and register their
+        solve handles, cancelling cancels all of them through SolveHandle.cancel
+        and prevents further solve calls from running.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._handles: list[SolveHandle] = []
+        """ Handles of solve calls that are currently running."""
+        self.cancelled = False
+        """ Whether the request has been cancelled."""
+        self.timed_out = False
+        """ Whether the request has been cancelled because its time limit was reached, see time_limit."""
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            handles = list(self._handles)
+
+        for handle in handles:
+            handle.cancel()
+
+    @contextmanager
+    def time_limit(self, seconds: Optional[float]) -> Iterator[None]:
+        """ Cancel the request unless the context is left within the given seconds, no limit if None."""
+        if seconds is None:
+            yield
+            return
+
+        def time_out() -> None:
+            with self._lock:
+                self.timed_out = not self.cancelled
+            self.cancel()
+
+        timer = threading.Timer(seconds, time_out)
+        timer.daemon = True
+        timer.start()
+
+        try:
+            yield
+        finally:
+            timer.cancel()
+
+    @contextmanager
+    def register(self, handle: SolveHandle) -> Iterator[SolveHandle]:
+        """ Register running solve handle for the duration of the context."""
+        with self._lock:
+            self._handles.append(handle)
+            cancelled = self.cancelled
+
+        if cancelled:
+            handle.cancel()
+
+        try:
+            yield handle
+        finally:
+            with self._lock:
+                self._handles.remove(handle)
+
+    def solve(self,
+              control: Control,
+              on_model: Callable[[Model], None],
+              on_finish: Optional[Callable[[SolveResult], None]] = None) -> SolveResult:
+        """ Solve control object, returns early if the request is cancelled."""
+        with (control.solve(on_model=on_model, on_finish=on_finish, async_=True) as handle,
+              self.register(handle)):
+            return handle.get()
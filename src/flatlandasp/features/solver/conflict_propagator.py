@@ -0,0 +1,120 @@
+""" Lazy conflict constraints of the vertex encoding.
+
+    vertex.lp forbids conflicts between agents by constraints over all
+    pairs of agents, which are grounded for every position and time step
+    where two agents could meet, although most of them never apply.
+    vertex_lazy.lp leaves them out and the ConflictPropagator adds them as
+    nogoods during solving, only for atoms which become true during search:
+
+    - An agent can not arrive at a position occupied by another agent,
+      arrival(ID,P,_,T) and occupied(ID',P,_,T)
+    - Two agents can not take the same or opposing paths at the same time,
+      blocked(ID,P,P',B) and blocked(ID',P,P',B) or blocked(ID',P',P,B)
+"""
+from collections import defaultdict
+
+from clingo import PropagateControl, PropagateInit
+
+AGENT_LITERALS_TYPE = list[tuple[int, int]]
+""" Agent and solver literal of atoms of the same position or path and time step."""
+
+
+class ConflictPropagator:
+    """ Adds nogoods for conflicts between agents as soon as one of the conflicting atoms is true.
+
+        Nogoods between an atom and all atoms it conflicts with are added at
+        once and locked, so the solver propagates them like the grounded
+        constraints from then on and the atom is no longer watched. Adding
+        them only when both atoms are true, or as learnt nogoods the solver
+        may delete, makes the solver find conflicts later and solve slower.
+
+        Register with Control.register_propagator before solving an encoding
+        without conflict constraints such as vertex_lazy.lp. The conflicts
+        are only read during solving, so the propagator can be used by
+        several solver threads, only the nogoods are counted per thread.
+    """
+
+    def __init__(self) -> None:
+        self._conflicts: dict[int, list[tuple[int, AGENT_LITERALS_TYPE]]] = {}
+        """ Per watched solver literal, the agent of its atom and the atoms of all agents it conflicts with."""
+
+        self._thread_nogoods: list[int] = [0]
+        """ Number of nogoods added for conflicts per solver thread."""
+
+    @property
+    def nogoods(self) -> int:
+        """ Number of nogoods added for conflicts by all solver threads."""
+        return sum(self._thread_nogoods)
+
+    def init(self, init: PropagateInit) -> None:
+        self._thread_nogoods = [0] * init.number_of_threads
+
+        arrivals: dict[tuple, AGENT_LITERALS_TYPE] = defaultdict(list)
+        occupants: dict[tuple, AGENT_LITERALS_TYPE] = defaultdict(list)
+        paths: dict[tuple, AGENT_LITERALS_TYPE] = defaultdict(list)
+
+        def add(atoms: dict[tuple, AGENT_LITERALS_TYPE], key: tuple, agent: int, literal: int) -> None:
+            # Atoms which are false anyway never cause a conflict
+            if not init.assignment.is_false(literal):
+                atoms[key].append((agent, literal))
+
+        for atom in init.symbolic_atoms.by_signature("arrival", 4):
+            agent, position, _, time_step = atom.symbol.arguments
+            add(arrivals, (position, time_step), agent.number, init.solver_literal(atom.literal))
+
+        for atom in init.symbolic_atoms.by_signature("occupied", 4):
+            agent, position, _, time_step = atom.symbol.arguments
+            add(occupants, (position, time_step), agent.number, init.solver_literal(atom.literal))
+
+        for atom in init.symbolic_atoms.by_signature("blocked", 4):
+            agent, position, next_position, time_step = atom.symbol.arguments
+            # Same and opposing paths conflict alike, so both directions share one key
+            path = (min(position, next_position), max(position, next_position))
+            add(paths, (path, time_step), agent.number, init.solver_literal(atom.literal))
+
+        conflicts: dict[int, list[tuple[int, AGENT_LITERALS_TYPE]]] = defaultdict(list)
+
+        def watch(atoms: dict[tuple, AGENT_LITERALS_TYPE], conflicting_atoms: dict[tuple, AGENT_LITERALS_TYPE]) -> None:
+            for key, agent_literals in atoms.items():
+                others = conflicting_atoms.get(key, [])
+                for agent, literal in agent_literals:
+                    if any(other_agent != agent for other_agent, _ in others):
+                        conflicts[literal].append((agent, others))
+
+        watch(arrivals, occupants)
+        watch(occupants, arrivals)
+        watch(paths, paths)
+
+        self._conflicts = dict(conflicts)
+
+        for literal, agent_conflicts in self._conflicts.items():
+            init.add_watch(literal)
+
+            # Literals true before solving are never propagated, e.g. arrivals at the start
+            if init.assignment.is_true(literal):
+                for other in self._get_true_conflicts(init.assignment, agent_conflicts):
+                    self._thread_nogoods[0] += 1
+                    if not init.add_nogood([literal, other]):
+                        return
+
+    def propagate(self, control: PropagateControl, changes: list[int]) -> None:
+        for literal in changes:
+            for other in self._get_conflicting_literals(self._conflicts[literal]):
+                self._thread_nogoods[control.thread_id] += 1
+                if not control.add_nogood([literal, other], lock=True) or not control.propagate():
+                    return
+
+            # Locked nogoods are never deleted, the literal does not have to be watched anymore
+            control.remove_watch(literal)
+
+    @staticmethod
+    def _get_conflicting_literals(agent_conflicts: list[tuple[int, AGENT_LITERALS_TYPE]]) -> list[int]:
+        return [other for agent, others in agent_conflicts
+                for other_agent, other in others
+                if other_agent != agent]
+
+    @staticmethod
+    def _get_true_conflicts(assignment, agent_conflicts: list[tuple[int, AGENT_LITERALS_TYPE]]) -> list[int]:
+        return [other for agent, others in agent_conflicts
+                for other_agent, other in others
+                if other_agent != agent and assignment.is_true(other)]
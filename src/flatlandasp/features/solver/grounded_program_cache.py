@@ -0,0 +1,165 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+from clingo import Control
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+ESTIMATED_BYTES_PER_ATOM = 1024
+""" Rough memory footprint of a grounded program per symbolic atom.
+
+    Measured on the vertex encoding, where a grounded control object
+    takes up a bit less than 1KiB per symbolic atom before solving.
+"""
+
+
+def environment_content_hash(env: RailEnv, *, with_agents: bool = True) -> str:
+    """ Hash everything of an environment that ends up in an ASP instance.
+
+        This is the grid as well as the schedule of every agent.
+
+        Args:
+            env: Environment to hash
+            with_agents: Whether schedules are part of the hash or only the grid
+    """
+    content = hashlib.sha256()
+    content.update(np.ascontiguousarray(env.rail.grid, dtype=np.uint16).tobytes())
+
+    for agent in env.agents if with_agents else []:
+        content.update(repr((agent.handle,
+                             tuple(agent.initial_position),
+                             tuple(agent.target),
+                             int(agent.direction),
+                             agent.earliest_departure)).encode())
+
+    return content.hexdigest()
+
+
+def file_content_hash(file_path: str) -> str:
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class GroundedProgram:
+    """ Grounded clingo control object which can be solved repeatedly."""
+
+    def __init__(self, *, control: Control) -> None:
+        self.control = control
+        """ Control object holding the ground program."""
+        self.estimated_size = 0
+        """ Estimated memory usage of the ground program in bytes."""
+        self.lock = threading.Lock()
+        """ Lock which has to be held while using the control object, it is not thread-safe."""
+        self.warm_started = False
+        """ Whether the heuristics of a reference plan were added to the program, see apply_warm_start."""
+
+        self.update_estimated_size()
+
+    def update_estimated_size(self) -> None:
+        """ Update estimated memory usage, has to be called after grounding more parts."""
+        self.estimated_size = len(self.control.symbolic_atoms) * ESTIMATED_BYTES_PER_ATOM
+
+
+class GroundedProgramCache:
+    """ LRU cache of grounded programs with a memory budget.
+
+        Programs are keyed by environment content, encoding, step limit
+        and the arguments of the control object.
+        Least recently used programs are evicted as soon as either the
+        maximum number of entries or the memory budget is exceeded.
+    """
+
+    def __init__(self, *, max_entries: int, memory_budget: int) -> None:
+        self._max_entries = max_entries
+        self._memory_budget = memory_budget
+        """ Memory budget in bytes."""
+
+        self._programs: OrderedDict[tuple, GroundedProgram] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(*, environment: RailEnv,
+            encoding_file: str,
+            step_limit: int,
+            arguments: tuple[str, ...] = ()) -> tuple:
+        return (environment_content_hash(environment),
+                file_content_hash(encoding_file),
+                step_limit,
+                arguments)
+
+    def get_or_ground(self, key: tuple, ground: Callable[[], GroundedProgram]) -> GroundedProgram:
+        """ Get cached program or ground and cache a new one.
+
+            Args:
+                key: Cache key, see GroundedProgramCache.key
+                ground: Function returning a grounded program on a cache miss
+        """
+        with self._lock:
+            program = self._programs.get(key)
+            if program is not None:
+                self._programs.move_to_end(key)
+                self.hits += 1
+                return program
+            self.misses += 1
+
+        # Ground outside of the lock, other requests should not wait for it
+        program = ground()
+
+        self.put(key, program)
+
+        return program
+
+    def put(self, key: tuple, program: GroundedProgram) -> None:
+        """ Add or replace a grounded program."""
+        if program.estimated_size > self._memory_budget:
+            logger.info("Grounded program exceeds the cache memory budget, not caching it.")
+            return
+
+        with self._lock:
+            self._programs[key] = program
+            self._programs.move_to_end(key)
+            self._evict()
+
+    def _evict(self) -> None:
+        while (len(self._programs) > self._max_entries
+               or self.memory_usage() > self._memory_budget):
+            self._programs.popitem(last=False)
+            self.evictions += 1
+
+    def memory_usage(self) -> int:
+        return sum(program.estimated_size for program in self._programs.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._programs.clear()
+
+    def statistics(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._programs),
+                "max_entries": self._max_entries,
+                "estimated_memory_usage": self.memory_usage(),
+                "memory_budget": self._memory_budget,
+            }
+
+
+@lru_cache
+def get_grounded_program_cache() -> GroundedProgramCache:
+    return GroundedProgramCache(
+        max_entries=get_config().grounded_program_cache_size,
+        memory_budget=get_config().grounded_program_cache_memory_mb * 1024 * 1024)
@@ -0,0 +1,93 @@
+import os
+import time
+from typing import Callable, Optional
+
+from clingo import Control, Function, Model, Number, SolveResult
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.asp.instance_generation import generate_instance_lines
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.solver.cancellation import Cancellation
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+
+def get_encoding_file(input: SolverInput) -> str:
+    """ Get incremental variant of the encoding.
+
+        Raises:
+            FileNotFoundError: Encoding has no incremental variant
+    """
+    encoding_file = f"{get_config().asp_encodings_path}{input.encoding_name}_incremental.lp"
+
+    if not os.path.isfile(encoding_file):
+        raise FileNotFoundError(encoding_file)
+
+    return encoding_file
+
+
+def solve_incremental(environment: RailEnv,
+                      input: SolverInput,
+                      on_model: Callable[[Model], None],
+                      on_finish: Optional[Callable[[SolveResult], None]] = None,
+                      cancellation: Optional[Cancellation] = None) -> tuple[dict, dict]:
+    """ Solve with a horizon that grows until a plan is found.
+
+        Follows the multi-shot pattern of clingo, the encoding consists of a
+        base part and a step(t) part with an external query(t), which only
+        holds for the current horizon. Each increment grounds one more step
+        on top of all previous ones. The step limit of the input caps the horizon.
+
+        Returns: Tuple consisting of
+            horizon: Horizon reached and time spent per increment
+            statistics: Statistics of the control object
+    """
+    # Later steps are not grounded yet, atoms defined
+    # only there must not be reported as undefined
+    clingo_control = Control(["--warn=no-atom-undefined"])
+    cancellation = cancellation or Cancellation()
+
+    clingo_control.add("base", [], "\n".join(
+        generate_instance_lines(environment, input.step_limit)))
+    clingo_control.load(get_encoding_file(input))
+
+    logger.info("Start grounding base.")
+
+    clingo_control.ground([("base", [])])
+
+    increments = []
+    satisfiable = False
+    step = 0
+    for step in range(input.step_limit + 1):
+        start = time.perf_counter()
+
+        clingo_control.ground([("step", [Number(step)])])
+
+        if step > 0:
+            clingo_control.release_external(Function("query", [Number(step - 1)]))
+        clingo_control.assign_external(Function("query", [Number(step)]), True)
+
+        grounding_time = time.perf_counter() - start
+
+        result = cancellation.solve(clingo_control, on_model, on_finish)
+
+        increments.append({"horizon": step,
+                           "grounding_time": grounding_time,
+                           "solving_time": time.perf_counter() - start - grounding_time})
+
+        logger.info(f"Horizon {step}: {result}.")
+
+        if result.satisfiable:
+            satisfiable = True
+            break
+
+        if cancellation.cancelled:
+            break
+
+    horizon = {"horizon": step,
+               "satisfiable": satisfiable,
+               "increments": increments}
+
+    return horizon, clingo_control.statistics
@@ -0,0 +1,106 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Optional
+
+PHASES = ["environment_loading", "environment_reset", "solution_lookup", "planning", "instance_generation",
+          "instance_writing", "encoding_loading", "grounding", "solving", "model_decoding", "output_writing"]
+""" Phases of a solve request in the order they run.
+
+    Phases skipped by a request take no time, e.g. instance generation
+    and grounding if the grounded program is cached.
+"""
+
+
+class PhaseTimer:
+    """ Measures the wall-clock time of each phase of a solve request."""
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        """ Seconds spent in each phase, phases running multiple times are summed up."""
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+class SolverMetrics:
+    """ Aggregates timings of solve requests of this process in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._phase_seconds: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self._phase_requests: dict[str, int] = dict.fromkeys(PHASES, 0)
+        """ Number of requests which ran each phase."""
+
+    def observe(self, timings: dict[str, float]) -> None:
+        """ Add timings of a finished request, see PhaseTimer.
+
+            Skipped phases take no time, so only phases with time count
+            the request.
+        """
+        with self._lock:
+            self._requests += 1
+            for phase, seconds in timings.items():
+                if seconds <= 0:
+                    continue
+
+                self._phase_seconds[phase] = self._phase_seconds.get(phase, 0.0) + seconds
+                self._phase_requests[phase] = self._phase_requests.get(phase, 0) + 1
+
+    def render(self) -> str:
+        with self._lock:
+            lines = ["# HELP flasp_solve_requests_total Number of finished solve requests.",
+                     "# TYPE flasp_solve_requests_total counter",
+                     f"flasp_solve_requests_total {self._requests}",
+                     "# HELP flasp_solve_phase_seconds Time spent in each phase of solve requests.",
+                     "# TYPE flasp_solve_phase_seconds summary"]
+
+            for phase, seconds in self._phase_seconds.items():
+                lines += [f'flasp_solve_phase_seconds_sum{{phase="{phase}"}} {seconds}',
+                          f'flasp_solve_phase_seconds_count{{phase="{phase}"}} {self._phase_requests[phase]}']
+
+        return "\n".join(lines) + "\n"
+
+
+@lru_cache
+def get_solver_metrics() -> SolverMetrics:
+    return SolverMetrics()
+
+
+@contextmanager
+def profile_request(enabled: bool) -> Iterator[Optional[cProfile.Profile]]:
+    """ Profile the Python side of a request with cProfile if enabled.
+
+        Only the thread entering the context is profiled, time spent
+        in clingo shows up as the calls into clingo.
+    """
+    if not enabled:
+        yield None
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+
+def get_profile_summary(profiler: cProfile.Profile, limit: int = 30) -> list[str]:
+    """ Get the functions with the highest cumulative time as lines of text."""
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return [line for line in stream.getvalue().splitlines() if line.strip()]
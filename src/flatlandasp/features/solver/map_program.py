@@ -0,0 +1,186 @@
+import os
+import time
+from functools import lru_cache
+from typing import Callable, Optional
+
+from clingo import Control, Function, Model, Number, SolveResult
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.asp.instance_generation import (
+    generate_map_lines,
+    generate_schedule_lines,
+)
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.solver.cancellation import Cancellation
+from flatlandasp.features.solver.grounded_program_cache import (
+    GroundedProgram,
+    GroundedProgramCache,
+    environment_content_hash,
+    file_content_hash,
+)
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+
+class MapProgram(GroundedProgram):
+    """ Control object with the grounded map graph of an environment.
+
+        The map part of a two-phase encoding is grounded once,
+        the schedule part is added and grounded for every request.
+        Each request gets its own identifier and external active(R),
+        which is released after solving so that rules of previous
+        requests are switched off permanently.
+    """
+
+    def __init__(self, *, control: Control, stations: frozenset[tuple[int, int]]) -> None:
+        super().__init__(control=control)
+        self.stations = stations
+        """ Positions which are nodes of the grounded map graph, see vertex_map.lp.
+
+            Nodes only split the map graph into segments, the vertices of a
+            request are the same as in the single-phase encoding.
+        """
+        self.requests = 0
+        """ Number of requests grounded on top of the map so far."""
+
+    def solve_schedules(self,
+                        environment: RailEnv,
+                        step_limit: int,
+                        on_model: Callable[[Model], None],
+                        on_finish: Optional[Callable[[SolveResult], None]] = None,
+                        cancellation: Optional[Cancellation] = None) -> tuple[dict, dict]:
+        """ Ground schedules of the environment on top of the map and solve.
+
+            Returns: Tuple consisting of
+                statistics: Statistics of the control object
+                timings: Time spent grounding the schedules and solving
+        """
+        with self.lock:
+            start = time.perf_counter()
+            self.requests += 1
+            request = Number(self.requests)
+            schedule_program = f"schedules_{self.requests}"
+
+            self.control.add(schedule_program, [], "\n".join(
+                generate_schedule_lines(environment, step_limit, self.requests)))
+
+            logger.info(f"Start grounding schedules of request {self.requests}.")
+
+            self.control.ground([(schedule_program, []), ("schedules", [request])])
+            self.control.assign_external(Function("active", [request]), True)
+
+            grounding_time = time.perf_counter() - start
+
+            logger.info("Start solving.")
+
+            try:
+                (cancellation or Cancellation()).solve(self.control, on_model, on_finish)
+            finally:
+                self.control.release_external(Function("active", [request]))
+
+            solving_time = time.perf_counter() - start - grounding_time
+
+            self.update_estimated_size()
+
+            return self.control.statistics, {"grounding": grounding_time,
+                                             "solving": solving_time}
+
+
+def get_encoding_files(input: SolverInput) -> tuple[str, str]:
+    """ Get map and schedule part of the two-phase variant of the encoding.
+
+        Raises:
+            FileNotFoundError: Encoding has no two-phase variant
+    """
+    encoding_files = (f"{get_config().asp_encodings_path}{input.encoding_name}_map.lp",
+                      f"{get_config().asp_encodings_path}{input.encoding_name}_schedules.lp")
+
+    for encoding_file in encoding_files:
+        if not os.path.isfile(encoding_file):
+            raise FileNotFoundError(encoding_file)
+
+    return encoding_files
+
+
+def get_station_positions(input: SolverInput) -> set[tuple[int, int]]:
+    """ Get positions of all train stations stored with the environment data.
+
+        Environments only loaded from pkl files may come without data,
+        in which case there are no known stations.
+    """
+    try:
+        environment_data = environment_crud.read_data_from_file(name=input.environment_name)
+    except FileNotFoundError:
+        return set()
+
+    train_stations = environment_data.optionals.get(
+        'agents_hints', {}).get('train_stations', [])
+
+    return {tuple(position) for stations in train_stations for position, _ in stations}
+
+
+def get_schedule_positions(environment: RailEnv) -> set[tuple[int, int]]:
+    return ({tuple(agent.initial_position) for agent in environment.agents}
+            | {tuple(agent.target) for agent in environment.agents})
+
+
+def ground_map_program(environment: RailEnv,
+                       input: SolverInput,
+                       stations: set[tuple[int, int]]) -> MapProgram:
+    # Schedule parts are grounded later, atoms defined
+    # only there must not be reported as undefined
+    clingo_control = Control(["--warn=no-atom-undefined"])
+
+    clingo_control.add("base", [], "\n".join(
+        generate_map_lines(environment.rail.grid, stations)))
+
+    for encoding_file in get_encoding_files(input):
+        clingo_control.load(encoding_file)
+
+    logger.info("Start grounding map.")
+
+    clingo_control.ground([("base", [])])
+
+    return MapProgram(control=clingo_control, stations=frozenset(stations))
+
+
+def get_map_program(environment: RailEnv, input: SolverInput) -> MapProgram:
+    """ Get program with grounded map of the environment.
+
+        The map is grounded again (and replaces the cached one) if
+        starts or targets of the agents are no nodes of the cached
+        map graph or too many requests have been grounded on top of it.
+    """
+    map_encoding_file, schedules_encoding_file = get_encoding_files(input)
+
+    # Schedules are not part of the key, the grid is the map
+    environment_hash = environment_content_hash(environment, with_agents=False)
+    key = (environment_hash,
+           file_content_hash(map_encoding_file),
+           file_content_hash(schedules_encoding_file))
+
+    schedule_positions = get_schedule_positions(environment)
+
+    program: MapProgram = get_map_program_cache().get_or_ground(
+        key, lambda: ground_map_program(environment, input,
+                                        get_station_positions(input) | schedule_positions))
+
+    if (not schedule_positions <= program.stations
+            or program.requests >= get_config().map_program_max_requests):
+        logger.info("Grounded map can not be reused, grounding it again.")
+
+        program = ground_map_program(environment, input,
+                                     program.stations | schedule_positions)
+        get_map_program_cache().put(key, program)
+
+    return program
+
+
+@lru_cache
+def get_map_program_cache() -> GroundedProgramCache:
+    return GroundedProgramCache(
+        max_entries=get_config().grounded_program_cache_size,
+        memory_budget=get_config().grounded_program_cache_memory_mb * 1024 * 1024)
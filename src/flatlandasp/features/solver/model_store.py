@@ -0,0 +1,98 @@
+from collections import deque
+from enum import Enum
+from typing import Optional, Sequence
+
+from clingo import Symbol
+
+
+class ModelRetention(Enum):
+    """ Which models of a solve call are kept."""
+    BEST = "best"
+    """ Only the last (and thereby best) model."""
+    LAST = "last"
+    """ The last N models."""
+    ALL = "all"
+    """ Every model, memory grows with the number of models."""
+
+
+class ModelStore:
+    """ Models of a solve call stored as tuples of interned symbol ids.
+
+        Every distinct symbol is stored once, a model is just a tuple
+        of indices into the symbol table. Models are only turned into
+        strings when they are requested. Symbols are removed from the
+        table as soon as no retained model contains them anymore, so
+        memory is bounded by the retained models.
+    """
+
+    def __init__(self, *, retention: ModelRetention, size: int = 1) -> None:
+        if size < 1:
+            raise ValueError(f"At least one model has to be retained, got {size}.")
+
+        self._symbol_ids: dict[Symbol, int] = {}
+        self._symbols: list[Optional[Symbol]] = []
+        """ Symbol table, position in the list is the id of the symbol, None if the id is free."""
+        self._references: list[int] = []
+        """ Number of retained models containing the symbol, per symbol id."""
+        self._free_ids: list[int] = []
+        """ Ids of symbols which have been removed, reused for new symbols."""
+
+        if retention == ModelRetention.ALL:
+            self._models: deque[tuple[int, ...]] = deque()
+        else:
+            self._models = deque(maxlen=size if retention == ModelRetention.LAST else 1)
+
+        self.number_of_models = 0
+        """ Number of models added, including models that are not retained."""
+
+    def _intern(self, symbol: Symbol) -> int:
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            if self._free_ids:
+                symbol_id = self._free_ids.pop()
+                self._symbols[symbol_id] = symbol
+            else:
+                symbol_id = len(self._symbols)
+                self._symbols.append(symbol)
+                self._references.append(0)
+            self._symbol_ids[symbol] = symbol_id
+
+        self._references[symbol_id] += 1
+        return symbol_id
+
+    def _release(self, model: tuple[int, ...]) -> None:
+        for symbol_id in model:
+            self._references[symbol_id] -= 1
+            if self._references[symbol_id] == 0:
+                del self._symbol_ids[self._symbols[symbol_id]]
+                self._symbols[symbol_id] = None
+                self._free_ids.append(symbol_id)
+
+    def add(self, symbols: Sequence[Symbol]) -> None:
+        evicted = (self._models[0]
+                   if self._models.maxlen is not None and len(self._models) == self._models.maxlen
+                   else None)
+
+        self._models.append(tuple(self._intern(symbol) for symbol in symbols))
+        self.number_of_models += 1
+
+        # Released after interning the new model, symbols of both are not removed and added again
+        if evicted is not None:
+            self._release(evicted)
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def _decode(self, model: tuple[int, ...]) -> list[str]:
+        return [str(self._symbols[symbol_id]) for symbol_id in model]
+
+    def last(self) -> list[str]:
+        """ Get last model as list of symbol strings, empty if there is none."""
+        if len(self._models) == 0:
+            return []
+
+        return self._decode(self._models[-1])
+
+    def decode(self) -> list[list[str]]:
+        """ Get all retained models as lists of symbol strings, oldest first."""
+        return [self._decode(model) for model in self._models]
@@ -0,0 +1,282 @@
+""" Validation of plans without stepping through Flatland.
+
+    A plan are the actions of each agent ordered by time step, as returned
+    by SolverCallbackHandler.get_full_solution. Like in Flatland an agent
+    enters at its start at its earliest departure, but not before time step 1,
+    and takes its first action at that time step. It leaves the environment
+    with the move onto its target, no other agent may be in the target at
+    that time step. Actions move an agent like Flatland's step does:
+
+    - Forward follows the only transition or goes straight at switches
+    - Left and right turn at switches, where the turn is not possible they move forward
+    - Halt keeps the agent in its cell
+    - No-op moves forward if the previous action moved the agent and halts otherwise
+    - Forward where it is not possible and any other action are invalid transitions
+
+    All agents of all plans are moved at once, one NumPy operation per time
+    step, into an array of the cell each agent occupies at each time step.
+    Conflicts are then found in bulk by sorting the occupied cells and moves.
+"""
+from typing import Sequence
+
+import numpy as np
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.asp.instance_generation import DELTAS, ORIENTATION_SHIFTS
+from flatlandasp.core.flatland.schemas.action import Action
+from flatlandasp.core.flatland.schemas.orientation import Orientation
+
+NO_CELL = -1
+""" Cell of agents which are not in the environment at a time step."""
+
+NO_ACTION = -1
+""" Padding of the actions of agents with fewer actions than others."""
+
+SCHEDULE_COLUMNS = ["start_row", "start_column", "direction", "target_row", "target_column", "earliest_departure"]
+""" Columns of the schedule array, see get_schedules."""
+
+DIRECTION_DELTAS = np.array([DELTAS[Orientation(direction)] for direction in range(4)])
+""" Row and column delta of a move in each direction."""
+
+NIBBLE_COUNTS = np.array([bin(nibble).count("1") for nibble in range(16)])
+""" Number of possible directions of each 4bit transition value."""
+
+NIBBLE_DIRECTIONS = np.array([[(nibble >> (3 - direction)) & 1 for direction in range(4)]
+                             for nibble in range(16)], dtype=bool)
+""" Whether each direction is possible for each 4bit transition value."""
+
+NIBBLE_FIRST_DIRECTIONS = np.argmax(NIBBLE_DIRECTIONS, axis=1)
+""" First possible direction of each 4bit transition value, the only one if there is only one."""
+
+
+def get_schedules(environment: RailEnv) -> np.ndarray:
+    """ Get schedule of every agent as row of an integer array, see SCHEDULE_COLUMNS."""
+    return np.array([[*agent.initial_position, int(agent.direction), *agent.target, agent.earliest_departure]
+                     for agent in environment.agents], dtype=np.int64).reshape(-1, len(SCHEDULE_COLUMNS))
+
+
+def get_actions_array(plans: Sequence[dict[int, list[int]]], number_of_agents: int) -> np.ndarray:
+    """ Get actions of all agents of all plans as array padded with NO_ACTION.
+
+        Returns:
+            Array of shape (plans * agents, time steps), agents of
+            the first plan first, agents missing in a plan have no actions
+    """
+    length = max((len(actions) for plan in plans for actions in plan.values()), default=0)
+    actions = np.full((len(plans) * number_of_agents, length), NO_ACTION, dtype=np.int8)
+
+    for index, plan in enumerate(plans):
+        for agent, agent_actions in plan.items():
+            actions[index * number_of_agents + int(agent), :len(agent_actions)] = agent_actions
+
+    return actions
+
+
+def validate_plans(grid: np.ndarray,
+                   schedules: np.ndarray,
+                   plans: Sequence[dict[int, list[int]]]) -> list[dict]:
+    """ Validate many plans of the same environment at once.
+
+        Args:
+            grid: Environment grid of 16bit transition values
+            schedules: Schedules of the agents, see get_schedules
+            plans: Actions of each agent ordered by time step, starting at its earliest departure
+
+        Returns:
+            Per plan whether it is valid and its vertex conflicts (two agents in
+            the same cell), swap conflicts (two agents exchanging their cells),
+            invalid transitions (actions not possible in the cell of the agent,
+            the agent halts instead) and missed targets (agents not reaching
+            their target with their actions, they leave the environment
+            after their last action)
+    """
+    grid = np.asarray(grid, dtype=np.uint16)
+    width = grid.shape[1]
+    nibbles = (grid[..., np.newaxis] >> ORIENTATION_SHIFTS) & 0xF
+
+    number_of_agents = len(schedules)
+    actions = get_actions_array(plans, number_of_agents)
+    schedules = np.tile(np.asarray(schedules, dtype=np.int64).reshape(-1, len(SCHEDULE_COLUMNS)), (len(plans), 1))
+    plan_indices = np.repeat(np.arange(len(plans)), number_of_agents)
+    agent_indices = np.tile(np.arange(number_of_agents), len(plans))
+
+    starts, directions, targets = schedules[:, 0:2], schedules[:, 2], schedules[:, 3:5]
+    # Flatland needs a step to make waiting agents ready to depart,
+    # so agents departing at time step 0 enter together with those at 1
+    departures = np.maximum(schedules[:, 5], 1)
+    action_counts = (actions != NO_ACTION).sum(axis=1)
+
+    horizon = int((departures + action_counts).max(initial=0)) + 1
+
+    positions = starts.copy()
+    present = np.zeros(len(schedules), dtype=bool)
+    in_motion = np.zeros(len(schedules), dtype=bool)
+    """ Agents which moved in their last action, no-op actions continue moving."""
+    done = np.zeros(len(schedules), dtype=bool)
+    finished = np.zeros(len(schedules), dtype=bool)
+    """ Agents which left the environment, either done or without further actions."""
+
+    cells = np.full((horizon, len(schedules)), NO_CELL, dtype=np.int64)
+    moves = []
+    invalid_transitions = []
+
+    for time_step in range(horizon):
+        spawned = (departures == time_step) & ~finished
+        present |= spawned
+        in_motion |= spawned
+
+        arrived = present & np.all(positions == targets, axis=1)
+        done |= arrived
+
+        cells[time_step, present] = positions[present, 0] * width + positions[present, 1]
+
+        # Agents leave the environment as soon as they are done
+        # or after their last action
+        steps = time_step - departures
+        has_action = present & ~arrived & (steps < action_counts)
+        finished |= present & ~has_action
+        present &= has_action
+
+        if not present.any():
+            continue
+
+        agents = np.nonzero(present)[0]
+        agent_actions = actions[agents, steps[agents]]
+        agent_directions = directions[agents]
+        nibble = nibbles[positions[agents, 0], positions[agents, 1], agent_directions]
+        counts = NIBBLE_COUNTS[nibble]
+
+        agent_actions = np.where(agent_actions == Action.NO_OP.value,
+                                 np.where(in_motion[agents], Action.FORWARD.value, Action.HALT.value),
+                                 agent_actions)
+        left = agent_actions == Action.TURN_LEFT.value
+        right = agent_actions == Action.TURN_RIGHT.value
+        halt = agent_actions == Action.HALT.value
+
+        turned_directions = (agent_directions - left + right) % 4
+        turned = (left | right) & (counts > 1) & NIBBLE_DIRECTIONS[nibble, turned_directions]
+        # Like in Flatland, turns which are not possible move forward instead
+        forward = (agent_actions == Action.FORWARD.value) | ((left | right) & ~turned)
+
+        new_directions = np.where(turned, turned_directions,
+                                  np.where(counts == 1, NIBBLE_FIRST_DIRECTIONS[nibble], agent_directions))
+        valid = halt | turned | (forward & NIBBLE_DIRECTIONS[nibble, new_directions])
+        in_motion[agents] = valid & ~halt
+
+        for agent in agents[~valid]:
+            invalid_transitions.append((plan_indices[agent], {
+                "agent": int(agent_indices[agent]),
+                "time": time_step,
+                "position": tuple(int(value) for value in positions[agent]),
+                "direction": int(directions[agent]),
+                "action": int(actions[agent, steps[agent]]),
+            }))
+
+        moving = agents[valid & ~halt]
+        new_directions = new_directions[valid & ~halt]
+        new_positions = positions[moving] + DIRECTION_DELTAS[new_directions]
+
+        moves.append(np.column_stack([np.full(len(moving), time_step), moving,
+                                      positions[moving, 0] * width + positions[moving, 1],
+                                      new_positions[:, 0] * width + new_positions[:, 1]]))
+
+        positions[moving] = new_positions
+        directions[moving] = new_directions
+
+    results = [{"valid": True,
+                "vertex_conflicts": [],
+                "swap_conflicts": [],
+                "invalid_transitions": [],
+                "missed_targets": []} for _ in plans]
+
+    for plan, invalid_transition in invalid_transitions:
+        results[plan]["invalid_transitions"].append(invalid_transition)
+
+    for agent in np.nonzero(~done)[0]:
+        results[plan_indices[agent]]["missed_targets"].append(int(agent_indices[agent]))
+
+    for plan, conflict in get_vertex_conflicts(cells, plan_indices, agent_indices, width):
+        results[plan]["vertex_conflicts"].append(conflict)
+
+    if moves:
+        for plan, conflict in get_swap_conflicts(np.concatenate(moves), plan_indices, agent_indices, width):
+            results[plan]["swap_conflicts"].append(conflict)
+
+    for result in results:
+        result["valid"] = not any(result[key] for key in ["vertex_conflicts", "swap_conflicts",
+                                                          "invalid_transitions", "missed_targets"])
+
+    return results
+
+
+def get_vertex_conflicts(cells: np.ndarray,
+                         plan_indices: np.ndarray,
+                         agent_indices: np.ndarray,
+                         width: int) -> list[tuple[int, dict]]:
+    """ Find agents of the same plan occupying the same cell at the same time step."""
+    time_steps, agents = np.nonzero(cells != NO_CELL)
+    occupied = cells[time_steps, agents]
+
+    order = np.lexsort((agents, occupied, time_steps, plan_indices[agents]))
+    keys = np.column_stack([plan_indices[agents], time_steps, occupied])[order]
+
+    conflicts = []
+    for group in get_duplicate_groups(keys):
+        conflicting_agents = agents[order[group]]
+        cell = int(occupied[order[group[0]]])
+        conflicts.append((int(plan_indices[conflicting_agents[0]]), {
+            "time": int(time_steps[order[group[0]]]),
+            "position": (cell // width, cell % width),
+            "agents": [int(agent_indices[agent]) for agent in conflicting_agents],
+        }))
+
+    return conflicts
+
+
+def get_swap_conflicts(moves: np.ndarray,
+                       plan_indices: np.ndarray,
+                       agent_indices: np.ndarray,
+                       width: int) -> list[tuple[int, dict]]:
+    """ Find agents of the same plan moving between the same two cells in opposite directions.
+
+        Args:
+            moves: Rows of time step, agent, cell before and cell after the move
+    """
+    time_steps, agents, sources, destinations = moves.T
+    first, second = np.minimum(sources, destinations), np.maximum(sources, destinations)
+
+    order = np.lexsort((agents, second, first, time_steps, plan_indices[agents]))
+    keys = np.column_stack([plan_indices[agents], time_steps, first, second])[order]
+
+    conflicts = []
+    for group in get_duplicate_groups(keys):
+        # Moving in the same direction is a vertex conflict already
+        if len(set(sources[order[group]].tolist())) < 2:
+            continue
+        conflicting_agents = agents[order[group]]
+        conflicts.append((int(plan_indices[conflicting_agents[0]]), {
+            "time": int(time_steps[order[group[0]]]),
+            "positions": [(int(cell) // width, int(cell) % width)
+                          for cell in (first[order[group[0]]], second[order[group[0]]])],
+            "agents": [int(agent_indices[agent]) for agent in conflicting_agents],
+        }))
+
+    return conflicts
+
+
+def get_duplicate_groups(keys: np.ndarray) -> list[np.ndarray]:
+    """ Get index groups of equal consecutive rows of sorted keys with more than one row."""
+    if len(keys) < 2:
+        return []
+
+    starts = np.concatenate([[True], np.any(keys[1:] != keys[:-1], axis=1)])
+    group_ids = np.cumsum(starts) - 1
+    group_sizes = np.bincount(group_ids)
+
+    duplicates = np.nonzero(group_sizes[group_ids] > 1)[0]
+    return np.split(duplicates, np.nonzero(np.diff(group_ids[duplicates]))[0] + 1) if len(duplicates) else []
+
+
+def validate_plan(environment: RailEnv, agent_actions: dict[int, list[int]]) -> dict:
+    """ Validate the plan of an environment, see validate_plans."""
+    return validate_plans(environment.rail.grid, get_schedules(environment), [agent_actions])[0]
@@ -0,0 +1,151 @@
+import shlex
+import threading
+import time
+from contextlib import ExitStack
+from typing import Callable, Optional
+
+from clingo import Control, Model, SolveResult
+
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.solver.cancellation import Cancellation
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+
+logger = get_logger()
+
+
+def get_control_arguments(input: SolverInput, configuration: str = "") -> list[str]:
+    """ Get arguments of a clingo control object.
+
+        Args:
+            input: Solver input with the number of threads, parallel mode and warm start
+            configuration: Additional clingo arguments, e.g. one entry of the portfolio
+    """
+    arguments = []
+    if input.threads > 1:
+        arguments.append(f"--parallel-mode={input.threads},{input.parallel_mode.value}")
+    if input.warm_start:
+        # Heuristics of the reference plan are domain heuristics
+        arguments.append("--heuristic=Domain")
+
+    return arguments + shlex.split(configuration)
+
+
+def get_configurations(input: SolverInput) -> list[str]:
+    """ Get configurations to race, without duplicates.
+
+        Without a portfolio there is a single default configuration.
+    """
+    return list(dict.fromkeys(" ".join(shlex.split(configuration))
+                              for configuration in input.portfolio)) or [""]
+
+
+class PortfolioRace:
+    """ Race of several control objects solving the same problem.
+
+        All control objects solve asynchronously, clingo releases the GIL
+        while solving so they actually run in parallel. A model is only
+        passed on if it is better than every model found by any configuration
+        before, so the last model passed on is always the best one.
+        The race ends as soon as one configuration proves optimality
+        (or unsatisfiability), all configurations are done or the time limit is reached.
+    """
+
+    def __init__(self, *,
+                 controls: dict[str, Control],
+                 on_model: Callable[[Model], None],
+                 time_limit: Optional[float] = None,
+                 cancellation: Optional[Cancellation] = None) -> None:
+        self._controls = controls
+        """ Control objects by configuration."""
+        self._on_model = on_model
+        self._time_limit = time_limit
+        """ Seconds after which all configurations are cancelled."""
+        self._cancellation = cancellation or Cancellation()
+
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        """ Set whenever a configuration finishes."""
+        self._results: dict[str, SolveResult] = {}
+        self._best_cost: Optional[list[int]] = None
+
+        self.winner: Optional[str] = None
+        """ Configuration which found the best model."""
+
+    def _member_on_model(self, configuration: str) -> Callable[[Model], None]:
+        def on_model(model: Model) -> None:
+            # Called from the solver threads of all configurations
+            with self._lock:
+                if self._best_cost is not None and model.cost >= self._best_cost:
+                    return
+
+                self._best_cost = model.cost
+                self.winner = configuration
+                self._on_model(model)
+
+        return on_model
+
+    def _member_on_finish(self, configuration: str) -> Callable[[SolveResult], None]:
+        def on_finish(result: SolveResult) -> None:
+            with self._lock:
+                self._results[configuration] = result
+            self._finished.set()
+
+        return on_finish
+
+    def _is_decided(self) -> bool:
+        with self._lock:
+            return (len(self._results) == len(self._controls)
+                    or any(result.exhausted for result in self._results.values()))
+
+    def run(self) -> dict:
+        """ Solve with all configurations until the race is decided.
+
+            Returns:
+                Winner, whether optimality is proven, whether the time
+                limit was reached and the result of each configuration
+        """
+        deadline = None if self._time_limit is None else time.monotonic() + self._time_limit
+        timed_out = False
+
+        with ExitStack() as stack:
+            handles = [stack.enter_context(control.solve(
+                on_model=self._member_on_model(configuration),
+                on_finish=self._member_on_finish(configuration),
+                async_=True)) for configuration, control in self._controls.items()]
+
+            for handle in handles:
+                stack.enter_context(self._cancellation.register(handle))
+
+            while True:
+                self._finished.clear()
+
+                if self._is_decided() or self._cancellation.cancelled:
+                    break
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    logger.info("Time limit reached, cancelling all configurations.")
+                    timed_out = True
+                    break
+
+                self._finished.wait(remaining)
+
+            # Results of configurations which are cancelled now are of no interest
+            with self._lock:
+                results = dict(self._results)
+
+            for handle in handles:
+                handle.cancel()
+
+        return {
+            "winner": self.winner,
+            "optimality_proven": any(result.exhausted and result.satisfiable
+                                     for result in results.values()),
+            "timed_out": timed_out,
+            "cancelled": self._cancellation.cancelled,
+            "configurations": [
+                {"configuration": configuration,
+                 "result": str(results[configuration]) if configuration in results else "CANCELLED"}
+                for configuration in self._controls
+            ]
+        }
@@ -0,0 +1,411 @@
+""" Reference planner for the vertex encoding.
+
+    Prioritized planning: agents are planned one after another with a
+    space-time A* search on the vertex/edge graph of the vertex encoding,
+    avoiding the vertices and edges reserved by the agents planned before.
+    The moves of the search are exactly the choices of the encoding, so a
+    plan translates into departure/4, occupied/4, arrive/4 and wait/4 atoms
+    and respects the same constraints:
+
+    - An agent can not arrive at a vertex occupied by another agent
+    - An edge is used by at most one agent at a time, in either direction
+    - Agents only decide while T < L/2, L being the step limit
+
+    The encoding lets an agent arrive at the end of every edge between the
+    same two vertices, see VertexGraph.get_arrival_orientations, so agents
+    may occupy a vertex in more than one orientation at once. The search
+    keeps track of these orientations and only departs into directions
+    possible in all of them, like the choice rule of the encoding requires.
+
+    Plans are not optimal, but found in a fraction of the time the ASP
+    solver needs, so they serve as warm start and upper bound of the
+    solver and as fallback if the solver does not find a model in time.
+"""
+import heapq
+import itertools
+import random
+import time
+from typing import Optional
+
+from clingo import Function, Number, Symbol, Tuple_
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.asp.graph_generation import (
+    get_decision_vertices,
+    get_directions,
+    get_edges,
+    get_transitions,
+)
+from flatlandasp.core.log_config import get_logger
+
+logger = get_logger()
+
+POSITION_TYPE = tuple[int, int]
+
+MOVE_TYPE = tuple[POSITION_TYPE, int, frozenset[int], int, int, POSITION_TYPE, int, frozenset[int], int, int]
+""" Move along an edge in the form (P,O,Os,D,T,P',D',As,L,T').
+
+    The agent departs from P with orientation O into direction D at time T
+    and arrives at P' with orientation D' at time T', after traversing the
+    edge of length L and waiting T'-T-L time steps at its end. Os are all
+    orientations the agent occupies P in, As all orientations the agent
+    arrives at P' in by arrive/4, see VertexGraph.get_arrival_orientations.
+"""
+
+
+class VertexGraph:
+    """ Vertex/edge graph of an environment as defined by the vertex encoding."""
+
+    def __init__(self, environment: RailEnv) -> None:
+        transitions = get_transitions(environment.rail.grid)
+
+        vertices = get_decision_vertices(transitions)
+        for agent in environment.agents:
+            vertices.add(tuple(agent.initial_position))
+            vertices.add(tuple(agent.target))
+
+        self.directions: dict[tuple[POSITION_TYPE, int], set[int]] = {
+            (vertex, orientation): set(get_directions(nibble))
+            for vertex in vertices
+            for orientation, nibble in enumerate(transitions.get(vertex, []))
+        }
+        """ Possible directions of each vertex and orientation, like cell/3."""
+        self.counts: dict[tuple[POSITION_TYPE, int], int] = {
+            (vertex, orientation): nibble.bit_count()
+            for vertex in vertices
+            for orientation, nibble in enumerate(transitions.get(vertex, []))
+        }
+        """ Number of choices of each vertex and orientation, like count/3."""
+
+        self.edges: dict[tuple[POSITION_TYPE, int], list[tuple[int, POSITION_TYPE, int, int]]] = {}
+        """ Direction, end vertex, exit direction and length of the edges leaving each vertex and orientation."""
+        for vertex, orientation, direction, end, exit_direction, length in get_edges(transitions, vertices):
+            self.edges.setdefault((vertex, orientation), []).append(
+                (direction, end, exit_direction, length))
+
+        self.exits: dict[tuple[POSITION_TYPE, POSITION_TYPE], set[tuple[int, int]]] = {}
+        """ Exit directions and lengths of all edges between two vertices."""
+        for (vertex, _), edges in self.edges.items():
+            for _, end, exit_direction, length in edges:
+                self.exits.setdefault((vertex, end), set()).add((exit_direction, length))
+
+        self._predecessors: dict[tuple[POSITION_TYPE, int], list[tuple[tuple[POSITION_TYPE, int], int]]] = {}
+        for state, edges in self.edges.items():
+            for _, end, exit_direction, length in edges:
+                self._predecessors.setdefault((end, exit_direction), []).append((state, length))
+
+        self._distances: dict[POSITION_TYPE, dict[tuple[POSITION_TYPE, int], int]] = {}
+
+    def get_arrival_orientations(self, vertex: POSITION_TYPE,
+                                 end: POSITION_TYPE,
+                                 travel_time: int) -> frozenset[int]:
+        """ Get orientations an agent arrives in by arrive/4 at the end of an edge.
+
+            The encoding offers the choice to arrive or wait for every edge of
+            length greater than 1 between the same vertices, not only for the
+            edge the agent departed on, as soon as the agent is on its way for
+            as long as the edge is long since any of its departures from the
+            vertex. When the agent arrives waiting is no option, so it arrives
+            at the end of all of these edges at once.
+
+            Args:
+                vertex: Vertex the agent departed from
+                end: Vertex the agent arrives at
+                travel_time: Time since the first departure of the agent from
+                    the vertex, an upper bound is fine as additional
+                    orientations only restrict the next departure
+        """
+        return frozenset(exit_direction for exit_direction, other_length in self.exits[(vertex, end)]
+                         if 1 < other_length <= travel_time)
+
+    def get_distances(self, target: POSITION_TYPE) -> dict[tuple[POSITION_TYPE, int], int]:
+        """ Get shortest travel time from every vertex and orientation to the target.
+
+            Vertices and orientations from which the target can not be
+            reached are missing. Computed by a backward Dijkstra search.
+        """
+        if target in self._distances:
+            return self._distances[target]
+
+        distances = {}
+        queue = [(0, (target, orientation)) for orientation in range(4)]
+        while queue:
+            distance, state = heapq.heappop(queue)
+            if state in distances:
+                continue
+            distances[state] = distance
+            for predecessor, length in self._predecessors.get(state, []):
+                if predecessor not in distances:
+                    heapq.heappush(queue, (distance + length, predecessor))
+
+        self._distances[target] = distances
+        return distances
+
+
+class Reservations:
+    """ Vertices and edges used by the agents planned so far."""
+
+    def __init__(self) -> None:
+        self.occupied: dict[POSITION_TYPE, set[int]] = {}
+        """ Time steps at which each vertex is occupied, like occupied/4."""
+        self.arrivals: dict[POSITION_TYPE, set[int]] = {}
+        """ Time steps at which an agent arrives at each vertex, like arrival/4."""
+        self.blocked: dict[frozenset, set[int]] = {}
+        """ Time steps at which each edge is blocked, regardless of its direction, like blocked/4."""
+
+    def reserve(self, start: POSITION_TYPE, earliest_departure: int, moves: list[MOVE_TYPE]) -> None:
+        arrival_position, arrival_time = start, earliest_departure
+        for position, _, _, _, departure_time, end, _, _, _, end_time in moves:
+            self.arrivals.setdefault(position, set()).add(arrival_time)
+            self.occupied.setdefault(position, set()).update(range(arrival_time, departure_time + 1))
+            self.blocked.setdefault(frozenset((position, end)), set()).update(range(departure_time, end_time))
+            arrival_position, arrival_time = end, end_time
+
+        # Agents leave the environment when they are done
+        self.arrivals.setdefault(arrival_position, set()).add(arrival_time)
+        self.occupied.setdefault(arrival_position, set()).add(arrival_time)
+
+
+def plan_agent(graph: VertexGraph,
+               reservations: Reservations,
+               agent,
+               horizon: int) -> Optional[list[MOVE_TYPE]]:
+    """ Find the moves of an agent reaching its target as early as possible.
+
+        Space-time A* search with the shortest travel time
+        ignoring other agents as heuristic.
+
+        Returns:
+            Moves of the agent or None if the agent can not reach its target
+            before the horizon without conflicting with the reservations
+    """
+    start, target = tuple(agent.initial_position), tuple(agent.target)
+    orientation, earliest_departure = int(agent.direction), agent.earliest_departure
+
+    distances = graph.get_distances(target)
+    if (start, orientation) not in distances or \
+            earliest_departure in reservations.occupied.get(start, set()):
+        return None
+
+    # States are the vertex, the orientation of the agent,
+    # all orientations it occupies the vertex in and the time step
+    start_state = (start, orientation, frozenset([orientation]), earliest_departure)
+    parents: dict[tuple, Optional[tuple]] = {start_state: None}
+    counter = itertools.count()
+    queue = [(earliest_departure + distances[(start, orientation)], next(counter), start_state)]
+
+    def push(state: tuple, parent: tuple) -> None:
+        position, orientation, _, time_step = state
+        distance = distances.get((position, orientation))
+        if distance is None or time_step + distance > horizon or state in parents:
+            return
+        parents[state] = parent
+        heapq.heappush(queue, (time_step + distance, next(counter), state))
+
+    while queue:
+        _, _, state = heapq.heappop(queue)
+
+        position, orientation, orientations, time_step = state
+        if position == target:
+            return get_moves(parents, state)
+
+        if time_step >= horizon:
+            continue
+
+        if time_step + 1 not in reservations.arrivals.get(position, set()):
+            push((position, orientation, orientations, time_step + 1), (state, None))
+
+        for direction, end, exit_direction, length in graph.edges.get((position, orientation), []):
+            if any(direction not in graph.directions[(position, other)] for other in orientations):
+                continue
+
+            blocked = reservations.blocked.get(frozenset((position, end)), set())
+            if any(step in blocked for step in range(time_step, time_step + length)):
+                continue
+
+            occupied = reservations.occupied.get(end, set())
+            end_time = time_step + length
+            # Waiting is only possible at the end of edges longer than 1
+            while end_time <= horizon:
+                if end_time not in occupied:
+                    arrival_orientations = graph.get_arrival_orientations(
+                        position, end, end_time - earliest_departure)
+                    push((end, exit_direction, arrival_orientations | {exit_direction}, end_time),
+                         (state, (direction, length, arrival_orientations)))
+                if length == 1 or end_time in blocked:
+                    break
+                end_time += 1
+
+    return None
+
+
+def get_moves(parents: dict[tuple, Optional[tuple]], state: tuple) -> list[MOVE_TYPE]:
+    moves = []
+    while parents[state] is not None:
+        parent, edge = parents[state]
+        if edge is not None:
+            position, orientation, orientations, time_step = parent
+            end, exit_direction, _, end_time = state
+            direction, length, arrival_orientations = edge
+            moves.append((position, orientation, orientations, direction, time_step,
+                          end, exit_direction, arrival_orientations, length, end_time))
+        state = parent
+
+    return moves[::-1]
+
+
+class ReferencePlan:
+    """ Plan of all agents found by the reference planner."""
+
+    def __init__(self, *, environment: RailEnv,
+                 graph: VertexGraph,
+                 moves: dict[int, list[MOVE_TYPE]],
+                 planning_time: float) -> None:
+        self._environment = environment
+        self._graph = graph
+
+        self.moves = moves
+        """ Moves of each agent."""
+        self.planning_time = planning_time
+        """ Seconds spent planning."""
+
+    def get_done_times(self) -> dict[int, int]:
+        """ Get time step at which each agent reaches its target, like done/2."""
+        return {agent.handle: self.moves[agent.handle][-1][-1] if self.moves[agent.handle]
+                else agent.earliest_departure
+                for agent in self._environment.agents}
+
+    def get_cost(self) -> list[int]:
+        """ Get cost of the plan as reported by clingo for the vertex encoding.
+
+            The minimize statement of the encoding sums up
+            distinct time steps at which agents are done.
+        """
+        return [sum(set(self.get_done_times().values()))]
+
+    def get_atoms(self) -> list[Symbol]:
+        """ Get atoms of the choices of the vertex encoding made by the plan."""
+        atoms = []
+        for agent in self._environment.agents:
+            id = Number(agent.handle)
+            arrival_time = agent.earliest_departure
+            for position, _, orientations, direction, time_step, end, _, arrival_orientations, length, end_time \
+                    in self.moves[agent.handle]:
+                atoms += [Function("occupied", [id, position_symbol(position), Number(orientation), Number(step)])
+                          for step in range(arrival_time + 1, time_step + 1)
+                          for orientation in sorted(orientations)]
+                atoms.append(Function("departure", [id, position_symbol(position), Number(direction),
+                                                    Number(time_step)]))
+                atoms += [Function("wait", [id, position_symbol(position), position_symbol(end), Number(step)])
+                          for step in range(time_step + length - 1, end_time - 1)]
+                atoms += [Function("arrive", [id, position_symbol(end), Number(orientation), Number(end_time - 1)])
+                          for orientation in sorted(arrival_orientations)]
+                arrival_time = end_time
+
+        return atoms
+
+    def get_agent_actions(self) -> dict[int, list[int]]:
+        """ Get actions of each agent ordered by time step, like the agent_action/3 rules of the encoding."""
+        agent_actions = {}
+        for agent in self._environment.agents:
+            actions = []
+            arrival_time = agent.earliest_departure
+            for position, orientation, _, direction, time_step, _, _, _, length, end_time in self.moves[agent.handle]:
+                actions += [4] * (time_step - arrival_time)
+
+                if self._graph.counts[(position, orientation)] == 1 or direction == orientation:
+                    actions.append(2)
+                elif direction == (orientation + 3) % 4:
+                    actions.append(1)
+                elif direction == (orientation + 1) % 4:
+                    actions.append(3)
+
+                if length > 1:
+                    actions += [2] * (length - 2) + [4] * (end_time - time_step - length) + [2]
+                arrival_time = end_time
+
+            if actions:
+                agent_actions[agent.handle] = actions
+
+        return agent_actions
+
+    def get_full_solution(self) -> dict:
+        """ Get plan in the form of SolverCallbackHandler.get_full_solution."""
+        return {
+            "solution": {
+                "agent_paths": {},
+                "agent_actions": self.get_agent_actions()
+            },
+            "cost": self.get_cost(),
+            "optimality_proven": False,
+        }
+
+    def summary(self) -> dict:
+        return {
+            "cost": self.get_cost(),
+            "planning_time": self.planning_time,
+        }
+
+
+def position_symbol(position: POSITION_TYPE) -> Symbol:
+    return Tuple_([Number(position[0]), Number(position[1])])
+
+
+def plan(environment: RailEnv, step_limit: int, *, orderings: int = 4, seed: int = 0) -> Optional[ReferencePlan]:
+    """ Plan all agents of a reset environment by prioritized planning.
+
+        Several orders of the agents are tried: their index, the longest
+        and the shortest travel time first and random orders. The plan
+        with the lowest cost is returned.
+
+        Args:
+            environment: Reset environment
+            step_limit: Step limit of the solver, agents are done before step_limit / 2
+            orderings: Number of agent orders to try
+            seed: Random seed of the random orders
+
+        Returns:
+            Plan with the lowest cost or None if no order leads to a plan
+    """
+    start = time.perf_counter()
+
+    graph = VertexGraph(environment)
+    horizon = step_limit // 2
+
+    agents = list(environment.agents)
+
+    def travel_time(agent) -> int:
+        return graph.get_distances(tuple(agent.target)).get(
+            (tuple(agent.initial_position), int(agent.direction)), horizon)
+
+    # Seeded for reproducible plans, not used for anything security related
+    random_orders = random.Random(seed)  # noqa: S311
+    orders = [agents,
+              sorted(agents, key=travel_time, reverse=True),
+              sorted(agents, key=travel_time)]
+    while len(orders) < orderings:
+        orders.append(random_orders.sample(agents, len(agents)))
+
+    best = None
+    for order in orders[:orderings]:
+        reservations = Reservations()
+        moves = {}
+        for agent in order:
+            agent_moves = plan_agent(graph, reservations, agent, horizon)
+            if agent_moves is None:
+                break
+            reservations.reserve(tuple(agent.initial_position), agent.earliest_departure, agent_moves)
+            moves[agent.handle] = agent_moves
+        else:
+            candidate = ReferencePlan(environment=environment, graph=graph, moves=moves, planning_time=0.0)
+            if best is None or candidate.get_cost() < best.get_cost():
+                best = candidate
+
+    if best is None:
+        logger.info(f"Reference planner found no plan in {orderings} agent orders.")
+        return None
+
+    best.planning_time = time.perf_counter() - start
+    logger.info(f"Reference plan with cost {best.get_cost()} found in {best.planning_time:.3f}s.")
+
+    return best
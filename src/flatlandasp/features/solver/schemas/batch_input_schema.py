@@ -0,0 +1,13 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+
+
+class BatchInput(BaseModel):
+    jobs: list[SolverInput]
+    time_limit: Optional[float] = None
+    """ Time limit in seconds of every job that does not have its own."""
+    workers: Optional[int] = None
+    """ Number of worker processes, defaults to the solver pool size."""
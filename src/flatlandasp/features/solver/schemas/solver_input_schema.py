@@ -1,6 +1,10 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from flatlandasp.core.asp.instance_format import InstanceFormat
+from flatlandasp.core.asp.parallel_mode import ParallelMode
+from flatlandasp.features.solver.model_store import ModelRetention
 
 
 class SolverInput(BaseModel):
@@ -8,3 +12,86 @@ class SolverInput(BaseModel):
     encoding_name: str
     number_of_agents: Optional[int] = None
     step_limit: int = 20
+    instance_format: InstanceFormat = InstanceFormat.TEXT
+    """ Whether the instance is parsed from text or added as ground facts."""
+    use_grounded_program_cache: bool = True
+    """ Reuse grounded programs of previous requests with identical instance and encoding."""
+    use_environment_cache: bool = True
+    """ Reuse the reset environment of previous requests, so their schedules are identical."""
+    use_solution_cache: bool = True
+    """ Return the stored solution of an identical previous request and store the solution of this one.
+
+        Identical means same instance, encoding and solver options, see
+        solution_cache. Disable to bypass the cache and always solve.
+    """
+    environment_seed: Optional[int] = None
+    """ Random seed of resetting the environment, which assigns the schedules."""
+    two_phase_grounding: bool = False
+    """ Ground the map once and only the schedules per request.
+
+        Requires a two-phase variant of the encoding, consisting of
+        <encoding_name>_map.lp and <encoding_name>_schedules.lp.
+    """
+    incremental: bool = False
+    """ Grow the horizon step by step until a plan is found.
+
+        The step limit caps the horizon, requires an incremental
+        variant of the encoding named <encoding_name>_incremental.lp.
+    """
+    precomputed_graph: bool = False
+    """ Compute the vertex/edge graph in Python instead of deriving it while grounding.
+
+        Requires a variant of the encoding consuming vertex/1 and edge/6 facts
+        named <encoding_name>_graph.lp, the instance is always added as text.
+    """
+    lazy_conflicts: bool = False
+    """ Add conflicts between agents during solving instead of grounding them, see conflict_propagator.
+
+        Requires a variant of the encoding without conflict constraints named
+        <encoding_name>_lazy.lp. Does not apply to two-phase grounding,
+        incremental solving and precomputed graphs.
+    """
+    threads: int = 1
+    """ Number of solver threads of each clingo control object."""
+    parallel_mode: ParallelMode = ParallelMode.COMPETE
+    """ Way in which the solver threads share the search, only used with more than one thread."""
+    portfolio: list[str] = []
+    """ Clingo arguments of solver configurations raced against each other.
+
+        For example ["--configuration=frumpy", "--configuration=jumpy --opt-strategy=usc"],
+        every configuration solves its own control object. The first proven
+        optimum wins, all other configurations are cancelled.
+        Does not apply to two-phase grounding and incremental solving.
+    """
+    warm_start: bool = False
+    """ Run the reference planner before solving, see reference_planner.
+
+        Its plan hints the truth values of clingo's choices by domain
+        heuristics and bounds the cost of models, if clingo finds no model
+        within the time limit the plan is returned instead. Heuristics and
+        bound require the vertex encoding. They are not applied with
+        two-phase grounding and incremental solving, which only fall back
+        to the plan.
+    """
+    validate_models: bool = False
+    """ Validate the actions of every model against the map, see plan_validation.
+
+        Conflicts, invalid transitions and missed targets are reported with
+        every improved model and with the solution.
+    """
+    time_limit: Optional[float] = None
+    """ Seconds after which solving is stopped and the best model found so far is returned.
+
+        Applies to all ways of solving, with incremental solving it includes
+        grounding the increments. Solutions report whether it was reached
+        as timed_out and the seconds spent in what it applies to as limited_time.
+    """
+    model_retention: ModelRetention = ModelRetention.LAST
+    """ Which models are kept and returned alongside the solution."""
+    retained_models: int = Field(10, ge=1)
+    """ Number of models kept with the last N retention."""
+    write_instance: bool = False
+    """ Write the generated instance to the instances path for debugging."""
+    profile: bool = False
+    """ Profile the request with cProfile, returns the functions with the highest
+        cumulative time and writes the full profile to the solver output path."""
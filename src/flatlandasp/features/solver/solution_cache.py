@@ -0,0 +1,246 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.utils.file_utils import write_json_file
+from flatlandasp.features.solver.grounded_program_cache import (
+    environment_content_hash,
+    file_content_hash,
+)
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.flatland_asp_config import get_config
+
+UNKEYED_FIELDS = {"environment_name", "number_of_agents", "environment_seed",
+                  "use_grounded_program_cache", "use_environment_cache", "use_solution_cache",
+                  "time_limit", "write_instance", "profile"}
+""" Solver input fields which are not part of the cache key.
+
+    The environment is identified by its content, which already depends on
+    its name, number of agents and seed. Caches, debugging output and
+    profiling do not change the solution, the time spent solving is compared
+    separately, see SolutionCache.get.
+"""
+
+
+def restore_solution(solution: dict) -> None:
+    """ Restore what storing a solution as json changed, in place.
+
+        Json only has string keys and no tuples, agents are keyed by
+        their int ids and positions of paths are tuples like in solutions
+        returned by the solver.
+    """
+    agent_solution = solution.get("solution")
+    if agent_solution is None:
+        return
+
+    agent_solution["agent_actions"] = {int(agent): actions
+                                       for agent, actions in agent_solution["agent_actions"].items()}
+    agent_solution["agent_paths"] = {int(agent): [tuple(position) for position in path]
+                                     for agent, path in agent_solution["agent_paths"].items()}
+
+
+class SolutionCache:
+    """ Persistent cache of solutions keyed by instance, encoding and solver options.
+
+        Every solution is a JSON file in the cache directory below the
+        solver output path, so the cache survives restarts and is shared by
+        all processes. A solution is final if its optimality was proven, it
+        is returned for every identical request. Solutions of requests
+        reaching their time limit are only returned for requests with a time
+        limit of at most the time they were solved for, which would not have
+        found a better solution either, and are replaced by the next solution.
+        Solutions of cancelled requests are never stored.
+
+        Entries older than the maximum age are evicted when they are read or
+        another entry is added, the oldest entries are evicted as soon as the
+        size budget is exceeded.
+    """
+
+    def __init__(self, *, path: str, max_size: int, max_age: float) -> None:
+        self._path = path
+        """ Directory of the cache files, with trailing slash."""
+        self._max_size = max_size
+        """ Size budget of all cache files in bytes."""
+        self._max_age = max_age
+        """ Seconds after which an entry is evicted."""
+
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(*, environment: RailEnv, encoding_files: list[str], input: SolverInput) -> str:
+        """ Get cache key of a solve request.
+
+            Args:
+                environment: Reset environment of the request
+                encoding_files: Every encoding file solving the request reads
+                input: Solver input
+        """
+        content = hashlib.sha256()
+        content.update(environment_content_hash(environment).encode())
+        for encoding_file in encoding_files:
+            content.update(file_content_hash(encoding_file).encode())
+        content.update(json.dumps(input.dict(exclude=UNKEYED_FIELDS), sort_keys=True, default=str).encode())
+
+        return content.hexdigest()
+
+    def _get_file(self, key: str) -> str:
+        return f"{self._path}{key}.json"
+
+    def get(self, key: str, input: SolverInput) -> Optional[dict]:
+        """ Get cached entry usable for the request, None if there is none.
+
+            Returns:
+                Entry with the solution, whether it is final, the seconds
+                it was solved for and the time it was created, the solution
+                has the same types as returned by the solver, see restore_solution
+        """
+        file = self._get_file(key)
+
+        with self._lock:
+            try:
+                with open(file, 'r') as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+
+            if time.time() - entry["created"] > self._max_age:
+                self._remove(file)
+                self.misses += 1
+                return None
+
+            if not entry["final"] and (input.time_limit is None
+                                       or entry.get("limited_time") is None
+                                       or input.time_limit > entry["limited_time"]):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        restore_solution(entry["solution"])
+
+        return entry
+
+    def put(self, key: str, solution: dict, *, cancelled: bool = False) -> bool:
+        """ Store solution of a request, final if its optimality was proven.
+
+            Solutions which are not final are only stored if the request
+            reached its time limit. A final entry is never replaced by a
+            solution which is not final.
+
+            Args:
+                key: Cache key of the request, see key
+                solution: Solution of the request
+                cancelled: Whether the request was cancelled
+
+            Returns:
+                Whether the solution was stored
+        """
+        if cancelled or solution.get("cost") is None:
+            return False
+
+        final = bool(solution.get("optimality_proven"))
+        if not final and not solution.get("timed_out"):
+            return False
+
+        file = self._get_file(key)
+
+        with self._lock:
+            if not final and os.path.exists(file):
+                try:
+                    with open(file, 'r') as f:
+                        if json.load(f)["final"]:
+                            return False
+                except json.JSONDecodeError:
+                    pass
+
+            entry = {
+                "key": key,
+                "final": final,
+                "limited_time": None if final else solution["limited_time"],
+                "created": time.time(),
+                "solution": solution,
+            }
+
+            # Replace atomically, other processes may read the entry at the same time
+            write_json_file(path=self._path, file_name=f"{key}.json.{os.getpid()}.tmp", json_data=entry)
+            os.replace(f"{file}.{os.getpid()}.tmp", file)
+            self.stores += 1
+
+            self._evict()
+
+        return True
+
+    def _get_entries(self) -> list[os.DirEntry]:
+        if not os.path.isdir(self._path):
+            return []
+        return [entry for entry in os.scandir(self._path) if entry.name.endswith(".json")]
+
+    def _remove(self, file: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(file)
+            self.evictions += 1
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in self._get_entries():
+            try:
+                entries.append((entry.path, entry.stat()))
+            except FileNotFoundError:
+                continue
+
+        now = time.time()
+        # Entries are never modified, their modification time is their creation time
+        expired = [file for file, stat in entries if now - stat.st_mtime > self._max_age]
+        for file in expired:
+            self._remove(file)
+
+        entries = sorted((stat.st_mtime, stat.st_size, file) for file, stat in entries if file not in expired)
+        size = sum(file_size for _, file_size, _ in entries)
+        for _, file_size, file in entries:
+            if size <= self._max_size:
+                break
+            self._remove(file)
+            size -= file_size
+
+    def remove(self, key: str) -> None:
+        """ Remove entry of a request, if there is one."""
+        with self._lock, contextlib.suppress(FileNotFoundError):
+            os.remove(self._get_file(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in self._get_entries():
+                os.remove(entry.path)
+
+    def statistics(self) -> dict:
+        with self._lock:
+            entries = self._get_entries()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "size": sum(entry.stat().st_size for entry in entries),
+                "max_size": self._max_size,
+            }
+
+
+@lru_cache
+def get_solution_cache() -> SolutionCache:
+    return SolutionCache(path=f"{get_config().solver_output_path}cache/",
+                         max_size=get_config().solution_cache_size_mb * 1024 * 1024,
+                         max_age=get_config().solution_cache_max_age_hours * 3600)
@@ -0,0 +1,58 @@
+import asyncio
+import json
+from typing import AsyncIterator
+
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.solver import solver
+from flatlandasp.features.solver.cancellation import Cancellation
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+
+logger = get_logger()
+
+
+def server_sent_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_solution(input: SolverInput) -> AsyncIterator[str]:
+    """ Solve in a worker thread and stream the progress as server-sent events.
+
+        Events:
+            model: Every improved model with cost, actions, paths and elapsed time
+            solution: Full solution as returned by solver.solve, always the last event
+            error: Solving failed, always the last event
+
+        Solving is cancelled as soon as the client disconnects.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+    cancellation = Cancellation()
+
+    def on_improved_model(model: dict) -> None:
+        # Called from the solver threads
+        loop.call_soon_threadsafe(events.put_nowait, ("model", model))
+
+    def run() -> None:
+        try:
+            event = ("solution", solver.solve(input, cancellation, on_improved_model))
+        except FileNotFoundError:
+            event = ("error", {"detail": "File not found."})
+        except Exception as e:
+            logger.exception("Solving failed.")
+            event = ("error", {"detail": repr(e)})
+
+        # Queued after all models, since those are queued before solve returns
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    loop.run_in_executor(None, run)
+
+    try:
+        while True:
+            event, data = await events.get()
+            yield server_sent_event(event, data)
+
+            if event != "model":
+                break
+    finally:
+        # Only has an effect if the client disconnected before the solution event
+        cancellation.cancel()
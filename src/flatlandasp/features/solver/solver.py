@@ -0,0 +1,480 @@
+import time
+from contextlib import ExitStack
+from typing import Callable, Optional
+
+from clingo import Control, HeuristicType
+from flatland.envs.rail_env import RailEnv
+
+from flatlandasp.core.asp.graph_generation import generate_graph_instance_lines
+from flatlandasp.core.asp.instance_format import InstanceFormat
+from flatlandasp.core.asp.instance_generation import (
+    add_instance_facts,
+    generate_instance_lines,
+)
+from flatlandasp.core.flatland import environment_crud
+from flatlandasp.core.flatland.environment_cache import (
+    EnvironmentCache,
+    get_environment_cache,
+)
+from flatlandasp.core.flatland.environment_file_type import EnvironmentFileType
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.core.utils.file_utils import (
+    write_json_file,
+    write_lines_to_file_in_output,
+)
+from flatlandasp.features.solver.cancellation import Cancellation
+from flatlandasp.features.solver.conflict_propagator import ConflictPropagator
+from flatlandasp.features.solver.grounded_program_cache import (
+    GroundedProgram,
+    GroundedProgramCache,
+    get_grounded_program_cache,
+)
+from flatlandasp.features.solver.incremental_solving import solve_incremental
+from flatlandasp.features.solver.instrumentation import (
+    PhaseTimer,
+    get_profile_summary,
+    get_solver_metrics,
+    profile_request,
+)
+from flatlandasp.features.solver.map_program import get_map_program
+from flatlandasp.features.solver.plan_validation import get_schedules, validate_plans
+from flatlandasp.features.solver.portfolio_solving import (
+    PortfolioRace,
+    get_configurations,
+    get_control_arguments,
+)
+from flatlandasp.features.solver.reference_planner import ReferencePlan, plan
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.features.solver.solution_cache import (
+    SolutionCache,
+    get_solution_cache,
+)
+from flatlandasp.features.solver.solver_callback_handler import SolverCallbackHandler
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+
+def load_environment(input: SolverInput, timer: Optional[PhaseTimer] = None) -> RailEnv:
+    """ Load and reset the environment requested by the solver input.
+
+        Reset environments are taken from the environment cache if enabled.
+
+        Args:
+            input: Solver input
+            timer: Measures loading and reset, nothing is measured on cache hits
+    """
+    timer = timer or PhaseTimer()
+
+    if is_loaded_from_pickle_file(input):
+        # Environments may have been saved without waiting for their pkl file
+        with timer.phase("environment_loading"):
+            environment_crud.ensure_pickle_file(name=input.environment_name)
+
+    def load() -> RailEnv:
+        with timer.phase("environment_loading"):
+            environment = read_environment(input)
+
+        with timer.phase("environment_reset"):
+            environment.reset(random_seed=input.environment_seed)
+
+        return environment
+
+    if not input.use_environment_cache:
+        return load()
+
+    key = EnvironmentCache.key(name=input.environment_name,
+                               file_path=get_environment_file(input),
+                               number_of_agents=input.number_of_agents,
+                               seed=input.environment_seed)
+
+    return get_environment_cache().get_or_load(key, load)
+
+
+def is_loaded_from_pickle_file(input: SolverInput) -> bool:
+    # If no number of agents is provided
+    # or the provided number is lower than 1
+    # load the pkl file directly
+    return input.number_of_agents is None or input.number_of_agents < 1
+
+
+def get_environment_file(input: SolverInput) -> str:
+    """ Get path of the file the environment requested by the solver input is read from."""
+    path = get_config().flatland_environments_path
+
+    if is_loaded_from_pickle_file(input):
+        return f'{path}{input.environment_name}.{EnvironmentFileType.PKL.value}'
+
+    return f'{path}{environment_crud.get_data_file_name(name=input.environment_name)}'
+
+
+def read_environment(input: SolverInput) -> RailEnv:
+    """ Read the environment requested by the solver input without resetting it."""
+    if is_loaded_from_pickle_file(input):
+        environment = environment_crud.read_from_pickle_file(
+            f'{input.environment_name}.pkl')
+    else:
+        environment = environment_crud.get_environment_from_data(
+            environment_crud.read_data_from_file(name=input.environment_name),
+            number_of_agents=input.number_of_agents)
+
+    return environment
+
+
+def get_encoding_file(input: SolverInput) -> str:
+    if input.precomputed_graph:
+        return f"{get_config().asp_encodings_path}{input.encoding_name}_graph.lp"
+
+    if input.lazy_conflicts:
+        return f"{get_config().asp_encodings_path}{input.encoding_name}_lazy.lp"
+
+    return f"{get_config().asp_encodings_path}{input.encoding_name}.lp"
+
+
+def get_encoding_files(input: SolverInput) -> list[str]:
+    """ Get every encoding file solving the request reads."""
+    path = get_config().asp_encodings_path
+
+    if input.incremental:
+        return [f"{path}{input.encoding_name}_incremental.lp"]
+
+    if input.two_phase_grounding:
+        return [f"{path}{input.encoding_name}_map.lp", f"{path}{input.encoding_name}_schedules.lp"]
+
+    return [get_encoding_file(input)]
+
+
+def generate_lines(environment: RailEnv, input: SolverInput) -> list[str]:
+    """ Generate textual ASP instance matching the encoding of the input."""
+    if input.precomputed_graph:
+        return generate_graph_instance_lines(environment, input.step_limit)
+
+    return generate_instance_lines(environment, input.step_limit)
+
+
+def ground_program(environment: RailEnv,
+                   input: SolverInput,
+                   arguments: list[str],
+                   timer: PhaseTimer) -> Control:
+    """ Create control object with instance and encoding and ground it."""
+    clingo_control = Control(arguments)
+
+    if input.lazy_conflicts and not input.precomputed_graph:
+        clingo_control.register_propagator(ConflictPropagator())
+
+    # Create ASP instance from environment
+    instance_lines = None
+    with timer.phase("instance_generation"):
+        if input.instance_format == InstanceFormat.BACKEND and not input.precomputed_graph:
+            # Add ground facts directly, skipping the parser
+            add_instance_facts(clingo_control, environment, input.step_limit)
+        else:
+            # Add instance directly without a detour over the file system
+            instance_lines = generate_lines(environment, input)
+            clingo_control.add("base", [], "\n".join(instance_lines))
+
+    if input.write_instance:
+        # Only for debugging purposes, the solver
+        # does not read the instance from this file
+        with timer.phase("instance_writing"):
+            write_lines_to_file_in_output(
+                path=get_config().asp_instances_path,
+                file_name=f"{input.environment_name}.lp",
+                lines=instance_lines or generate_lines(environment, input))
+
+    # Load encoding from file
+    with timer.phase("encoding_loading"):
+        clingo_control.load(get_encoding_file(input))
+
+    logger.info("Start grounding.")
+
+    with timer.phase("grounding"):
+        clingo_control.ground()
+
+    return clingo_control
+
+
+def get_grounded_program(environment: RailEnv,
+                         input: SolverInput,
+                         timer: PhaseTimer,
+                         configuration: str = "") -> GroundedProgram:
+    """ Get grounded program, from the grounded program cache if enabled.
+
+        Args:
+            environment: Environment to solve
+            input: Solver input
+            timer: Measures the phases of grounding, nothing is measured on cache hits
+            configuration: Additional clingo arguments, see get_control_arguments
+    """
+    arguments = get_control_arguments(input, configuration)
+
+    if not input.use_grounded_program_cache:
+        return GroundedProgram(control=ground_program(environment, input, arguments, timer))
+
+    key = GroundedProgramCache.key(environment=environment,
+                                   encoding_file=get_encoding_file(input),
+                                   step_limit=input.step_limit,
+                                   arguments=tuple(arguments))
+
+    return get_grounded_program_cache().get_or_ground(
+        key, lambda: GroundedProgram(control=ground_program(environment, input, arguments, timer)))
+
+
+def apply_warm_start(program: GroundedProgram, reference_plan: ReferencePlan) -> None:
+    """ Guide the search of a grounded program to the reference plan and bound its cost.
+
+        The choices of the plan are preferred positively by domain heuristics
+        of the sign modifier. They only hint the truth value of the plan atoms
+        once clasp decides them and do not change which atoms it decides
+        first, forcing the plan's choices first makes proving optimality
+        slower, see warm_start_benchmark. Heuristics become part of the
+        ground program and are only added once, the plan of a cached program
+        does not change as programs are keyed by the environment content
+        and the step limit. The bound is part of the configuration and set
+        on every request. The lock of the program has to be held.
+    """
+    control = program.control
+
+    if not any(True for _ in control.symbolic_atoms.by_signature("departure", 4)):
+        logger.info("Program has no departure/4 atoms of the vertex encoding, skipping warm start.")
+        return
+
+    if not program.warm_started:
+        with control.backend() as backend:
+            for atom in reference_plan.get_atoms():
+                # The plan may contain atoms the grounder already ruled out
+                if control.symbolic_atoms[atom] is not None:
+                    backend.add_heuristic(backend.add_atom(atom), HeuristicType.Sign, 1, 0, [])
+        program.warm_started = True
+
+    control.configuration.solve.opt_mode = f"opt,{reference_plan.get_cost()[0]}"
+
+
+def get_reference_plan(input: SolverInput) -> dict:
+    """ Plan the environment described by the solver input with the reference planner only.
+
+        Raises:
+            FileNotFoundError: Environment does not exist
+            ValueError: Planner found no plan within the step limit
+    """
+    timer = PhaseTimer()
+
+    environment = load_environment(input, timer)
+
+    with timer.phase("planning"):
+        reference_plan = plan(environment, input.step_limit)
+
+    if reference_plan is None:
+        raise ValueError(f"Reference planner found no plan within step limit {input.step_limit}.")
+
+    solution = reference_plan.get_full_solution()
+    solution["timings"] = timer.timings
+
+    return solution
+
+
+def solve(input: SolverInput,
+          cancellation: Optional[Cancellation] = None,
+          on_improved_model: Optional[Callable[[dict], None]] = None,
+          environment: Optional[RailEnv] = None) -> dict:
+    """ Solve the environment described by the solver input.
+
+        The time spent in each phase is returned in timings, see PHASES,
+        and added to the solver metrics of this process. Solutions of
+        identical previous requests are returned from the solution cache.
+
+        Args:
+            input: Solver input
+            cancellation: Allows to cancel solving from another thread,
+                the best solution found until then is returned
+            on_improved_model: Called for every model found, see SolverCallbackHandler
+            environment: Environment loaded before, loaded from the input if not given
+
+        Raises:
+            FileNotFoundError: Environment or encoding does not exist
+    """
+    timer = PhaseTimer()
+
+    with profile_request(input.profile) as profiler:
+        solution = solve_cached(input, timer, cancellation, on_improved_model, environment)
+
+    if profiler is not None:
+        solution["profile"] = get_profile_summary(profiler)
+        profiler.dump_stats(f"{get_config().solver_output_path}"
+                            f"{input.environment_name}__{input.encoding_name}__profile.prof")
+
+    get_solver_metrics().observe(timer.timings)
+
+    return solution
+
+
+def solve_cached(input: SolverInput,
+                 timer: PhaseTimer,
+                 cancellation: Optional[Cancellation],
+                 on_improved_model: Optional[Callable[[dict], None]],
+                 environment: Optional[RailEnv]) -> dict:
+    """ Solve the environment or return the stored solution of an identical request, see SolutionCache.
+
+        Whether the solution was taken from the cache or stored in it
+        is returned in solution_cache.
+    """
+    if not input.use_solution_cache:
+        return solve_environment(input, timer, cancellation, on_improved_model, environment)
+
+    if environment is None:
+        environment = load_environment(input, timer)
+
+    with timer.phase("solution_lookup"):
+        key = SolutionCache.key(environment=environment,
+                                encoding_files=get_encoding_files(input),
+                                input=input)
+        entry = get_solution_cache().get(key, input)
+
+    if entry is not None:
+        logger.info(f"Returning {'final' if entry['final'] else 'time-limited'} solution from the solution cache.")
+        solution = entry["solution"]
+        solution["timings"] = timer.timings
+        solution["solution_cache"] = {"hit": True,
+                                      "key": key,
+                                      "final": entry["final"],
+                                      "age": time.time() - entry["created"]}
+        return solution
+
+    solution = solve_environment(input, timer, cancellation, on_improved_model, environment)
+
+    # Reaching the time limit cancels as well
+    cancelled = cancellation is not None and cancellation.cancelled and not cancellation.timed_out
+    stored = get_solution_cache().put(key, solution, cancelled=cancelled)
+    solution["solution_cache"] = {"hit": False,
+                                  "key": key,
+                                  "final": stored and bool(solution["optimality_proven"]),
+                                  "stored": stored}
+
+    return solution
+
+
+def solve_environment(input: SolverInput,
+                      timer: PhaseTimer,
+                      cancellation: Optional[Cancellation],
+                      on_improved_model: Optional[Callable[[dict], None]],
+                      environment: Optional[RailEnv]) -> dict:
+    """ Solve the environment described by the solver input, see solve."""
+    if environment is None:
+        environment = load_environment(input, timer)
+
+    reference_plan = None
+    if input.warm_start:
+        with timer.phase("planning"):
+            reference_plan = plan(environment, input.step_limit)
+
+    validate = None
+    if input.validate_models:
+        # Grid and schedules are extracted once, not per model
+        grid, schedules = environment.rail.grid, get_schedules(environment)
+
+        def validate(agent_actions: dict[int, list[int]]) -> dict:
+            return validate_plans(grid, schedules, [agent_actions])[0]
+
+    callback_handler = SolverCallbackHandler(logger=logger,
+                                             model_retention=input.model_retention,
+                                             retained_models=input.retained_models,
+                                             on_improved_model=on_improved_model,
+                                             validate_plan=validate)
+
+    if input.warm_start and (input.incremental or input.two_phase_grounding):
+        logger.info("Incremental and two-phase solving are not warm-started, the plan is only a fallback.")
+
+    # Incremental and two-phase solving are not raced, the time limit cancels them
+    cancellation = cancellation or Cancellation()
+
+    horizon = None
+    race = None
+    if input.incremental:
+        start = time.perf_counter()
+        with cancellation.time_limit(input.time_limit):
+            horizon, statistics = solve_incremental(
+                environment, input, callback_handler.on_model,
+                callback_handler.on_finish, cancellation)
+        limited_time = time.perf_counter() - start
+        for increment in horizon["increments"]:
+            timer.add("grounding", increment["grounding_time"])
+            timer.add("solving", increment["solving_time"])
+    elif input.two_phase_grounding:
+        with timer.phase("grounding"):
+            map_program = get_map_program(environment, input)
+
+        start = time.perf_counter()
+        with cancellation.time_limit(input.time_limit):
+            statistics, timings = map_program.solve_schedules(
+                environment, input.step_limit, callback_handler.on_model,
+                callback_handler.on_finish, cancellation)
+        limited_time = time.perf_counter() - start
+        timer.add("grounding", timings["grounding"])
+        timer.add("solving", timings["solving"])
+    else:
+        programs = {configuration: get_grounded_program(environment, input, timer, configuration)
+                    for configuration in get_configurations(input)}
+
+        with ExitStack() as locks:
+            # Always lock in the same order, other requests may race the same programs
+            for program in sorted(programs.values(), key=id):
+                locks.enter_context(program.lock)
+                if reference_plan is not None:
+                    apply_warm_start(program, reference_plan)
+
+            logger.info(f"Start solving with {len(programs)} configuration(s).")
+
+            start = time.perf_counter()
+            with timer.phase("solving"):
+                race = PortfolioRace(controls={configuration: program.control
+                                               for configuration, program in programs.items()},
+                                     on_model=callback_handler.on_model,
+                                     time_limit=input.time_limit,
+                                     cancellation=cancellation).run()
+            limited_time = time.perf_counter() - start
+
+            statistics = programs[race["winner"] or next(iter(programs))].control.statistics
+
+        if race["optimality_proven"]:
+            callback_handler.optimality_proven = True
+
+    logger.info(
+        f"Finished solving, best model has cost {callback_handler.cost}.")
+
+    with timer.phase("model_decoding"):
+        solution = callback_handler.get_full_solution()
+
+    if reference_plan is not None:
+        fallback = callback_handler.cost is None
+        if fallback:
+            logger.info("No model found, falling back to the reference plan.")
+            solution.update(reference_plan.get_full_solution())
+            if validate is not None:
+                solution["validation"] = validate(solution["solution"]["agent_actions"])
+        solution["reference_plan"] = {**reference_plan.summary(), "fallback": fallback}
+    elif input.warm_start:
+        solution["reference_plan"] = None
+
+    # Same dictionary, so the response includes the time of writing the output
+    solution["timings"] = timer.timings
+
+    if horizon is not None:
+        solution["horizon"] = horizon
+
+    if input.portfolio or input.time_limit is not None:
+        solution["race"] = race
+
+    if input.time_limit is not None:
+        solution["timed_out"] = race["timed_out"] if race is not None else cancellation.timed_out
+        solution["limited_time"] = limited_time
+
+    with timer.phase("output_writing"):
+        write_json_file(path=get_config().solver_output_path,
+                        file_name=f"{input.environment_name}__{input.encoding_name}.json",
+                        json_data=solution)
+
+        write_json_file(path=get_config().solver_output_path,
+                        file_name=f"{input.environment_name}__{input.encoding_name}__stats.json",
+                        json_data=statistics)
+
+    return solution
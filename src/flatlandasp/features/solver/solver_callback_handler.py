@@ -1,20 +1,84 @@
+import time
 from logging import Logger
-from typing import Any, Tuple
+from typing import Callable, Optional, Sequence, Tuple
 
-from clingo import Model
+from clingo import Model, SolveResult, Symbol
 
+from flatlandasp.features.solver.model_store import ModelRetention, ModelStore
 
-class SolverCallbackHandler:
-    def __init__(self, *, logger: Logger) -> None:
-        self._logger = logger
 
-        self._models = []
+def decode_agent_actions(symbols: Sequence[Symbol]) -> dict[int, list[int]]:
+    """ Get actions of each agent ordered by time step from agent_action/3 symbols."""
+    agent_actions = {}
+
+    for symbol in symbols:
+        if symbol.name == "agent_action":
+            id = symbol.arguments[0].number
+            action = symbol.arguments[1].number
+            time_step = symbol.arguments[2].number
+
+            agent_actions.setdefault(id, {})[time_step] = action
+
+    return {
+        agent_id: [agent_actions[agent_id][step]
+                   for step in sorted(agent_actions[agent_id])]
+        for agent_id in sorted(agent_actions)
+    }
+
+
+def decode_agent_paths(symbols: Sequence[Symbol]) -> dict[int, list[Tuple[int, int]]]:
+    """ Get path of each agent from agent_position/3 symbols."""
+    agent_paths = {}
+
+    for symbol in symbols:
+        if symbol.name == "agent_position":
+            id = symbol.arguments[0].number
+            x = symbol.arguments[1].number
+            y = symbol.arguments[2].number
+
+            agent_paths.setdefault(id, []).append((y, x))
 
-        self._agent_actions = {}
-        """ Actions each agent is supposed to make."""
-        self._agent_paths: dict[Any, list[Tuple[int, int]]] = {}
-        """ Path for each agent resulting from the given actions."""
-        self._number_of_symbols = None
+    return agent_paths
+
+
+class SolverCallbackHandler:
+    """ Collects models reported by clingo and keeps track of the best one.
+
+        Models are compared by cost. Per model only the cost is compared
+        and the model is retained, actions and paths are decoded once
+        from the best model when they are requested.
+    """
+
+    def __init__(self, *,
+                 logger: Logger,
+                 model_retention: ModelRetention = ModelRetention.ALL,
+                 retained_models: int = 1,
+                 on_improved_model: Optional[Callable[[dict], None]] = None,
+                 validate_plan: Optional[Callable[[dict[int, list[int]]], dict]] = None) -> None:
+        self._logger = logger
+        self._on_improved_model = on_improved_model
+        """ Called with cost, actions, paths and elapsed time of every model,
+            while optimizing each model clingo reports improves the last one.
+        """
+        self._validate_plan = validate_plan
+        """ Validates the actions of a model, see plan_validation.validate_plans."""
+        self._start = time.perf_counter()
+
+        self._models = ModelStore(retention=model_retention, size=retained_models)
+
+        self._best_symbols: Optional[Sequence[Symbol]] = None
+        """ Shown symbols of the best model."""
+        self._solution: Optional[dict] = None
+        """ Actions and paths decoded from the best model."""
+        self._validation: Optional[dict] = None
+        """ Validation of the actions of the best model."""
+
+        self.cost: Optional[list[int]] = None
+        """ Cost of the best model."""
+        self.optimality_proven = False
+        """ Whether the best model is known to be optimal."""
+        self.cost_timeline: list[dict] = []
+        """ Number, cost and elapsed time of every model."""
 
     def on_model(self, model: Model):
         """ Populate SolverCallbackHandler with data based on model.
@@ -23,55 +87,75 @@ class SolverCallbackHandler:
                 model: Model that was found by the solver
         """
         symbols = model.symbols(shown=True)
-        self._models.append([str(symbol) for symbol in symbols])
-
-        if self._number_of_symbols is None or len(symbols) < self._number_of_symbols:
-            self._logger.info(
-                f"Shorter model found {self._number_of_symbols} > {len(symbols)}")
-            self._number_of_symbols = len(symbols)
-        else:
+        self._models.add(symbols)
+
+        cost = list(model.cost)
+        elapsed = time.perf_counter() - self._start
+
+        self.cost_timeline.append({"number": model.number,
+                                   "cost": cost,
+                                   "elapsed": elapsed})
+
+        if model.optimality_proven:
+            self.optimality_proven = True
+
+        if self._on_improved_model is not None:
+            agent_actions = decode_agent_actions(symbols)
+            self._on_improved_model({
+                "number": model.number,
+                "cost": cost,
+                "optimality_proven": model.optimality_proven,
+                "elapsed": elapsed,
+                "agent_actions": agent_actions,
+                "agent_paths": decode_agent_paths(symbols),
+                "validation": self._validate_plan(agent_actions) if self._validate_plan is not None else None,
+            })
+
+        if self.cost is not None and cost >= self.cost:
             return
 
-        agent_actions = {}
-
-        for symbol in symbols:
-            if symbol.name == "agent_action":
-                id = symbol.arguments[0].number
-                action = symbol.arguments[1].number
-                time_step = symbol.arguments[2].number
+        self._logger.info(f"Better model found {self.cost} > {cost}")
 
-                agent_actions.setdefault(id, {})[time_step] = action
+        self.cost = cost
+        self._best_symbols = symbols
+        self._solution = None
+        self._validation = None
 
-            if symbol.name == "agent_position":
-                id = symbol.arguments[0].number
-                x = symbol.arguments[1].number
-                y = symbol.arguments[2].number
+    def on_finish(self, result: SolveResult) -> None:
+        """ Mark the best model as optimal if the search space has been exhausted."""
+        if result.exhausted and result.satisfiable:
+            self.optimality_proven = True
 
-                self._agent_paths.setdefault(id, []).append((y, x))
+    def _get_solution(self) -> dict:
+        if self._solution is None:
+            symbols = self._best_symbols or []
+            self._solution = {
+                "agent_paths": decode_agent_paths(symbols),
+                "agent_actions": decode_agent_actions(symbols)
+            }
+        return self._solution
 
-        self._agent_actions = {
-            agent_id: [agent_actions[agent_id][step]
-                       for step in sorted(agent_actions[agent_id])]
-            for agent_id in sorted(agent_actions)
-        }
+    def _get_validation(self) -> Optional[dict]:
+        if self._validation is None and self._validate_plan is not None and self._best_symbols is not None:
+            self._validation = self._validate_plan(self._get_solution()["agent_actions"])
+        return self._validation
 
     def get_last_model_strings(self) -> list[str]:
-        if (len(self._models) == 0):
-            return []
-
-        return self._models[-1]
+        return self._models.last()
 
     def get_actions(self) -> dict:
-        return self._agent_actions
+        return self._get_solution()["agent_actions"]
 
     def get_paths(self) -> dict:
-        return self._agent_paths
+        return self._get_solution()["agent_paths"]
 
     def get_full_solution(self) -> dict:
         return {
-            "solution": {
-                "agent_paths": self._agent_paths,
-                "agent_actions": self._agent_actions
-            },
-            "models": self._models
+            "solution": self._get_solution(),
+            "cost": self.cost,
+            "optimality_proven": self.optimality_proven,
+            "cost_timeline": self.cost_timeline,
+            "models": self._models.decode(),
+            "number_of_models": self._models.number_of_models,
+            "validation": self._get_validation()
         }
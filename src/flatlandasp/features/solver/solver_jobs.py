@@ -0,0 +1,201 @@
+import multiprocessing
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Optional
+
+from flatlandasp.core.log_config import get_logger
+from flatlandasp.features.solver import solver
+from flatlandasp.features.solver.cancellation import Cancellation
+from flatlandasp.features.solver.instrumentation import get_solver_metrics
+from flatlandasp.features.solver.schemas.solver_input_schema import SolverInput
+from flatlandasp.flatland_asp_config import get_config
+
+logger = get_logger()
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobQueueFullError(Exception):
+    """ Raised if a job is submitted while the queue is at its maximum depth."""
+
+
+def run_job(input: SolverInput, cancel_event: Any) -> dict:
+    """ Solve in a worker process of the pool.
+
+        Args:
+            input: Solver input
+            cancel_event: Event shared with the server process, the job
+                is cancelled as soon as it is set
+    """
+    cancellation = Cancellation()
+    finished = threading.Event()
+
+    def watch_cancel_event() -> None:
+        cancel_event.wait()
+        if not finished.is_set():
+            cancellation.cancel()
+
+    threading.Thread(target=watch_cancel_event, daemon=True).start()
+
+    try:
+        return solver.solve(input, cancellation)
+    finally:
+        finished.set()
+        # Wake up the watcher so it does not outlive the job
+        cancel_event.set()
+
+
+def observe_job_timings(future: Future) -> None:
+    """ Add timings of a finished job to the metrics of the server process.
+
+        Jobs are solved in worker processes, which have metrics of their own.
+    """
+    if not future.cancelled() and future.exception() is None:
+        get_solver_metrics().observe(future.result()["timings"])
+
+
+class SolverJob:
+    """ Solver request running in the background."""
+
+    def __init__(self, *, input: SolverInput, future: Future, cancel_event: Any) -> None:
+        self.id = uuid.uuid4().hex
+        self.input = input
+        self.future = future
+        self.cancel_event = cancel_event
+        """ Event shared with the worker process, see run_job."""
+        self.cancel_requested = False
+
+    @property
+    def status(self) -> JobStatus:
+        if self.future.cancelled():
+            return JobStatus.CANCELLED
+        if not self.future.done():
+            return JobStatus.RUNNING if self.future.running() else JobStatus.QUEUED
+        if self.future.exception() is not None:
+            return JobStatus.FAILED
+        if self.cancel_requested:
+            return JobStatus.CANCELLED
+        return JobStatus.DONE
+
+    def result(self) -> Optional[dict]:
+        """ Get solution of a finished job, cancelled jobs return the best solution found."""
+        if not self.future.done() or self.future.cancelled() or self.future.exception() is not None:
+            return None
+        return self.future.result()
+
+    def cancel(self) -> None:
+        if self.future.done():
+            return
+
+        self.cancel_requested = True
+        if not self.future.cancel():
+            self.cancel_event.set()
+
+    def summary(self) -> dict:
+        exception = (self.future.exception()
+                     if self.future.done() and not self.future.cancelled() else None)
+        return {
+            "id": self.id,
+            "status": self.status.value,
+            "environment_name": self.input.environment_name,
+            "encoding_name": self.input.encoding_name,
+            "error": None if exception is None else repr(exception),
+        }
+
+
+class SolverJobManager:
+    """ Runs solver requests in a process pool, so they neither block the event loop nor each other.
+
+        Every worker process has its own grounded program caches. At most
+        queue_depth jobs can be queued or running at the same time,
+        finished jobs are kept until history_size newer jobs have finished.
+    """
+
+    def __init__(self, *, pool_size: int, queue_depth: int, history_size: int) -> None:
+        self._pool_size = pool_size
+        self._queue_depth = queue_depth
+        self._history_size = history_size
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager: Optional[Any] = None
+        """ Manager process providing events shared with the worker processes."""
+
+        self._jobs: OrderedDict[str, SolverJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        if self._executor is None:
+            self._manager = multiprocessing.Manager()
+            self._executor = ProcessPoolExecutor(max_workers=self._pool_size)
+
+    def submit(self, input: SolverInput) -> SolverJob:
+        """ Queue solver request.
+
+            Raises:
+                JobQueueFullError: Maximum number of unfinished jobs is reached
+        """
+        with self._lock:
+            unfinished = sum(1 for job in self._jobs.values() if not job.future.done())
+            if unfinished >= self._queue_depth:
+                raise JobQueueFullError
+
+            self._start()
+
+            cancel_event = self._manager.Event()
+            future = self._executor.submit(run_job, input, cancel_event)
+            future.add_done_callback(observe_job_timings)
+            job = SolverJob(input=input, future=future, cancel_event=cancel_event)
+            self._jobs[job.id] = job
+
+            self._forget_finished_jobs()
+
+        logger.info(f"Submitted job {job.id}.")
+
+        return job
+
+    def get(self, job_id: str) -> SolverJob:
+        """ Get job by id.
+
+            Raises:
+                KeyError: Job does not exist (anymore)
+        """
+        with self._lock:
+            return self._jobs[job_id]
+
+    def get_all(self) -> list[SolverJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _forget_finished_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.future.done()]
+        for job_id in finished[:max(0, len(finished) - self._history_size)]:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel()
+
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._manager.shutdown()
+
+            self._executor = None
+            self._manager = None
+
+
+@lru_cache
+def get_solver_job_manager() -> SolverJobManager:
+    return SolverJobManager(pool_size=get_config().solver_pool_size,
+                            queue_depth=get_config().solver_queue_depth,
+                            history_size=get_config().solver_job_history_size)
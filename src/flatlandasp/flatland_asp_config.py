@@ -9,6 +9,17 @@ class FlatlandASPConfig(yaml.YAMLObject):
     asp_instances_path: str
     flatland_environments_path: str
     solver_output_path: str
+    benchmark_results_path: str = 'data/benchmarks/'
+    environment_cache_size: int = 16
+    grounded_program_cache_size: int = 16
+    grounded_program_cache_memory_mb: int = 1024
+    map_program_max_requests: int = 100
+    solver_pool_size: int = 4
+    solver_queue_depth: int = 32
+    solver_job_history_size: int = 100
+    frame_cache_size: int = 256
+    solution_cache_size_mb: int = 256
+    solution_cache_max_age_hours: float = 168
 
     yaml_tag: str = '!config'
     yaml_loader = yaml.SafeLoader
@@ -1,8 +1,10 @@
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
 from flatlandasp.core.log_config import get_logger
 from flatlandasp.features.router import router as feature_router
+from flatlandasp.features.solver.instrumentation import get_solver_metrics
 
 logger = get_logger()
 
@@ -10,6 +12,12 @@ app = FastAPI(title="FlatlandASP", version="0.01")
 app.include_router(feature_router)
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """ Solver metrics in the Prometheus text format."""
+    return get_solver_metrics().render()
+
+
 def main():
     uvicorn.run("flatlandasp.main:app",
                 host='0.0.0.0',